@@ -0,0 +1,89 @@
+# coding: utf-8
+
+import asyncio
+import contextvars
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.shortcuts import redirect
+
+from challenge.jobs import sync_runner
+from challenge.middleware import instrument_connection
+from challenge.utils import metrics, spotify_auth, SpotifySession
+from challenge.views import USER_AUTH_URL, ArtistViewSet
+
+
+logger = logging.getLogger(__name__)
+
+# Threads running database work of async views
+DB_EXECUTOR = ThreadPoolExecutor(
+    max_workers=getattr(settings, "ASYNC_DB_WORKERS", 10),
+    thread_name_prefix="async-db",
+)
+
+artist_list_view = ArtistViewSet.as_view({"get": "list"})
+artist_detail_view = ArtistViewSet.as_view({"get": "retrieve"})
+
+
+async def run_in_db_thread(func: callable, *args, **kwargs):
+    """
+    Runs a function accessing the database in `DB_EXECUTOR`, without
+    blocking the event loop. Connections are handled as for a request, and
+    queries are timed with the request ones (see `InstrumentationMiddleware`).
+    """
+
+    def call():
+        close_old_connections()
+        if metrics.enabled():
+            instrument_connection()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(DB_EXECUTOR, context.run, call)
+
+
+def _render(view: callable, request, **kwargs):
+    """ Response of the view, rendered (rendering may query the DB). """
+    response = view(request, **kwargs)
+    if hasattr(response, "render") and callable(response.render):
+        response.render()
+    return response
+
+
+async def artist_list(request):
+    """ Async variant of `GET /api/artists/`, see `ArtistViewSet`. """
+    return await run_in_db_thread(_render, artist_list_view, request)
+
+
+async def artist_detail(request, pk):
+    """ Async variant of `GET /api/artists/<id>/`, see `ArtistViewSet`. """
+    return await run_in_db_thread(
+        _render, artist_detail_view, request, pk=pk
+    )
+
+
+async def spotify_callback(request):
+    """
+    Async variant of `spotify_callback`: the user session is retreived
+    without blocking the event loop, and the sync is queued, not awaited.
+    """
+    code = request.GET.get("code")
+
+    if not code:
+        logger.error("No code found in Spotify API callback. Retrying.")
+        return redirect(USER_AUTH_URL)
+
+    session_infos = await spotify_auth.async_get_user_auth(code=code)
+    session = await run_in_db_thread(
+        SpotifySession.from_user_auth, session_infos
+    )
+    await run_in_db_thread(partial(sync_runner.enqueue, session=session))
+
+    return redirect("/api/")
@@ -0,0 +1,100 @@
+# coding: utf-8
+
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags, quote_etag
+
+# Cached responses keys embed this version, bumping it invalidates them all
+VERSION_KEY = "artists:version"
+
+
+def get_artists_cache():
+    """ Cache backend of artists API responses, see `CACHES` setting. """
+    return caches[getattr(settings, "ARTISTS_CACHE_ALIAS", "default")]
+
+
+def get_artists_cache_version(cache=None) -> int:
+    cache = cache or get_artists_cache()
+    # Starting from current time, a version lost by the backend (eviction,
+    # restart) can not be reused by stale entries
+    cache.add(VERSION_KEY, int(time.time() * 1000), timeout=None)
+    return cache.get(VERSION_KEY)
+
+
+def invalidate_artists_cache():
+    """ Invalidates every cached artists response. """
+    cache = get_artists_cache()
+    get_artists_cache_version(cache)
+    try:
+        cache.incr(VERSION_KEY)
+    except ValueError:
+        # Evicted meanwhile
+        get_artists_cache_version(cache)
+
+
+class CachedResponseMixin:
+    """
+    ViewSet mixin caching rendered `list` and `retrieve` responses.
+
+    Responses are cached by path and query parameters (page, page size,
+    filters...) for renderers in `cached_formats`, with an `ETag` header.
+    A cache hit is returned without querying the database nor serializing,
+    or as a 304 response if the client already has it (`If-None-Match`).
+    """
+
+    cached_formats = ("json",)
+
+    def list(self, request, *args, **kwargs):
+        return self._cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self._cached_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def _cached_response(self, view, request, *args, **kwargs):
+        renderer_format = request.accepted_renderer.format
+        if renderer_format not in self.cached_formats:
+            return view(request, *args, **kwargs)
+
+        cache = get_artists_cache()
+        key = self._cache_key(request, renderer_format, cache)
+        entry = cache.get(key)
+
+        if entry is None:
+            response = view(request, *args, **kwargs)
+            if response.status_code != 200:
+                return response
+
+            response = self.finalize_response(
+                request, response, *args, **kwargs
+            )
+            response.render()
+            entry = {
+                "etag": quote_etag(hashlib.md5(response.content).hexdigest()),
+                "content": response.content,
+                "content_type": response["Content-Type"],
+            }
+            cache.set(key, entry)
+        else:
+            response = HttpResponse(
+                entry["content"], content_type=entry["content_type"]
+            )
+
+        if entry["etag"] in parse_etags(
+            request.META.get("HTTP_IF_NONE_MATCH", "")
+        ):
+            response = HttpResponseNotModified()
+
+        response["ETag"] = entry["etag"]
+        return response
+
+    def _cache_key(self, request, renderer_format: str, cache) -> str:
+        query = "&".join(sorted(request.query_params.urlencode().split("&")))
+        url = hashlib.md5(f"{request.path}?{query}".encode()).hexdigest()
+        version = get_artists_cache_version(cache)
+        return f"artists:{version}:{renderer_format}:{url}"
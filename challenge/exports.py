@@ -0,0 +1,62 @@
+# coding: utf-8
+
+import json
+
+from django.db.models import Q
+from rest_framework.renderers import BaseRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+
+class NDJSONRenderer(BaseRenderer):
+    """
+    Newline delimited JSON, one artist per line. Only used for content
+    negotiation: exports are streamed by `iter_artists_ndjson`.
+    """
+
+    media_type = "application/x-ndjson"
+    format = "ndjson"
+    charset = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return json.dumps(data, cls=JSONEncoder).encode()
+
+
+def iter_artists_ndjson(
+    queryset, serializer_class, chunk_size: int, context: dict = None
+):
+    """
+    Yields artists of the queryset serialized by `serializer_class`, one JSON
+    document per line. Artists may be model instances or `.values()` rows.
+
+    Artists are read by chunks of `chunk_size` rows (with their albums),
+    following the (`name`, `id`) index from the last artist of the previous
+    chunk, so memory does not depend on the number of artists.
+    """
+    queryset = queryset.order_by("name", "id")
+    last_position = None
+
+    while True:
+        chunk = queryset
+        if last_position is not None:
+            name, id_ = last_position
+            chunk = chunk.filter(Q(name__gt=name) | Q(name=name, id__gt=id_))
+        chunk = list(chunk[:chunk_size])
+        if not chunk:
+            return
+
+        for artist in serializer_class(chunk, many=True, context=context).data:
+            yield json.dumps(
+                artist,
+                cls=JSONEncoder,
+                ensure_ascii=False,
+                separators=(",", ":"),
+            ).encode() + b"\n"
+
+        last_position = _position(chunk[-1])
+
+
+def _position(artist) -> tuple:
+    """ Position of the artist in (`name`, `id`) index. """
+    if isinstance(artist, dict):
+        return artist["name"], artist["id"]
+    return artist.name, artist.id
@@ -0,0 +1,48 @@
+# coding: utf-8
+
+from django.db.models import Q
+from rest_framework import serializers
+
+
+class AlbumFilterSerializer(serializers.Serializer):
+    """
+    Albums filters of the artists API, read from query parameters.
+    Invalid values raise a `ValidationError` (HTTP 400).
+    """
+
+    released_after = serializers.DateField(required=False)
+    released_before = serializers.DateField(required=False)
+    album_type = serializers.CharField(required=False, max_length=50)
+    min_tracks = serializers.IntegerField(required=False, min_value=0)
+
+    # Album lookups by filter, served by `Album` composite indexes
+    LOOKUPS = {
+        "released_after": "released_on__gte",
+        "released_before": "released_on__lte",
+        "album_type": "album_type",
+        "min_tracks": "total_tracks__gte",
+    }
+
+    @classmethod
+    def from_query_params(cls, query_params):
+        serializer = cls(
+            data={
+                name: query_params[name]
+                for name in cls.LOOKUPS
+                if name in query_params
+            }
+        )
+        serializer.is_valid(raise_exception=True)
+        return serializer
+
+    def albums_q(self, prefix: str = "") -> Q:
+        """
+        Filters as a `Q` object on albums, or on a relation to albums with
+        `prefix` (such as "album__" from artists).
+        """
+        return Q(
+            **{
+                f"{prefix}{self.LOOKUPS[name]}": value
+                for name, value in self.validated_data.items()
+            }
+        )
@@ -0,0 +1,224 @@
+# coding: utf-8
+
+import logging
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, connection
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from challenge.models import SyncJob
+from challenge.utils import SpotifyConnector, SpotifySession
+
+
+logger = logging.getLogger(__name__)
+
+
+class SyncJobRunner:
+    """
+    Runs new releases syncs out of HTTP requests, from a database queue of
+    `SyncJob` records.
+
+    A single sync is active at a time, across processes (see
+    `SyncJob.active`): enqueuing while a sync is pending or running returns
+    that sync. Jobs are run by a worker thread, started with
+    the server (see `start_worker`) or the first job if `SYNC_WORKER_ENABLED`
+    setting is True, which also schedules a sync every `SYNC_INTERVAL`
+    seconds with the last user session, or the stored one.
+
+    The worker is woken up by jobs queued in its process, and polls the
+    queue every `SYNC_POLL_INTERVAL` seconds for jobs queued by other
+    processes (see `run_sync_worker` command). Running jobs hold a lease
+    renewed by heartbeats: jobs whose lease expired (`SYNC_JOB_LEASE`
+    seconds) were interrupted, and are marked as failed.
+    """
+
+    def __init__(self):
+        self.session = None
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._thread = None
+
+    def enqueue(
+        self,
+        session: SpotifySession = None,
+        full: bool = False,
+        scheduled: bool = False,
+    ) -> SyncJob:
+        """ Queues a sync with the session, unless one is already active. """
+        if session is not None:
+            self.session = session
+
+        with self._lock:
+            job = None
+            while job is None:
+                try:
+                    with transaction.atomic():
+                        job = SyncJob.objects.create(
+                            full=full, scheduled=scheduled
+                        )
+                except IntegrityError:
+                    # Unless it finished meanwhile
+                    job = SyncJob.objects.filter(active=True).first()
+
+        if getattr(settings, "SYNC_WORKER_ENABLED", False):
+            self.start()
+        self._wakeup.set()
+        return job
+
+    def start(self):
+        """ Starts the worker thread if it is not running yet. """
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stopping.clear()
+            self._thread = threading.Thread(
+                target=self.run_forever, name="sync-worker", daemon=True
+            )
+            self._thread.start()
+
+    def stop(self):
+        """ Stops the worker loop once its current job is done. """
+        self._stopping.set()
+        self._wakeup.set()
+
+    def run_forever(self):
+        """ Worker loop, runs jobs as they come and schedules syncs. """
+        with self._lock:
+            # Jobs queued by the worker itself do not start another one
+            self._thread = threading.current_thread()
+        interval = getattr(settings, "SYNC_INTERVAL", None)
+        poll_interval = getattr(settings, "SYNC_POLL_INTERVAL", 5)
+        next_scheduled = time.monotonic() + (interval or 0)
+
+        while True:
+            self._wakeup.wait(timeout=poll_interval)
+            self._wakeup.clear()
+            if self._stopping.is_set():
+                return
+
+            if interval is not None and time.monotonic() >= next_scheduled:
+                next_scheduled = time.monotonic() + interval
+                if self.get_session() is not None:
+                    self.enqueue(scheduled=True)
+
+            try:
+                self.run_pending()
+            except Exception as e:
+                logger.error(f"Sync worker failure. Exception: {e}")
+            finally:
+                close_old_connections()
+
+    def run_pending(self):
+        """ Runs pending jobs, oldest first, until there is none. """
+        self.fail_interrupted_jobs()
+        while True:
+            job = self._claim_next_job()
+            if job is None:
+                return
+            self.run(job)
+
+    def run(self, job: SyncJob):
+        """ Runs the sync of a claimed job and stores its outcome. """
+        done = threading.Event()
+        threading.Thread(
+            target=self._heartbeat,
+            args=(job, done),
+            name=f"sync-{job.id}-heartbeat",
+            daemon=True,
+        ).start()
+        try:
+            session = self.get_session()
+            if session is None:
+                raise RuntimeError("No Spotify session available.")
+            connector = SpotifyConnector.from_session(session=session)
+            job.report = connector.sync_new_releases(full=job.full)
+            job.status = SyncJob.SUCCEEDED
+        except Exception as e:
+            logger.error(f"Sync {job.id} failed. Exception: {e}")
+            job.status = SyncJob.FAILED
+            job.error = str(e)
+        finally:
+            done.set()
+
+        job.finished_at = timezone.now()
+        job.save(update_fields=["status", "report", "error", "finished_at"])
+
+    def get_session(self) -> SpotifySession:
+        """ Last user session, loaded from database after a restart. """
+        if self.session is None:
+            self.session = SpotifySession.load()
+        return self.session
+
+    def fail_interrupted_jobs(self):
+        """
+        Jobs left running by a stopped process will never finish: their
+        lease expired, unlike jobs run by live processes.
+        """
+        expired = timezone.now() - timedelta(
+            seconds=getattr(settings, "SYNC_JOB_LEASE", 60)
+        )
+        lease_expired = Q(heartbeat_at__lt=expired) | Q(heartbeat_at=None)
+        SyncJob.objects.filter(lease_expired, status=SyncJob.RUNNING).update(
+            status=SyncJob.FAILED,
+            error="Interrupted.",
+            finished_at=timezone.now(),
+            active=None,
+        )
+
+    @staticmethod
+    def _heartbeat(job: SyncJob, done: threading.Event):
+        """ Renews the lease of a running job until it is `done`. """
+        interval = getattr(settings, "SYNC_JOB_LEASE", 60) / 3
+        try:
+            while not done.wait(timeout=interval):
+                SyncJob.objects.filter(
+                    id=job.id, status=SyncJob.RUNNING
+                ).update(heartbeat_at=timezone.now())
+        except Exception as e:
+            logger.error(f"Sync {job.id} heartbeat failure. Exception: {e}")
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _claim_next_job():
+        """
+        Moves the oldest pending job to running status, None if no job is
+        pending.
+        """
+        jobs = SyncJob.objects.filter(status=SyncJob.PENDING).order_by(
+            "created_at", "id"
+        )
+        for job in jobs:
+            # Only one runner can move the job out of pending status
+            claimed = SyncJob.objects.filter(
+                id=job.id, status=SyncJob.PENDING
+            ).update(
+                status=SyncJob.RUNNING,
+                started_at=timezone.now(),
+                heartbeat_at=timezone.now(),
+            )
+            if claimed:
+                job.refresh_from_db()
+                return job
+
+        return None
+
+
+sync_runner = SyncJobRunner()
+
+
+def start_worker():
+    """
+    Starts the worker thread when the server boots, if `SYNC_WORKER_ENABLED`
+    setting is True, so that scheduled syncs run with the stored session
+    without waiting for a user to log in again.
+    """
+    if getattr(settings, "SYNC_WORKER_ENABLED", False):
+        sync_runner.start()
+
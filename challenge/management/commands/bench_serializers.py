@@ -0,0 +1,100 @@
+# coding: utf-8
+
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from challenge.models import Album, Artist
+from challenge.serializers import ArtistSerializer, FastArtistSerializer
+from challenge.views import ArtistViewSet
+
+
+class Command(BaseCommand):
+    """
+    Micro-benchmark of artists serialization (queries, serialization and
+    JSON rendering) with DRF serializers and with `FastArtistSerializer`.
+    Data is generated in a transaction rolled back afterwards.
+    """
+
+    help = "Compares DRF and fast artists serializers at several scales."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--sizes", nargs="+", type=int, default=[10, 100, 1000]
+        )
+        parser.add_argument("--albums-per-artist", type=int, default=3)
+        parser.add_argument("--repeat", type=int, default=5)
+
+    def handle(self, *args, **options):
+        for size in options["sizes"]:
+            with transaction.atomic():
+                self._populate(size, options["albums_per_artist"])
+                drf = self._best_time(self._render_drf, options["repeat"])
+                fast = self._best_time(self._render_fast, options["repeat"])
+                transaction.set_rollback(True)
+
+            self.stdout.write(
+                f"{size:>6} artists | DRF {drf * 1000:9.2f} ms"
+                f" | fast {fast * 1000:9.2f} ms | x{drf / fast:.1f}"
+            )
+
+    @staticmethod
+    def _render_drf():
+        queryset = ArtistViewSet.get_prefetched_queryset()
+        queryset = queryset.order_by("name", "id")
+        return JSONRenderer().render(ArtistSerializer(queryset, many=True).data)
+
+    @staticmethod
+    def _render_fast():
+        rows = FastArtistSerializer.get_queryset().order_by("name", "id")
+        return JSONRenderer().render(FastArtistSerializer(rows, many=True).data)
+
+    @staticmethod
+    def _best_time(func: callable, repeat: int) -> float:
+        timings = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+        return min(timings)
+
+    @staticmethod
+    def _populate(size: int, albums_per_artist: int):
+        Artist.objects.bulk_create(
+            Artist(name=f"artist {index}", slug=f"bench-{index}")
+            for index in range(size)
+        )
+        Album.objects.bulk_create(
+            Album(
+                name=f"album {index}",
+                slug=f"bench-{index}",
+                album_type="album",
+                type="album",
+                release_date="2020-10-15",
+                release_date_precision="day",
+                total_tracks=10,
+            )
+            for index in range(size * albums_per_artist)
+        )
+
+        artists = dict(
+            Artist.objects.filter(slug__startswith="bench-").values_list(
+                "slug", "id"
+            )
+        )
+        albums = Album.objects.filter(slug__startswith="bench-").values_list(
+            "slug", "id"
+        )
+        # Consecutive albums belong to the same artist
+        albums_artist = {
+            f"bench-{index}": artists[f"bench-{index // albums_per_artist}"]
+            for index in range(size * albums_per_artist)
+        }
+        Album.artists.through.objects.bulk_create(
+            Album.artists.through(
+                album_id=album_id, artist_id=albums_artist[slug]
+            )
+            for slug, album_id in albums
+        )
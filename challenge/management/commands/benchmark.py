@@ -0,0 +1,189 @@
+# coding: utf-8
+
+import json
+import platform
+import sys
+import time
+
+import django
+from django.core.management.base import BaseCommand
+from django.db import connection, transaction
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from challenge.cache import invalidate_artists_cache
+from challenge.models import Artist
+from challenge.utils import SpotifyConnector, SpotifySession
+from challenge.utils.rate_limiter import RateLimiter
+from challenge.utils.spotify_stub import StubSpotifyClient
+from challenge.utils.spotify_stub import SyntheticNewReleases
+
+
+class Command(BaseCommand):
+    """
+    Benchmark of new releases ingestion and artists API on synthetic new
+    releases, served offline by `StubSpotifyClient` instead of Spotify API.
+
+    Ingestion runs a full sync through `SpotifyConnector`, then artists list
+    and detail endpoints are requested, with cold and warm responses cache.
+    Timings and queries counts are written as JSON so runs can be compared.
+    Data is stored in a transaction rolled back afterwards.
+    """
+
+    help = "Times ingestion and artists API on synthetic new releases."
+
+    # `SyncState` of benchmark syncs, kept apart from real syncs state
+    SYNC_KEY = "benchmark"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--albums", nargs="+", type=int, default=[1000])
+        parser.add_argument("--artist-overlap", type=float, default=0.5)
+        parser.add_argument("--artists-per-album", type=int, default=2)
+        parser.add_argument("--requests", type=int, default=20)
+        parser.add_argument(
+            "--output",
+            default="benchmark-results.json",
+            help="Results file, '-' for standard output.",
+        )
+
+    def handle(self, *args, **options):
+        results = {
+            "created_at": timezone.now().isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+            },
+            "options": {
+                key: options[key]
+                for key in [
+                    "albums",
+                    "artist_overlap",
+                    "artists_per_album",
+                    "requests",
+                ]
+            },
+            "runs": [
+                self._run(albums_count, options)
+                for albums_count in options["albums"]
+            ],
+        }
+
+        content = json.dumps(results, indent=2)
+        if options["output"] == "-":
+            self.stdout.write(content)
+        else:
+            with open(options["output"], "w") as output:
+                output.write(content)
+            self.stderr.write(f"Results written to {options['output']}")
+
+    def _run(self, albums_count: int, options: dict) -> dict:
+        catalog = SyntheticNewReleases(
+            albums_count=albums_count,
+            artist_overlap=options["artist_overlap"],
+            artists_per_album=options["artists_per_album"],
+        )
+
+        with transaction.atomic():
+            run = {
+                "albums": albums_count,
+                "artists": catalog.artists_count,
+                "ingestion": self._bench_ingestion(catalog),
+                "api": self._bench_api(options["requests"]),
+            }
+            transaction.set_rollback(True)
+
+        ingestion = run["ingestion"]
+        self.stderr.write(
+            f"{albums_count:>8} albums | ingestion "
+            f"{ingestion['seconds']:8.2f} s "
+            f"({ingestion['albums_per_second']:.0f} albums/s) | list p50 "
+            f"{run['api']['list']['p50_ms']:.1f} ms | detail p50 "
+            f"{run['api']['detail']['p50_ms']:.1f} ms"
+        )
+        return run
+
+    def _bench_ingestion(self, catalog: SyntheticNewReleases) -> dict:
+        client = StubSpotifyClient(catalog=catalog)
+        connector = SpotifyConnector(
+            session=SpotifySession(
+                access_token="benchmark",
+                expires_in=3600,
+                refresh_token="benchmark",
+            ),
+            markets=[None],
+            client=client,
+            # No throttling offline
+            rate_limiter=RateLimiter(max_rate=sys.maxsize, burst=sys.maxsize),
+        )
+        connector.SYNC_KEY = self.SYNC_KEY
+
+        with CaptureQueriesContext(connection) as queries:
+            start = time.perf_counter()
+            report = connector.sync_new_releases(full=True)
+            seconds = time.perf_counter() - start
+
+        return {
+            "seconds": seconds,
+            "albums_per_second": catalog.albums_count / seconds,
+            "requests": client.requests,
+            "queries": len(queries),
+            "report": report,
+        }
+
+    def _bench_api(self, requests_count: int) -> dict:
+        client = Client()
+
+        list_urls = []
+        url = "/api/artists/"
+        while url and len(list_urls) < requests_count:
+            list_urls.append(url)
+            url = client.get(url, {"format": "json"}).json().get("next")
+
+        artists_ids = list(
+            Artist.objects.order_by("?").values_list("id", flat=True)[
+                :requests_count
+            ]
+        )
+        detail_urls = [f"/api/artists/{pk}/" for pk in artists_ids]
+
+        return {
+            "list": self._bench_urls(client, list_urls, cold=True),
+            "list_cached": self._bench_urls(client, list_urls, cold=False),
+            "detail": self._bench_urls(client, detail_urls, cold=True),
+        }
+
+    @staticmethod
+    def _bench_urls(client: Client, urls: list, cold: bool) -> dict:
+        """
+        Latency percentiles and mean queries count of the given URLs, with
+        responses cache invalidated before each request if `cold`.
+        """
+        timings = []
+        queries_counts = []
+        for url in urls:
+            if cold:
+                invalidate_artists_cache()
+            with CaptureQueriesContext(connection) as queries:
+                start = time.perf_counter()
+                client.get(url, {"format": "json"})
+                timings.append((time.perf_counter() - start) * 1000)
+            queries_counts.append(len(queries))
+
+        return {
+            "requests": len(urls),
+            "p50_ms": _percentile(timings, 50),
+            "p95_ms": _percentile(timings, 95),
+            "max_ms": max(timings, default=0),
+            "queries": sum(queries_counts) / max(len(queries_counts), 1),
+        }
+
+
+def _percentile(values: list, percent: int) -> float:
+    """ Nearest-rank percentile, 0 without values. """
+    if not values:
+        return 0
+    values = sorted(values)
+    rank = max(round(percent / 100 * len(values)) - 1, 0)
+    return values[rank]
@@ -0,0 +1,25 @@
+# coding: utf-8
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from challenge.cache import invalidate_artists_cache
+from challenge.models import Artist
+
+
+class Command(BaseCommand):
+    """
+    Rebuilds artists albums summaries from scratch. They are otherwise
+    maintained when new releases are stored.
+    """
+
+    help = "Rebuilds artists albums summaries from their albums."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            Artist.update_summaries()
+            transaction.on_commit(invalidate_artists_cache)
+
+        self.stdout.write(
+            f"Summaries of {Artist.objects.count()} artists rebuilt."
+        )
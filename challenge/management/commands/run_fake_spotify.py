@@ -0,0 +1,55 @@
+# coding: utf-8
+
+from django.core.management.base import BaseCommand
+
+from challenge.utils.fake_spotify import FakeSpotifyServer
+from challenge.utils.spotify_stub import SyntheticNewReleases
+
+
+class Command(BaseCommand):
+    """
+    Runs a local fake of Spotify accounts and new releases endpoints (see
+    `FakeSpotifyServer`), to load test syncs without Spotify.
+    """
+
+    help = "Serves fake Spotify accounts and new releases endpoints."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--host", default="127.0.0.1")
+        parser.add_argument("--port", type=int, default=5001)
+        parser.add_argument("--albums", type=int, default=1000)
+        parser.add_argument("--artist-overlap", type=float, default=0.5)
+        parser.add_argument(
+            "--latency", type=float, default=0, help="Seconds per page."
+        )
+        parser.add_argument("--throttle-rate", type=float, default=0)
+        parser.add_argument("--error-rate", type=float, default=0)
+        parser.add_argument("--retry-after", type=int, default=1)
+        parser.add_argument("--token-lifetime", type=int, default=3600)
+
+    def handle(self, *args, **options):
+        server = FakeSpotifyServer(
+            catalog=SyntheticNewReleases(
+                albums_count=options["albums"],
+                artist_overlap=options["artist_overlap"],
+            ),
+            host=options["host"],
+            port=options["port"],
+            latency=options["latency"],
+            throttle_rate=options["throttle_rate"],
+            error_rate=options["error_rate"],
+            retry_after=options["retry_after"],
+            token_lifetime=options["token_lifetime"],
+        )
+
+        self.stdout.write(
+            f"Fake Spotify listening on {server.url}, start the server with"
+            f" SPOTIFY_API_URL={server.url} SPOTIFY_ACCOUNTS_URL={server.url}"
+        )
+        try:
+            server.httpd.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            server.httpd.server_close()
+            self.stdout.write(f"Stopped. Stats: {dict(server.stats)}")
@@ -0,0 +1,18 @@
+# coding: utf-8
+
+from django.core.management.base import BaseCommand
+
+from challenge.jobs import sync_runner
+
+
+class Command(BaseCommand):
+    """
+    Runs the sync worker in the foreground, with the stored Spotify
+    session, instead of a thread of the web server.
+    """
+
+    help = "Runs pending and scheduled new releases syncs."
+
+    def handle(self, *args, **options):
+        self.stdout.write("Sync worker started.")
+        sync_runner.run_forever()
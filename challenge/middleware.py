@@ -0,0 +1,128 @@
+# coding: utf-8
+
+import asyncio
+import time
+from contextvars import ContextVar
+
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from challenge.utils import metrics
+
+# Queries timer of the request being handled, in any thread running its
+# queries (context variables follow `sync_to_async` and `run_in_db_thread`)
+_query_timer = ContextVar("query_timer", default=None)
+
+
+class QueryTimer:
+    """ Database execute wrapper counting queries and their duration. """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - start
+
+
+def _time_query(execute, sql, params, many, context):
+    """ Execute wrapper timing queries with the request queries timer. """
+    timer = _query_timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def instrument_connection(connection=connection, **kwargs):
+    """
+    Times queries of the connection (the current thread one by default)
+    with the queries timer of the request, see `InstrumentationMiddleware`.
+    """
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_time_query)
+
+
+class InstrumentationMiddleware:
+    """
+    Records duration, database queries (count and time) and the remaining
+    time (serialization and rendering) of requests in the metrics registry,
+    and exposes them to API clients as a `Server-Timing` header.
+
+    Requests are handled in the server mode (WSGI or ASGI): async requests
+    are not adapted to a thread. Queries are timed in any thread the request
+    runs them in. The middleware is not used when `METRICS_ENABLED` setting
+    is False.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    # Requests getting a `Server-Timing` header
+    SERVER_TIMING_PREFIX = "/api/"
+
+    def __init__(self, get_response):
+        if not metrics.enabled():
+            raise MiddlewareNotUsed("Metrics are disabled.")
+
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            # Called from the event loop, see `__acall__`
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+        connection_created.connect(instrument_connection)
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self):
+            return self.__acall__(request)
+
+        instrument_connection()
+        queries = QueryTimer()
+        token = _query_timer.set(queries)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        return self._record(request, response, queries, start)
+
+    async def __acall__(self, request):
+        queries = QueryTimer()
+        token = _query_timer.set(queries)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_timer.reset(token)
+        return self._record(request, response, queries, start)
+
+    def _record(self, request, response, queries: QueryTimer, start: float):
+        duration = time.perf_counter() - start
+        serialization = max(duration - queries.seconds, 0)
+
+        match = request.resolver_match
+        labels = dict(
+            view=match.view_name if match else "unknown",
+            method=request.method,
+        )
+        metrics.observe("http_request_duration_seconds", duration, **labels)
+        metrics.observe("http_request_db_seconds", queries.seconds, **labels)
+        metrics.observe("http_request_db_queries", queries.count, **labels)
+        metrics.observe(
+            "http_request_serialization_seconds", serialization, **labels
+        )
+
+        if request.path.startswith(self.SERVER_TIMING_PREFIX):
+            response["Server-Timing"] = ", ".join(
+                [
+                    f'db;dur={queries.seconds * 1000:.2f};'
+                    f'desc="{queries.count} queries"',
+                    f"serialization;dur={serialization * 1000:.2f}",
+                    f"total;dur={duration * 1000:.2f}",
+                ]
+            )
+        return response
@@ -0,0 +1,19 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="artist",
+            index=models.Index(
+                fields=["name", "id"], name="challenge_a_name_3a17a7_idx"
+            ),
+        ),
+    ]
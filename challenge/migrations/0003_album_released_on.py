@@ -0,0 +1,50 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:14
+
+from django.db import migrations, models
+
+from challenge.utils import parse_release_date
+
+
+def fill_released_on(apps, schema_editor):
+    """Converts release dates of existing albums."""
+    Album = apps.get_model("challenge", "Album")
+
+    albums = list(
+        Album.objects.only("id", "release_date", "release_date_precision")
+    )
+    for album in albums:
+        album.released_on = parse_release_date(
+            release_date=album.release_date,
+            precision=album.release_date_precision,
+        )
+    Album.objects.bulk_update(albums, ["released_on"], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0002_artist_name_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="released_on",
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(fill_released_on, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(
+                fields=["album_type", "released_on"],
+                name="challenge_a_album_t_de0677_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(
+                fields=["released_on", "total_tracks"],
+                name="challenge_a_release_76e881_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,64 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:16
+
+from django.db import migrations, models
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+
+
+def fill_summaries(apps, schema_editor):
+    """Computes summaries of existing artists from their albums."""
+    Artist = apps.get_model("challenge", "Artist")
+    Album = apps.get_model("challenge", "Album")
+
+    links = (
+        Album.artists.through.objects.filter(artist_id=OuterRef("pk"))
+        .order_by()
+        .values("artist_id")
+    )
+
+    def aggregate(function, output_field=models.IntegerField()):
+        return Subquery(
+            links.annotate(value=function).values("value"),
+            output_field=output_field,
+        )
+
+    Artist.objects.update(
+        albums_count=Coalesce(aggregate(Count("album_id")), 0),
+        tracks_count=Coalesce(aggregate(Sum("album__total_tracks")), 0),
+        last_released_on=aggregate(
+            Max("album__released_on"), output_field=models.DateField()
+        ),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0003_album_released_on"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="artist",
+            name="albums_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name="artist",
+            name="last_released_on",
+            field=models.DateField(null=True),
+        ),
+        migrations.AddField(
+            model_name="artist",
+            name="tracks_count",
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_summaries, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name="artist",
+            index=models.Index(
+                fields=["last_released_on"],
+                name="challenge_a_last_re_5f803b_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,31 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0004_artist_summaries"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncState",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("last_run", models.DateTimeField(null=True)),
+                ("seen_albums_ids", models.JSONField(default=list)),
+                ("pages_fingerprints", models.JSONField(default=dict)),
+            ],
+        ),
+    ]
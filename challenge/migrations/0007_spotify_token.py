@@ -0,0 +1,32 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0006_sync_job"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SpotifyToken",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("key", models.CharField(max_length=50, unique=True)),
+                ("access_token", models.CharField(max_length=500)),
+                ("refresh_token", models.CharField(max_length=500)),
+                ("expiry_date", models.DateTimeField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
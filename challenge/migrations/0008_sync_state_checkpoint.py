@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:24
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0007_spotify_token"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncstate",
+            name="checkpoint",
+            field=models.JSONField(null=True),
+        ),
+    ]
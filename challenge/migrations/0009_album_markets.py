@@ -0,0 +1,18 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0008_sync_state_checkpoint"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="album",
+            name="markets",
+            field=models.TextField(blank=True, default=""),
+        ),
+    ]
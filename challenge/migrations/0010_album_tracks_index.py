@@ -0,0 +1,20 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0009_album_markets"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="album",
+            index=models.Index(
+                fields=["total_tracks", "released_on"],
+                name="challenge_a_total_t_16562c_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 3.1.2 on 2026-10-18 16:51
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0010_album_tracks_index"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="SyncCheckpointPage",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("offset", models.IntegerField()),
+                ("fingerprint", models.CharField(max_length=40)),
+                ("albums_ids", models.JSONField(default=list)),
+                ("known", models.BooleanField(default=False)),
+                (
+                    "state",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="checkpoint_pages",
+                        to="challenge.syncstate",
+                    ),
+                ),
+            ],
+        ),
+    ]
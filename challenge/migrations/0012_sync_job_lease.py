@@ -0,0 +1,43 @@
+# Generated by Django 3.1.2 on 2026-10-18 17:11
+
+from django.db import migrations, models
+
+
+def mark_active_jobs(apps, schema_editor):
+    """Marks the latest pending or running job as the active one."""
+    SyncJob = apps.get_model("challenge", "SyncJob")
+
+    job = (
+        SyncJob.objects.filter(status__in=["pending", "running"])
+        .order_by("-created_at", "-id")
+        .first()
+    )
+    if job is not None:
+        job.active = True
+        job.save(update_fields=["active"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("challenge", "0011_sync_checkpoint_pages"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="syncjob",
+            name="active",
+            field=models.BooleanField(null=True),
+        ),
+        migrations.RunPython(mark_active_jobs, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name="syncjob",
+            name="active",
+            field=models.BooleanField(default=True, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="syncjob",
+            name="heartbeat_at",
+            field=models.DateTimeField(null=True),
+        ),
+    ]
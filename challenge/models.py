@@ -1,7 +1,20 @@
 # coding: utf-8
 
-from django.db import models
-from challenge.utils import slugify_model
+from collections import Counter
+
+from django.db import models, transaction
+from django.db.models import Count, Max, OuterRef, Subquery, Sum
+from django.db.models.functions import Coalesce
+from challenge.cache import invalidate_artists_cache
+from challenge.utils import join_markets, parse_release_date, slugify_model
+from challenge.utils import IdentityMap, split_markets
+
+# Maximum number of values in a single `IN` clause, SQLite limits the number
+# of parameters of a query.
+IN_QUERY_BATCH_SIZE = 500
+
+# Rows reported by `Album.save_albums`
+INSERTED_LABELS = ["artists", "albums", "links"]
 
 #########
 # It was not possible to use a `unique_together` Meta option for the models
@@ -34,9 +47,56 @@ class Artist(AbstractSpotifyModel):
 
     artist_type = models.CharField(max_length=100)
 
+    # Summary of the artist albums, maintained by `update_summaries`
+    albums_count = models.PositiveIntegerField(default=0)
+    tracks_count = models.PositiveIntegerField(default=0)
+    last_released_on = models.DateField(null=True)
+
+    class Meta(AbstractSpotifyModel.Meta):
+        indexes = [
+            # Supports artists API ordering and cursor pagination
+            models.Index(fields=["name", "id"]),
+            # Artists by latest release
+            models.Index(fields=["last_released_on"]),
+        ]
+
     def __str__(self):
         return self.name
 
+    @classmethod
+    def update_summaries(cls, artists_ids: list = None):
+        """
+        Computes albums summary columns of the given artists (all artists
+        by default) from their albums, with a single query per
+        `IN_QUERY_BATCH_SIZE` artists.
+        """
+        links = (
+            Album.artists.through.objects.filter(artist_id=OuterRef("pk"))
+            .order_by()
+            .values("artist_id")
+        )
+
+        def aggregate(function):
+            return Subquery(
+                links.annotate(value=function).values("value"),
+                output_field=models.IntegerField(),
+            )
+
+        summaries = dict(
+            albums_count=Coalesce(aggregate(Count("album_id")), 0),
+            tracks_count=Coalesce(aggregate(Sum("album__total_tracks")), 0),
+            last_released_on=Subquery(
+                links.annotate(value=Max("album__released_on")).values("value")
+            ),
+        )
+
+        if artists_ids is None:
+            cls.objects.update(**summaries)
+            return
+
+        for chunk in _chunks(sorted(artists_ids)):
+            cls.objects.filter(id__in=chunk).update(**summaries)
+
 
 class Album(AbstractSpotifyModel):
     """ Album model """
@@ -47,47 +107,355 @@ class Album(AbstractSpotifyModel):
     release_date_precision = models.CharField(max_length=20)
     total_tracks = models.SmallIntegerField()
 
+    # `release_date` as a date for recency queries, see `parse_release_date`
+    released_on = models.DateField(null=True)
+
+    # Country codes of the markets the album was released in, see
+    # `join_markets`
+    markets = models.TextField(blank=True, default="")
+
     # Many to many key with Artist model
     artists = models.ManyToManyField(Artist)
 
+    class Meta(AbstractSpotifyModel.Meta):
+        indexes = [
+            # Release date window filters, with or without a type
+            models.Index(fields=["album_type", "released_on"]),
+            # Release date window filters, with a minimum number of tracks
+            models.Index(fields=["released_on", "total_tracks"]),
+            # Minimum number of tracks filter, with or without a date window
+            models.Index(fields=["total_tracks", "released_on"]),
+        ]
+
     @classmethod
-    def save_albums(cls, albums):
-        """ Identify albums and artists while redirecting data for storage. """
-        for album in albums:
-            artists_id = cls._save_artists(artists_data=album.get("artists"))
-            cls._save_album(album_data=album, artists_by_name=artists_id)
+    @transaction.atomic
+    def save_albums(
+        cls, albums: list, markets: dict = None, identity_maps: dict = None
+    ) -> Counter:
+        """
+        Store albums and their artists in bulk. `markets` optionally maps
+        Spotify ids of albums to country codes of their markets, added to
+        the stored ones.
+
+        Whatever the number of albums (a page or a whole crawl), rows are
+        written with a fixed number of queries per `IN_QUERY_BATCH_SIZE`
+        slugs: existing rows are fetched in one pass, missing ones are
+        inserted with `bulk_create`. Summaries of artists having new albums
+        are updated in the same transaction.
+
+        `identity_maps` are optional `IdentityMap` by label ("artists" and
+        "albums"): rows they know are not looked up.
+        Returns a report counting inserted and skipped rows.
+        """
+        report = Counter()
+        albums = list(albums)
+        identity_maps = identity_maps or dict()
+
+        artists_ids = cls._save_artists(
+            artists_data=[
+                artist
+                for album in albums
+                for artist in album.get("artists", [])
+            ],
+            report=report,
+            identity_map=identity_maps.get("artists"),
+        )
+        albums_map = identity_maps.get("albums")
+        markets = markets or dict()
+        albums_ids = cls._save_albums_rows(
+            albums_data=albums,
+            markets=markets,
+            report=report,
+            identity_map=albums_map,
+        )
+        if markets:
+            cls._save_albums_markets(
+                albums_data=albums, albums_ids=albums_ids, markets=markets
+            )
+        # Known albums may credit new artists: links of every album are saved
+        linked_artists_ids = cls._save_artists_links(
+            albums_data=albums,
+            albums_ids=albums_ids,
+            artists_ids=artists_ids,
+            report=report,
+        )
+        if linked_artists_ids:
+            Artist.update_summaries(artists_ids=linked_artists_ids)
+
+        if any(report[f"{label}_inserted"] for label in INSERTED_LABELS):
+            # Cached API responses are outdated once new data is committed
+            transaction.on_commit(invalidate_artists_cache)
+
+        return report
 
     @classmethod
-    def _save_artists(cls, artists_data: list) -> dict:
-        """ Extract artists from given data and store them in database. """
-        artists = dict()
-        for artist_data in artists_data:
-            artist, _ = Artist.objects.get_or_create(
-                slug=slugify_model(model=artist_data),
+    def _save_artists(
+        cls,
+        artists_data: list,
+        report: Counter,
+        identity_map: IdentityMap = None,
+    ) -> dict:
+        """ Extract artists from given data and store the missing ones. """
+        rows = {
+            slugify_model(model=artist_data): dict(
                 name=artist_data.get("name"),
                 artist_type=artist_data.get("type"),
             )
+            for artist_data in artists_data
+        }
+        return _bulk_get_or_create(
+            Artist, rows, report, label="artists", identity_map=identity_map
+        )
+
+    @classmethod
+    def _save_albums_rows(
+        cls,
+        albums_data: list,
+        markets: dict,
+        report: Counter,
+        identity_map: IdentityMap = None,
+    ) -> dict:
+        """ Extract albums from given data and store the missing ones. """
+        rows = {
+            slugify_model(model=album_data): dict(
+                name=album_data.get("name"),
+                album_type=album_data.get("album_type"),
+                type=album_data.get("type"),
+                release_date=album_data.get("release_date"),
+                release_date_precision=album_data.get("release_date_precision"),
+                total_tracks=album_data.get("total_tracks"),
+                released_on=parse_release_date(
+                    release_date=album_data.get("release_date"),
+                    precision=album_data.get("release_date_precision"),
+                ),
+                markets=join_markets(markets.get(album_data.get("id"), [])),
+            )
+            for album_data in albums_data
+        }
+        return _bulk_get_or_create(
+            cls, rows, report, label="albums", identity_map=identity_map
+        )
 
-            # Storing artist id by name
-            artists[artist.name] = artist.id
+    @classmethod
+    def _save_albums_markets(
+        cls, albums_data: list, albums_ids: dict, markets: dict
+    ):
+        """ Add given markets to the ones of already stored albums. """
+        added = dict()
+        for album_data in albums_data:
+            album_markets = markets.get(album_data.get("id"))
+            if album_markets:
+                album_id = albums_ids[slugify_model(model=album_data)]
+                added.setdefault(album_id, set()).update(album_markets)
 
-        return artists
+        updated = []
+        for chunk in _chunks(sorted(added)):
+            stored = (
+                cls.objects.filter(id__in=chunk)
+                .order_by()
+                .values_list("id", "markets")
+            )
+            for album_id, album_markets in stored:
+                album_markets = split_markets(album_markets)
+                if not added[album_id].issubset(album_markets):
+                    album_markets.update(added[album_id])
+                    updated.append(
+                        cls(id=album_id, markets=join_markets(album_markets))
+                    )
+
+        cls.objects.bulk_update(
+            updated, ["markets"], batch_size=IN_QUERY_BATCH_SIZE
+        )
 
     @classmethod
-    def _save_album(cls, album_data: dict, artists_by_name: dict):
-        """ Extract albums from given data and store them in database. """
-        album, _ = cls.objects.get_or_create(
-            slug=slugify_model(model=album_data),
-            name=album_data.get("name"),
-            album_type=album_data.get("album_type"),
-            type=album_data.get("type"),
-            release_date=album_data.get("release_date"),
-            release_date_precision=album_data.get("release_date_precision"),
-            total_tracks=album_data.get("total_tracks"),
+    def _save_artists_links(
+        cls,
+        albums_data: list,
+        albums_ids: dict,
+        artists_ids: dict,
+        report: Counter,
+    ):
+        """
+        Link albums to their artists, inserting missing links only.
+        Returns ids of the artists having new albums.
+        """
+        through = cls.artists.through
+        links = {
+            (
+                albums_ids[slugify_model(model=album_data)],
+                artists_ids[slugify_model(model=artist_data)],
+            )
+            for album_data in albums_data
+            for artist_data in album_data.get("artists", [])
+        }
+
+        existing = set()
+        for chunk in _chunks(sorted({album_id for album_id, _ in links})):
+            existing.update(
+                through.objects.filter(album_id__in=chunk).values_list(
+                    "album_id", "artist_id"
+                )
+            )
+
+        missing = links - existing
+        through.objects.bulk_create(
+            [
+                through(album_id=album_id, artist_id=artist_id)
+                for album_id, artist_id in missing
+            ],
+            ignore_conflicts=True,
+        )
+        report["links_inserted"] += len(missing)
+        report["links_skipped"] += len(links) - len(missing)
+
+        return {artist_id for _, artist_id in missing}
+
+
+def _chunks(values: list, size: int = None):
+    """ Split values so `IN` clauses stay under the DB parameters limit. """
+    size = size or IN_QUERY_BATCH_SIZE
+    for index in range(0, len(values), size):
+        yield values[index : index + size]
+
+
+def _bulk_get_or_create(
+    model,
+    rows: dict,
+    report: Counter,
+    label: str,
+    identity_map: IdentityMap = None,
+) -> dict:
+    """
+    Bulk equivalent of `get_or_create` on the `slug` field.
+    `rows` maps slugs to the other fields of the records. Rows known by the
+    identity map, if any, are not looked up, and the map learns the others.
+    Returns primary keys by slug for every given row.
+    """
+    ids = identity_map.get_many(rows) if identity_map is not None else {}
+    unknown = [slug for slug in rows if slug not in ids]
+    for chunk in _chunks(unknown):
+        ids.update(
+            model.objects.filter(slug__in=chunk)
+            .order_by()
+            .values_list("slug", "id")
         )
-        album.artists.add(
-            *[
-                artists_by_name[artist["name"]]
-                for artist in album_data.get("artists", [])
-            ]
+
+    missing = [slug for slug in unknown if slug not in ids]
+    model.objects.bulk_create(
+        [model(slug=slug, **rows[slug]) for slug in missing],
+        ignore_conflicts=True,
+    )
+
+    # Primary keys are not returned by `bulk_create` on every DB backend
+    for chunk in _chunks(missing):
+        ids.update(
+            model.objects.filter(slug__in=chunk)
+            .order_by()
+            .values_list("slug", "id")
         )
+
+    if identity_map is not None:
+        identity_map.update({slug: ids[slug] for slug in unknown})
+
+    report[f"{label}_inserted"] += len(missing)
+    report[f"{label}_skipped"] += len(rows) - len(missing)
+
+    return ids
+
+
+class SyncState(models.Model):
+    """
+    State left by the last new releases sync, used by incremental syncs (see
+    `SyncTracker`).
+    """
+
+    key = models.CharField(max_length=50, unique=True)
+    last_run = models.DateTimeField(null=True)
+    # Spotify ids of the albums seen by the last syncs, most recent first
+    seen_albums_ids = models.JSONField(default=list)
+    # Content hashes of the pages by offset
+    pages_fingerprints = models.JSONField(default=dict)
+    # Progress of an unfinished sync, to resume it (see `SyncTracker`), with
+    # its pages stored so far (see `SyncCheckpointPage`)
+    checkpoint = models.JSONField(null=True)
+
+    def __str__(self):
+        return self.key
+
+
+class SyncCheckpointPage(models.Model):
+    """
+    Page stored by an unfinished sync. Pages are added with each stored
+    batch, and deleted once the sync is done (see `SyncTracker`).
+    """
+
+    state = models.ForeignKey(
+        SyncState, on_delete=models.CASCADE, related_name="checkpoint_pages"
+    )
+    offset = models.IntegerField()
+    # Content hash of the page
+    fingerprint = models.CharField(max_length=40)
+    # Spotify ids of the page albums
+    albums_ids = models.JSONField(default=list)
+    # The page only has albums seen by previous syncs
+    known = models.BooleanField(default=False)
+
+    def __str__(self):
+        return f"{self.state} ({self.offset})"
+
+
+class SyncJob(models.Model):
+    """ New releases sync run in background (see `SyncJobRunner`). """
+
+    PENDING = "pending"
+    RUNNING = "running"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+    STATUSES = [PENDING, RUNNING, SUCCEEDED, FAILED]
+    ACTIVE_STATUSES = [PENDING, RUNNING]
+
+    status = models.CharField(
+        max_length=20,
+        choices=[(status, status) for status in STATUSES],
+        default=PENDING,
+    )
+    full = models.BooleanField(default=False)
+    scheduled = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True)
+    finished_at = models.DateTimeField(null=True)
+    # Storage report of `SpotifyConnector.sync_new_releases`
+    report = models.JSONField(default=dict)
+    error = models.TextField(blank=True)
+    # True while pending or running, None once finished (set on save): being
+    # unique, a single job is active at a time, whatever the process queuing
+    # it
+    active = models.BooleanField(null=True, default=True, unique=True)
+    # Last sign of life of the process running the job
+    heartbeat_at = models.DateTimeField(null=True)
+
+    class Meta:
+        ordering = ["-created_at", "-id"]
+        indexes = [models.Index(fields=["status", "created_at"])]
+
+    def __str__(self):
+        return f"Sync {self.id} ({self.status})"
+
+    def save(self, *args, update_fields=None, **kwargs):
+        self.active = True if self.status in self.ACTIVE_STATUSES else None
+        if update_fields is not None and "status" in update_fields:
+            update_fields = [*update_fields, "active"]
+        super().save(*args, update_fields=update_fields, **kwargs)
+
+
+class SpotifyToken(models.Model):
+    """ Stored Spotify user session (see `SpotifySession`). """
+
+    key = models.CharField(max_length=50, unique=True)
+    access_token = models.CharField(max_length=500)
+    refresh_token = models.CharField(max_length=500)
+    expiry_date = models.DateTimeField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return self.key
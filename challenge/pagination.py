@@ -0,0 +1,30 @@
+# coding: utf-8
+
+from django.conf import settings
+from rest_framework.pagination import CursorPagination
+from rest_framework.settings import api_settings
+
+
+class ArtistCursorPagination(CursorPagination):
+    """
+    Cursor pagination of artists, following their `name` ordering.
+
+    Pages are filtered from the position encoded in the cursor instead of
+    counting rows and skipping an offset, so any page is served with an index
+    range scan on (`name`, `id`). The `id` breaks ties between homonyms,
+    keeping their order stable from one page to another.
+    """
+
+    ordering = ("name", "id")
+
+
+def artist_pagination_class():
+    """
+    Pagination of artists API: `ArtistCursorPagination` if
+    `PAGINATION_MODE` setting is "cursor", the default pagination otherwise
+    (none if pagination is disabled).
+    """
+    default = api_settings.DEFAULT_PAGINATION_CLASS
+    if default and getattr(settings, "PAGINATION_MODE", "page") == "cursor":
+        return ArtistCursorPagination
+    return default
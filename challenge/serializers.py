@@ -1,7 +1,11 @@
 # coding: utf-8
 
+from collections import defaultdict
+
+from django.db.models import Q
 from rest_framework import serializers
-from challenge.models import Artist, Album
+from rest_framework.utils.serializer_helpers import ReturnDict, ReturnList
+from challenge.models import Artist, Album, SyncJob
 
 
 class AlbumSerializer(serializers.ModelSerializer):
@@ -30,3 +34,107 @@ class ArtistSerializer(serializers.ModelSerializer):
         model = Artist
         fields = ["name", "artist_type", "albums"]
         read_only_fields = fields  # nothing can be updated manually
+
+
+class FastArtistSerializer:
+    """
+    Read-only artists serializer building the same payload as
+    `ArtistSerializer` from `.values()` rows, without DRF fields machinery.
+
+    Artists rows (dicts with `id` and `ArtistSerializer` fields) are given as
+    instance, their albums are retreived with a single query and grouped by
+    artist in one pass. Albums are filtered by the `album_filter` of the
+    context, if any.
+    """
+
+    ARTIST_FIELDS = [
+        field for field in ArtistSerializer.Meta.fields if field != "albums"
+    ]
+    ALBUM_FIELDS = AlbumSerializer.Meta.fields
+
+    def __init__(self, instance=None, many=False, context=None, **kwargs):
+        self.instance = instance
+        self.many = many
+        self.context = context or {}
+
+    @classmethod
+    def get_queryset(cls):
+        """ Artists rows expected by the serializer. """
+        return Artist.objects.values("id", *cls.ARTIST_FIELDS)
+
+    @property
+    def data(self):
+        artists = list(self.instance) if self.many else [self.instance]
+        albums = self._albums_by_artist(
+            artists_ids=[artist["id"] for artist in artists],
+            albums_q=self._albums_q(),
+        )
+
+        data = [
+            {
+                **{field: artist[field] for field in self.ARTIST_FIELDS},
+                "albums": albums[artist["id"]],
+            }
+            for artist in artists
+        ]
+        if self.many:
+            return ReturnList(data, serializer=self)
+        return ReturnDict(data[0], serializer=self)
+
+    def _albums_q(self) -> Q:
+        album_filter = self.context.get("album_filter")
+        if album_filter is None:
+            return Q()
+        return album_filter.albums_q(prefix="album__")
+
+    @classmethod
+    def _albums_by_artist(cls, artists_ids: list, albums_q: Q) -> dict:
+        rows = (
+            Album.artists.through.objects.filter(
+                albums_q, artist_id__in=artists_ids
+            )
+            .order_by("album__name", "album__id")
+            .values_list(
+                "artist_id",
+                *[f"album__{field}" for field in cls.ALBUM_FIELDS],
+            )
+        )
+
+        albums = defaultdict(list)
+        for artist_id, *values in rows:
+            albums[artist_id].append(dict(zip(cls.ALBUM_FIELDS, values)))
+        return albums
+
+
+class ArtistSummarySerializer(serializers.ModelSerializer):
+    """ Artist albums summary Serializer. """
+
+    class Meta:
+        model = Artist
+        fields = [
+            "name",
+            "artist_type",
+            "albums_count",
+            "tracks_count",
+            "last_released_on",
+        ]
+        read_only_fields = fields  # nothing can be updated manually
+
+
+class SyncJobSerializer(serializers.ModelSerializer):
+    """ New releases sync Serializer. """
+
+    class Meta:
+        model = SyncJob
+        fields = [
+            "id",
+            "status",
+            "full",
+            "scheduled",
+            "created_at",
+            "started_at",
+            "finished_at",
+            "report",
+            "error",
+        ]
+        read_only_fields = fields  # nothing can be updated manually
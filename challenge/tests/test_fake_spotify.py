@@ -0,0 +1,138 @@
+# coding: utf-8
+
+from functools import partial
+from unittest.mock import patch
+
+from django.test import TransactionTestCase
+
+from challenge.models import Album, SyncState
+from challenge.utils import SpotifyConnector, SpotifySession
+from challenge.utils.async_http_client import AsyncHttpClient
+from challenge.utils.fake_spotify import FakeSpotifyServer
+from challenge.utils.rate_limiter import RateLimiter
+from challenge.utils.spotify_auth_utils import SpotifyAuth
+from challenge.utils.spotify_stub import SyntheticNewReleases
+
+
+class FakeSpotifyServerTestCase(TransactionTestCase):
+    """ Tests of the connector over HTTP against the fake Spotify server. """
+
+    def setUp(self):
+        self.server = FakeSpotifyServer(
+            catalog=SyntheticNewReleases(albums_count=230),
+            throttle_rate=0.25,
+            error_rate=0.2,
+            retry_after=0,
+        )
+        self.server.start()
+        self.addCleanup(self.server.stop)
+        self.auth = SpotifyAuth(accounts_url=self.server.url)
+
+    def test_auth(self):
+        """ Checks tokens are issued and refreshed. """
+        session_infos = self.auth.get_user_auth(code="any")
+        self.assertEquals(session_infos["expires_in"], 3600)
+
+        refreshed = self.auth.refresh_auth(
+            refresh_token=session_infos["refresh_token"]
+        )
+        self.assertNotEqual(
+            refreshed["access_token"], session_infos["access_token"]
+        )
+        self.assertIn("error", self.auth.refresh_auth(refresh_token="bad"))
+
+    def test_crawl(self):
+        """ Checks crawl survives throttling, errors and expired tokens. """
+        self.check_crawl(SpotifyConnector)
+
+    def test_crawl_async(self):
+        """ Checks the same crawl with the async client. """
+        self.check_crawl(
+            partial(SpotifyConnector, async_client=AsyncHttpClient())
+        )
+
+    def test_crawl_async_sequential(self):
+        """ Checks `next` links are followed with the async client. """
+        conn = SpotifyConnector(
+            session=self.stored_session(),
+            workers=1,
+            api_url=self.server.url,
+            async_client=AsyncHttpClient(),
+            rate_limiter=self.rate_limiter(),
+        )
+
+        with self.assertLogs(level="WARNING"):
+            self.crawl(conn)
+
+        self.assertEquals(Album.objects.count(), 230)
+        self.assertEquals(self.server.stats["pages"], 5)
+        self.assertEquals(self.server.stats["unauthorized"], 1)
+
+    def test_crawl_async_single_page(self):
+        """ Checks a catalog of a single page is crawled with no tasks. """
+        server = FakeSpotifyServer(
+            catalog=SyntheticNewReleases(albums_count=30)
+        )
+        server.start()
+        self.addCleanup(server.stop)
+        self.auth = SpotifyAuth(accounts_url=server.url)
+
+        conn = SpotifyConnector(
+            session=self.stored_session(),
+            workers=4,
+            api_url=server.url,
+            async_client=AsyncHttpClient(),
+        )
+
+        with self.assertLogs(level="WARNING"):
+            self.crawl(conn)
+
+        self.assertEquals(Album.objects.count(), 30)
+        self.assertEquals(server.stats["pages"], 1)
+        self.assertEquals(server.stats["unauthorized"], 1)
+        self.assertIsNotNone(SyncState.objects.get().last_run)
+
+    def check_crawl(self, connector_class: callable):
+        conn = connector_class(
+            session=self.stored_session(),
+            workers=4,
+            api_url=self.server.url,
+            rate_limiter=self.rate_limiter(),
+        )
+
+        with self.assertLogs(level="WARNING"):
+            report = self.crawl(conn)
+
+        self.assertEquals(Album.objects.count(), 230)
+        self.assertEquals(self.server.stats["unauthorized"], 1)
+        self.assertEquals(self.server.stats["pages"], 5)
+        self.assertGreater(report["requests_throttled"], 0)
+        self.assertGreater(report["requests_retried"], 0)
+        # Retries and pages reuse the pooled connections
+        self.assertGreater(report["http_requests"], 5)
+        self.assertGreater(report["http_connections_reused"], 0)
+        self.assertEquals(
+            report["http_connections_opened"]
+            + report["http_connections_reused"],
+            report["http_requests"],
+        )
+
+    def stored_session(self) -> SpotifySession:
+        """
+        Session stored as by the auth callback, with a token rejected by the
+        server but not expired yet for the session.
+        """
+        session_infos = self.auth.get_user_auth(code="any")
+        session = SpotifySession(
+            **dict(session_infos, access_token="bad"),
+            key=SpotifySession.DEFAULT_KEY,
+        )
+        session.save()
+        return session
+
+    def rate_limiter(self) -> RateLimiter:
+        return RateLimiter(max_rate=1000, burst=1000, backoff_base=0.01)
+
+    def crawl(self, conn: SpotifyConnector) -> dict:
+        with patch("challenge.utils.spotify_session.spotify_auth", self.auth):
+            return conn.sync_new_releases()
@@ -0,0 +1,129 @@
+# coding: utf-8
+
+import json
+import requests
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+
+from asgiref.sync import async_to_sync
+from django.test import SimpleTestCase
+from challenge.utils.async_http_client import AsyncHttpClient
+from challenge.utils.http_client import HttpClient
+
+
+class KeepAliveHandler(BaseHTTPRequestHandler):
+    """ Minimal HTTP/1.1 handler keeping connections open. """
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        body = b"{}"
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        """ Echoes the request body, chunked. """
+        length = int(self.headers.get("Content-Length", 0))
+        body = json.dumps(
+            {"path": self.path, "body": self.rfile.read(length).decode()}
+        ).encode()
+        self.send_response(200)
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for start in range(0, len(body), 8):
+            chunk = body[start : start + 8]
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, *args):
+        pass
+
+
+class HttpClientTestCase(SimpleTestCase):
+    """ Tests about HttpClient object. """
+
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def test_connection_reused(self):
+        """ Checks consecutive requests share the same connection. """
+        client = HttpClient(pool_size=2, timeout=5)
+
+        for _ in range(3):
+            self.assertEquals(client.get(self.url).status_code, 200)
+
+        self.assertEquals(
+            client.metrics(),
+            {"requests": 3, "connections": 1, "reused_connections": 2},
+        )
+
+    def test_settings_defaults(self):
+        """ Checks settings are used when no value is given. """
+        client = HttpClient()
+
+        self.assertEquals(client.pool_size, 10)
+        self.assertEquals(client.timeout, 10)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+class AsyncHttpClientTestCase(SimpleTestCase):
+    """ Tests about AsyncHttpClient object. """
+
+    def setUp(self):
+        self.server = HTTPServer(("127.0.0.1", 0), KeepAliveHandler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}/"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def test_connection_reused(self):
+        """ Checks consecutive requests share the same connection. """
+        client = AsyncHttpClient(pool_size=2, timeout=5)
+
+        async def get_all():
+            responses = [await client.get(self.url) for _ in range(3)]
+            await client.aclose()
+            return responses
+
+        for response in async_to_sync(get_all)():
+            self.assertEquals(response.status_code, 200)
+            self.assertEquals(response.json(), {})
+        self.assertEquals(
+            client.metrics(),
+            {"requests": 3, "connections": 1, "reused_connections": 2},
+        )
+
+    def test_post_chunked_response(self):
+        """ Checks form data and query are sent, chunked body is read. """
+        client = AsyncHttpClient(timeout=5)
+
+        async def post():
+            response = await client.post(
+                self.url, params={"grant": "code"}, data={"a": "1 2"}
+            )
+            await client.aclose()
+            return response
+
+        response = async_to_sync(post)()
+
+        self.assertEquals(
+            response.json(), {"path": "/?grant=code", "body": "a=1+2"}
+        )
+
+    def test_connection_error(self):
+        """ Checks connection errors are raised as `requests` ones. """
+        client = AsyncHttpClient(timeout=5)
+        self.server.server_close()
+
+        with self.assertRaises(requests.exceptions.ConnectionError):
+            async_to_sync(client.get)(self.url)
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
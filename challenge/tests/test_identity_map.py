@@ -0,0 +1,42 @@
+# coding: utf-8
+
+from django.test import TestCase
+
+from challenge.models import Artist
+from challenge.utils import IdentityMap
+
+
+class IdentityMapTestCase(TestCase):
+    """ Tests about IdentityMap object. """
+
+    def test_lru_eviction(self):
+        """ Checks least recently used slugs are evicted first. """
+        identity_map = IdentityMap(max_size=2)
+        identity_map.update({"a": 1, "b": 2})
+        identity_map.get_many(["a"])
+        identity_map.update({"c": 3})
+
+        self.assertEquals(
+            identity_map.get_many(["a", "b", "c"]), {"a": 1, "c": 3}
+        )
+        self.assertEquals(
+            identity_map.stats(),
+            {"size": 2, "hits": 3, "misses": 1, "evictions": 1},
+        )
+
+    def test_warm_load(self):
+        """ Checks most recent rows are loaded in a single query. """
+        artists = [
+            Artist.objects.create(name=slug, slug=slug, artist_type="artist")
+            for slug in ["a", "b", "c"]
+        ]
+        identity_map = IdentityMap(max_size=2)
+
+        with self.assertNumQueries(1):
+            identity_map.warm_load(Artist)
+
+        self.assertNotIn("a", identity_map)
+        self.assertEquals(
+            identity_map.get_many(["b", "c"]),
+            {"b": artists[1].id, "c": artists[2].id},
+        )
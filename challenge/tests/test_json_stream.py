@@ -0,0 +1,70 @@
+# coding: utf-8
+
+import json
+from pathlib import Path
+
+from django.test import TestCase
+
+from challenge.utils.json_stream import (
+    ALBUM_FIELDS,
+    iter_new_releases,
+    parse_new_releases,
+)
+
+
+TESTS_PATH = Path().cwd() / "challenge" / "tests"
+
+
+def chunked(content: bytes, size: int):
+    return [
+        content[start : start + size] for start in range(0, len(content), size)
+    ]
+
+
+class JSONStreamTestCase(TestCase):
+    """ Tests about streaming parsing of new releases pages. """
+
+    def setUp(self):
+        self.data = json.loads(
+            (TESTS_PATH / "new_releases_data.json").read_text()
+        )
+        self.data["albums"].update(offset=0, limit=20, total=12345)
+        self.data["albums"]["items"][0]["name"] = "Café 🎧"
+        self.content = json.dumps(self.data, indent=2).encode()
+
+    def test_parse_any_chunk_size(self):
+        """ Checks pages are parsed whatever the chunks boundaries. """
+        for size in [1, 7, 4096]:
+            albums = parse_new_releases(chunked(self.content, size))
+
+            self.assertEquals(albums["total"], 12345)
+            self.assertIsNone(albums["next"])
+            self.assertEquals(
+                [album["id"] for album in albums["items"]],
+                [album["id"] for album in self.data["albums"]["items"]],
+            )
+            self.assertEquals(albums["items"][0]["name"], "Café 🎧")
+
+    def test_albums_pruned(self):
+        """ Checks only stored fields of albums and artists are kept. """
+        album = parse_new_releases([self.content])["items"][0]
+
+        self.assertEquals(set(album), set(ALBUM_FIELDS) | {"artists"})
+        self.assertEquals(set(album["artists"][0]), {"id", "name", "type"})
+
+    def test_albums_yielded_one_at_a_time(self):
+        """ Checks albums are yielded before the whole page is read. """
+        chunks = iter(chunked(self.content, 64))
+        items = (
+            value
+            for key, value in iter_new_releases(chunks)
+            if key == "items"
+        )
+
+        next(items)
+        self.assertGreater(len(list(chunks)), 0)
+
+    def test_invalid_page(self):
+        """ Checks truncated pages raise an error. """
+        with self.assertRaises(ValueError):
+            parse_new_releases(chunked(self.content[:-10], 100))
@@ -1,7 +1,9 @@
 # coding: utf-8
 
+from datetime import date
+
 from django.test import TestCase
-from challenge.utils.models import slugify_model
+from challenge.utils.models import parse_release_date, slugify_model
 
 
 class ModelsUtilsFunctionsTestCase(TestCase):
@@ -14,3 +16,19 @@ class ModelsUtilsFunctionsTestCase(TestCase):
         expectation = "name-f4millynam-idfromsp0tify"
 
         self.assertEquals(expectation, slugify_model({"name": name, "id": id_}))
+
+    def test_parse_release_date(self):
+        """ Checks release dates are converted according to precision. """
+        self.assertEquals(
+            parse_release_date("2020-10-09", "day"), date(2020, 10, 9)
+        )
+        self.assertEquals(
+            parse_release_date("2020-10", "month"), date(2020, 10, 1)
+        )
+        self.assertEquals(parse_release_date("2020", "year"), date(2020, 1, 1))
+
+    def test_parse_release_date_invalid(self):
+        """ Checks invalid release dates are ignored. """
+        self.assertIsNone(parse_release_date("0000", "year"))
+        self.assertIsNone(parse_release_date("2020-10-09", "any"))
+        self.assertIsNone(parse_release_date(None, "day"))
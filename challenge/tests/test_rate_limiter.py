@@ -0,0 +1,79 @@
+# coding: utf-8
+
+from django.test import TestCase
+from unittest.mock import patch
+
+from challenge.utils.rate_limiter import RateLimiter
+
+
+class FakeClock:
+    """ Replaces `time` module, sleeping moves the clock forward. """
+
+    def __init__(self):
+        self.now = 0.0
+        self.sleeps = []
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, delay):
+        self.sleeps.append(delay)
+        self.now += delay
+
+
+class RateLimiterTestCase(TestCase):
+    """ Tests about RateLimiter object. """
+
+    def setUp(self):
+        self.clock = FakeClock()
+        patcher = patch("challenge.utils.rate_limiter.time", self.clock)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_burst_then_rate(self):
+        """ Checks requests wait once the burst is consumed. """
+        limiter = RateLimiter(max_rate=2, burst=3)
+
+        for _ in range(3):
+            limiter.acquire()
+        self.assertEquals(self.clock.sleeps, [])
+
+        for _ in range(4):
+            limiter.acquire()
+        self.assertEquals(self.clock.now, 2)
+        self.assertEquals(limiter.metrics()["waited_seconds"], 2)
+
+    def test_adaptive_rate(self):
+        """ Checks rate is halved when throttled and recovers slowly. """
+        limiter = RateLimiter(max_rate=10)
+
+        limiter.throttled(retry_after=0)
+        limiter.throttled(retry_after=0)
+        self.assertEquals(limiter.rate, 2.5)
+
+        for _ in range(5):
+            limiter.succeeded()
+        self.assertEquals(limiter.rate, 5)
+
+        for _ in range(100):
+            limiter.succeeded()
+        self.assertEquals(limiter.rate, 10)
+
+    def test_throttled_pauses_requests(self):
+        """ Checks every request waits for the Retry-After delay. """
+        limiter = RateLimiter(max_rate=10, burst=10)
+
+        limiter.throttled(retry_after=3)
+        limiter.acquire()
+
+        self.assertEquals(self.clock.sleeps[0], 3)
+        self.assertEquals(limiter.metrics()["throttled"], 1)
+
+    def test_backoff_delay(self):
+        """ Checks backoff delays are jittered and capped. """
+        limiter = RateLimiter(backoff_base=1, backoff_max=5)
+
+        delays = [limiter.backoff_delay(attempt) for attempt in range(10)]
+
+        self.assertTrue(all(0 <= delay <= 5 for delay in delays))
+        self.assertTrue(all(delay <= 2 ** i for i, delay in enumerate(delays)))
@@ -0,0 +1,61 @@
+# coding: utf-8
+
+import os
+import tempfile
+from freezegun import freeze_time
+
+from django.test import SimpleTestCase
+from challenge.utils.response_cache import ResponseCache
+
+
+class ResponseCacheTestCase(SimpleTestCase):
+    """ Tests about ResponseCache object. """
+
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.cache = ResponseCache(
+            directory=self.directory.name, ttl=60, max_entries=2
+        )
+
+    def test_entry_stored_with_validators(self):
+        """ Checks body is stored with its validators by request. """
+        self.cache.set("url", {"offset": 0}, {"ETag": '"v1"'}, {"a": 1})
+
+        entry = self.cache.get("url", {"offset": 0})
+        self.assertEquals(entry["body"], {"a": 1})
+        self.assertEquals(
+            ResponseCache.conditional_headers(entry),
+            {"If-None-Match": '"v1"'},
+        )
+        self.assertIsNone(self.cache.get("url", {"offset": 50}))
+
+    def test_entry_without_validators_not_stored(self):
+        """ Checks responses which can not be validated are not stored. """
+        self.cache.set("url", {}, {}, {"a": 1})
+
+        self.assertIsNone(self.cache.get("url", {}))
+
+    def test_entry_expiry(self):
+        """ Checks entries are dropped after their time to live. """
+        with freeze_time("2020-10-15 12:00:00"):
+            self.cache.set("url", {}, {"Last-Modified": "any"}, {"a": 1})
+
+        with freeze_time("2020-10-15 12:00:59"):
+            self.assertIsNotNone(self.cache.get("url", {}))
+
+        with freeze_time("2020-10-15 12:01:01"):
+            self.assertIsNone(self.cache.get("url", {}))
+
+    def test_eviction(self):
+        """ Checks oldest entries are evicted above maximum size. """
+        for offset in range(3):
+            self.cache.set("url", {"offset": offset}, {"ETag": "v"}, {})
+            # Make modification times ordered
+            path = self.cache._path("url", {"offset": offset})
+            os.utime(path, (offset, offset))
+
+        self.assertEquals(len(list(self.cache.directory.glob("*.json"))), 2)
+        self.assertIsNone(self.cache.get("url", {"offset": 0}))
+
+    def tearDown(self):
+        self.directory.cleanup()
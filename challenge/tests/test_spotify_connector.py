@@ -1,13 +1,19 @@
 # coding: utf-8
 
 import json
+import queue
+import tempfile
 from pathlib import Path
 from datetime import datetime
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from unittest.mock import patch, MagicMock
 from challenge.utils import SpotifyConnector, SpotifySession
-from challenge.models import Album, Artist
+from challenge.utils import spotify_connector
+from challenge.utils.rate_limiter import RateLimiter
+from challenge.utils.response_cache import ResponseCache
+from challenge.tests.test_rate_limiter import FakeClock
+from challenge.models import Album, Artist, SyncState
 
 from requests.exceptions import Timeout, TooManyRedirects, RequestException
 
@@ -15,7 +21,9 @@ from requests.exceptions import Timeout, TooManyRedirects, RequestException
 TESTS_PATH = Path().cwd() / "challenge" / "tests"
 
 
-@patch("challenge.utils.spotify_connector.requests")
+# Mocked responses have a JSON body only
+@override_settings(SPOTIFY_STREAM_PAGES=False)
+@patch("challenge.utils.spotify_connector.http_client")
 class SpotifyConnectorTestCase(TestCase):
     """ Tests about SpotifyConnector object. """
 
@@ -29,7 +37,7 @@ class SpotifyConnectorTestCase(TestCase):
             (TESTS_PATH / "new_releases_data.json").read_text()
         )
 
-    def test_get_new_releases(self, fake_requests):
+    def test_get_new_releases(self, fake_http):
         """ Checks if objects are properly inserted from raw data. """
         conn = SpotifyConnector(session=self.session)
 
@@ -37,16 +45,200 @@ class SpotifyConnectorTestCase(TestCase):
         fake_response = MagicMock()
         fake_response.status_code = 200
         fake_response.json = MagicMock(return_value=self.FAKE_DATA)
-        fake_requests.get = MagicMock(return_value=fake_response)
+        fake_http.get = MagicMock(return_value=fake_response)
 
         conn.get_new_releases()
 
-        fake_requests.get.assert_called_once()
+        fake_http.get.assert_called_once()
 
         self.assertEquals(Artist.objects.count(), 5)
         self.assertEquals(Album.objects.count(), 2)
 
-    def test_get_new_releases_token_expired(self, fake_requests):
+    def test_get_new_releases_concurrently(self, fake_http):
+        """ Checks every page offset is fetched and stored by workers. """
+        conn = SpotifyConnector(session=self.session, workers=3)
+        items = self.FAKE_DATA["albums"]["items"]
+
+        def fake_get(url, params, headers, **kwargs):
+            offset = params.get("offset", 0)
+            fake_response = MagicMock()
+            fake_response.status_code = 200
+            fake_response.json = MagicMock(
+                return_value={
+                    "albums": {
+                        "items": [items[offset % 2]],
+                        "limit": 1,
+                        "offset": offset,
+                        "total": 4,
+                        "next": "any",
+                    }
+                }
+            )
+            return fake_response
+
+        fake_http.get = MagicMock(side_effect=fake_get)
+
+        conn.get_new_releases()
+
+        offsets = sorted(
+            call.kwargs["params"].get("offset", 0)
+            for call in fake_http.get.call_args_list
+        )
+        self.assertEquals(offsets, [0, 1, 2, 3])
+        self.assertEquals(Artist.objects.count(), 5)
+        self.assertEquals(Album.objects.count(), 2)
+
+    def test_get_new_releases_markets(self, fake_http):
+        """ Checks markets are crawled and albums stored once with them. """
+        conn = SpotifyConnector(session=self.session, markets=["FR", "GB"])
+
+        fake_response = MagicMock()
+        fake_response.status_code = 200
+        fake_response.json = MagicMock(return_value=self.FAKE_DATA)
+        fake_http.get = MagicMock(return_value=fake_response)
+
+        report = conn.sync_new_releases()
+
+        countries = sorted(
+            call.kwargs["params"]["country"]
+            for call in fake_http.get.call_args_list
+        )
+        self.assertEquals(countries, ["FR", "GB"])
+        self.assertEquals(Album.objects.count(), 2)
+        self.assertEquals(
+            set(Album.objects.values_list("markets", flat=True)), {"FR,GB"}
+        )
+        self.assertEquals(
+            sorted(SyncState.objects.values_list("key", flat=True)),
+            ["new-releases:FR", "new-releases:GB"],
+        )
+        # Albums of the second market are deduplicated or skipped
+        self.assertEquals(
+            sum(
+                report.get(f"albums_{key}", 0)
+                for key in ["inserted", "skipped", "deduplicated"]
+            ),
+            4,
+        )
+
+    def test_interrupted_crawl_resumed(self, fake_http):
+        """ Checks a crawl resumes after the pages stored before a failure. """
+        conn = SpotifyConnector(
+            session=self.session,
+            workers=2,
+            batch_size=1,
+            rate_limiter=RateLimiter(max_retries=0),
+        )
+        items = self.FAKE_DATA["albums"]["items"]
+        failing_offsets = {2}
+
+        def fake_get(url, params, headers, **kwargs):
+            offset = params.get("offset", 0)
+            albums = {
+                "items": [items[offset % 2]],
+                "limit": 1,
+                "offset": offset,
+                "total": 4,
+            }
+            status_code = 500 if offset in failing_offsets else 200
+            return MagicMock(
+                status_code=status_code,
+                json=MagicMock(return_value={"albums": albums}),
+            )
+
+        fake_http.get = MagicMock(side_effect=fake_get)
+
+        with self.assertRaises(RuntimeError):
+            conn.sync_new_releases()
+
+        state = SyncState.objects.get(key=SpotifyConnector.SYNC_KEY)
+        committed = set(
+            state.checkpoint_pages.values_list("offset", flat=True)
+        )
+        self.assertIn(0, committed)
+        self.assertNotIn(2, committed)
+
+        failing_offsets.clear()
+        fake_http.get.reset_mock()
+        report = conn.sync_new_releases()
+
+        offsets = sorted(
+            call.kwargs["params"].get("offset", 0)
+            for call in fake_http.get.call_args_list
+        )
+        self.assertEquals(
+            offsets, [0] + [o for o in (1, 2, 3) if o not in committed]
+        )
+        self.assertEquals(report["pages_resumed"], len(committed))
+        self.assertEquals(Album.objects.count(), 2)
+        state.refresh_from_db()
+        self.assertIsNone(state.checkpoint)
+
+    def test_pipeline_fetch_error_stops_crawl(self, fake_http):
+        """ Checks a fetching error is raised by the writer stage. """
+        conn = SpotifyConnector(
+            session=self.session, rate_limiter=RateLimiter(max_retries=0)
+        )
+
+        fake_response = MagicMock()
+        fake_response.status_code = 500
+        fake_http.get = MagicMock(return_value=fake_response)
+
+        with self.assertRaises(RuntimeError):
+            conn._get_new_releases()
+
+        self.assertEquals(Album.objects.count(), 0)
+
+    def test_pipeline_writer_error_stops_producer(self, fake_http):
+        """ Checks fetching stops when pages can not be stored. """
+        conn = SpotifyConnector(session=self.session, queue_size=1)
+
+        fake_response = MagicMock()
+        fake_response.status_code = 200
+        fake_response.json = MagicMock(
+            return_value={"albums": {"items": [], "next": "any"}}
+        )
+        fake_http.get = MagicMock(return_value=fake_response)
+
+        with patch.object(Album, "save_albums", side_effect=KeyError()):
+            with self.assertRaises(KeyError):
+                conn._get_new_releases()
+
+        # `next` cursor never ends: returning at all means the producer was
+        # stopped, and only a few pages were fetched ahead
+        self.assertLessEqual(fake_http.get.call_count, 3)
+
+    def test_pipeline_batches_pages(self, fake_http):
+        """ Checks queued pages are stored by batches. """
+        conn = SpotifyConnector(session=self.session, batch_size=2)
+        pages = queue.Queue()
+        for page in ["page_1", "page_2", "page_3"]:
+            pages.put(page)
+        pages.put(spotify_connector._END_OF_PAGES)
+
+        batches = list(conn._consume_pages(pages))
+
+        self.assertEquals(batches, [["page_1", "page_2"], ["page_3"]])
+
+    def test_get_new_releases_incremental(self, fake_http):
+        """ Checks known pages are stored again by full syncs only. """
+        conn = SpotifyConnector(session=self.session)
+
+        fake_response = MagicMock()
+        fake_response.status_code = 200
+        fake_response.json = MagicMock(return_value=self.FAKE_DATA)
+        fake_http.get = MagicMock(return_value=fake_response)
+
+        conn.get_new_releases()
+        Album.objects.all().delete()
+
+        conn.get_new_releases()
+        self.assertEquals(Album.objects.count(), 0)
+
+        conn.get_new_releases(full=True)
+        self.assertEquals(Album.objects.count(), 2)
+
+    def test_get_new_releases_token_expired(self, fake_http):
         """ Checks if session token is properly handled. """
         fake_session = MagicMock()
         fake_session.expiry_date = datetime.utcnow()  # Token should be expired
@@ -57,19 +249,19 @@ class SpotifyConnectorTestCase(TestCase):
         empty_data = {"albums": {"items": [], "next": None}}
         fake_response.json = MagicMock(return_value=empty_data)
         fake_response.status_code = 200
-        fake_requests.get = MagicMock(return_value=fake_response)
+        fake_http.get = MagicMock(return_value=fake_response)
 
         # Assert logs at WARNING level if token is expired
         with self.assertLogs(level="WARNING"):
             conn.get_new_releases()
 
         fake_session.refresh_auth_token.assert_called_once()
-        fake_requests.get.assert_called_once()
+        fake_http.get.assert_called_once()
 
         self.assertEquals(Artist.objects.count(), 0)  # check empty data
         self.assertEquals(Album.objects.count(), 0)  # check empty data
 
-    def test_get_new_releases_exception_happens(self, fake_requests):
+    def test_get_new_releases_exception_happens(self, fake_http):
         """ Checks if session token is properly handled. """
         with patch.object(SpotifyConnector, "_get_new_releases") as fake_meth:
             fake_meth = MagicMock(side_effets=[Exception("any")])  # NOQA
@@ -79,7 +271,41 @@ class SpotifyConnectorTestCase(TestCase):
         with self.assertLogs(level="ERROR"):
             conn.get_new_releases()
 
-    def test_retrying_on_requests_exception(self, fake_requests):
+    @patch("challenge.utils.rate_limiter.time", new_callable=FakeClock)
+    def test_throttled_request_retried(self, fake_time, fake_http):
+        """ Checks throttled requests wait for Retry-After delay. """
+        throttled = MagicMock(status_code=429, headers={"Retry-After": "2"})
+        fake_response = MagicMock(status_code=200)
+        fake_http.get = MagicMock(side_effect=[throttled, fake_response])
+        limiter = RateLimiter(max_rate=10)
+        conn = SpotifyConnector(session=self.session, rate_limiter=limiter)
+
+        with self.assertLogs(level="WARNING"):
+            result = conn._send_request(url="any")
+
+        self.assertEquals(result, fake_response)
+        self.assertEquals(fake_time.sleeps, [2])
+        self.assertEquals(limiter.metrics()["throttled"], 1)
+        self.assertEquals(limiter.rate, 5.5)
+
+    @patch("challenge.utils.rate_limiter.time", new_callable=FakeClock)
+    def test_server_error_retried(self, fake_time, fake_http):
+        """ Checks server errors are retried with backoff, then given up. """
+        failure = MagicMock(status_code=503)
+        fake_http.get = MagicMock(return_value=failure)
+        limiter = RateLimiter(max_retries=3, backoff_base=1)
+        conn = SpotifyConnector(session=self.session, rate_limiter=limiter)
+
+        with self.assertLogs(level="WARNING"):
+            result = conn._send_request(url="any")
+
+        self.assertEquals(result, failure)
+        self.assertEquals(fake_http.get.call_count, 4)
+        self.assertEquals(limiter.metrics()["retries"], 3)
+        for delay, attempt in zip(fake_time.sleeps, range(1, 4)):
+            self.assertLessEqual(delay, 2 ** attempt)
+
+    def test_retrying_on_requests_exception(self, fake_http):
         fake_response = MagicMock()
         side_effects = [
             Timeout(),
@@ -87,8 +313,7 @@ class SpotifyConnectorTestCase(TestCase):
             RequestException(),
             fake_response,  # should not involve a retry
         ]
-        fake_requests.get = MagicMock(side_effect=side_effects)
-        fake_requests.exceptions.RequestException = RequestException
+        fake_http.get = MagicMock(side_effect=side_effects)
 
         conn = SpotifyConnector(session=MagicMock())
         try:
@@ -98,20 +323,18 @@ class SpotifyConnectorTestCase(TestCase):
 
         self.assertEquals(result, fake_response)
 
-    def test_exception_on_requests_too_many_retries(self, fake_requests):
+    def test_exception_on_requests_too_many_retries(self, fake_http):
         side_effects = [RequestException()] * 10  # Should stop retrying
-        fake_requests.get = MagicMock(side_effect=side_effects)
-        fake_requests.exceptions.RequestException = RequestException
+        fake_http.get = MagicMock(side_effect=side_effects)
 
         conn = SpotifyConnector(session=MagicMock())
         with self.assertRaises(RequestException):
             with self.assertLogs(level="ERROR"):
                 conn._SpotifyConnector__perform_request(url="any")
 
-    def test_exception_raised_if_not_requests_exception(self, fake_requests):
+    def test_exception_raised_if_not_requests_exception(self, fake_http):
         side_effect = KeyError()  # Should stop retrying
-        fake_requests.get = MagicMock(side_effect=side_effect)
-        fake_requests.exceptions.RequestException = RequestException
+        fake_http.get = MagicMock(side_effect=side_effect)
 
         conn = SpotifyConnector(session=MagicMock())
         with self.assertRaises(KeyError):
@@ -121,3 +344,83 @@ class SpotifyConnectorTestCase(TestCase):
     def tearDown(self):
         Artist.objects.all().delete()
         Album.objects.all().delete()
+
+
+# Cache entries are written once pages are committed
+@override_settings(SPOTIFY_STREAM_PAGES=False)
+@patch("challenge.utils.spotify_connector.http_client")
+class SpotifyConnectorCacheTestCase(TransactionTestCase):
+    """ Tests about SpotifyConnector object with a response cache. """
+
+    def setUp(self):
+        self.session = SpotifySession(
+            access_token="access_token",
+            expires_in=3600,
+            refresh_token="refresh_token",
+        )
+        self.FAKE_DATA = json.loads(
+            (TESTS_PATH / "new_releases_data.json").read_text()
+        )
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.cache = ResponseCache(
+            directory=directory.name, ttl=60, max_entries=10
+        )
+
+    def fake_response(self, fake_http, status_code: int = 200):
+        fake_response = MagicMock()
+        fake_response.status_code = status_code
+        fake_response.headers = {"ETag": '"v1"'}
+        fake_response.json = MagicMock(return_value=self.FAKE_DATA)
+        fake_http.get = MagicMock(return_value=fake_response)
+        return fake_response
+
+    def test_get_new_releases_not_modified(self, fake_http):
+        """ Checks unchanged pages are requested conditionally, not stored. """
+        conn = SpotifyConnector(session=self.session, cache=self.cache)
+        fake_response = self.fake_response(fake_http)
+
+        conn.get_new_releases()
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
+
+        fake_response.status_code = 304
+        conn.get_new_releases()
+
+        headers = fake_http.get.call_args.kwargs["headers"]
+        self.assertEquals(headers["If-None-Match"], '"v1"')
+        self.assertEquals(Album.objects.count(), 0)  # page not stored again
+
+    def test_full_sync_not_modified(self, fake_http):
+        """ Checks a full sync stores unchanged pages from the cache. """
+        conn = SpotifyConnector(session=self.session, cache=self.cache)
+        fake_response = self.fake_response(fake_http)
+
+        conn.get_new_releases()
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
+
+        fake_response.status_code = 304
+        report = conn.sync_new_releases(full=True)
+
+        self.assertNotIn("pages_not_modified", report)
+        self.assertEquals(Album.objects.count(), 2)
+
+    def test_page_not_stored_not_cached(self, fake_http):
+        """ Checks a page fetched but not stored is stored by next sync. """
+        conn = SpotifyConnector(session=self.session, cache=self.cache)
+        self.fake_response(fake_http)
+
+        with patch.object(Album, "save_albums", side_effect=KeyError()):
+            with self.assertRaises(KeyError):
+                conn._get_new_releases()
+
+        headers = fake_http.get.call_args.kwargs["headers"]
+        self.assertNotIn("If-None-Match", headers)
+
+        report = conn.sync_new_releases()
+
+        headers = fake_http.get.call_args.kwargs["headers"]
+        self.assertNotIn("If-None-Match", headers)
+        self.assertNotIn("pages_not_modified", report)
+        self.assertEquals(Album.objects.count(), 2)
@@ -0,0 +1,197 @@
+# coding: utf-8
+
+import asyncio
+import json
+import time
+from unittest.mock import AsyncMock, patch
+
+from asgiref.sync import async_to_sync
+from django.core.handlers.asgi import ASGIHandler
+from django.test import RequestFactory, TransactionTestCase, override_settings
+from django.urls import path
+from challenge import async_views
+from challenge.cache import get_artists_cache
+from challenge.models import Artist, Album
+
+
+# Served when `ASYNC_VIEWS` setting is True, see `groover.urls`
+urlpatterns = [
+    path("api/artists/", async_views.artist_list),
+    path("api/artists/<int:pk>/", async_views.artist_detail),
+]
+
+
+async def asgi_get(application, path: str, query: str = "") -> tuple:
+    """ Status, headers and body of a GET request to an ASGI application. """
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "GET",
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [(b"host", b"testserver")],
+        "client": ("127.0.0.1", 50000),
+        "server": ("testserver", 80),
+    }
+    requested = asyncio.Event()
+    messages = []
+
+    async def receive():
+        if requested.is_set():
+            # The client never disconnects
+            await asyncio.Event().wait()
+        requested.set()
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+    body = b"".join(message.get("body", b"") for message in messages[1:])
+    headers = {
+        name.decode().lower(): value.decode()
+        for name, value in messages[0]["headers"]
+    }
+    return messages[0]["status"], headers, body
+
+
+class AsyncViewsTestCase(TransactionTestCase):
+    """ Tests about async variants of the artists API and callback. """
+
+    def setUp(self):
+        get_artists_cache().clear()
+        self.factory = RequestFactory()
+        for index in range(12):
+            artist = Artist.objects.create(
+                name=f"artist_{index:02d}",
+                slug=f"artist-{index}",
+                artist_type="artist",
+            )
+            album = Album.objects.create(
+                slug=f"album-{index}",
+                album_type="single",
+                type="album",
+                name=f"album_{index}",
+                release_date="2020-10-09",
+                release_date_precision="day",
+                total_tracks=1,
+            )
+            album.artists.add(artist)
+
+    def tearDown(self):
+        get_artists_cache().clear()
+
+    def test_artist_list(self):
+        """ Checks artists are listed as by the sync view. """
+        request = self.factory.get("/api/artists/?page=2")
+        response = async_to_sync(async_views.artist_list)(request)
+
+        self.assertEquals(response.status_code, 200)
+        get_artists_cache().clear()
+        self.assertEquals(
+            response.content, self.client.get("/api/artists/?page=2").content
+        )
+
+    def test_artist_detail(self):
+        """ Checks an artist is retrieved as by the sync view. """
+        artist = Artist.objects.get(name="artist_03")
+        path = f"/api/artists/{artist.id}/"
+        request = self.factory.get(path)
+        response = async_to_sync(async_views.artist_detail)(
+            request, pk=artist.id
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.content, self.client.get(path).content)
+
+    def test_artist_detail_not_found(self):
+        request = self.factory.get("/api/artists/0/")
+        response = async_to_sync(async_views.artist_detail)(request, pk=0)
+
+        self.assertEquals(response.status_code, 404)
+
+    @patch("challenge.async_views.sync_runner")
+    @patch("challenge.async_views.SpotifySession")
+    @patch("challenge.async_views.spotify_auth")
+    def test_spotify_callback(self, spotify_auth, session_class, runner):
+        """ Checks the sync is queued and the user redirected to the API. """
+        infos = {"access_token": "token", "refresh_token": "refresh"}
+        spotify_auth.async_get_user_auth = AsyncMock(return_value=infos)
+
+        request = self.factory.get("/auth/callback?code=abc")
+        response = async_to_sync(async_views.spotify_callback)(request)
+
+        self.assertEquals(response.status_code, 302)
+        self.assertEquals(response.url, "/api/")
+        spotify_auth.async_get_user_auth.assert_awaited_once_with(code="abc")
+        session_class.from_user_auth.assert_called_once_with(infos)
+        runner.enqueue.assert_called_once_with(
+            session=session_class.from_user_auth.return_value
+        )
+
+    @patch("challenge.async_views.sync_runner")
+    def test_spotify_callback_without_code(self, runner):
+        request = self.factory.get("/auth/callback")
+        response = async_to_sync(async_views.spotify_callback)(request)
+
+        self.assertEquals(response.status_code, 302)
+        self.assertEquals(
+            response.url, self.client.get("/auth/callback").url
+        )
+        runner.enqueue.assert_not_called()
+
+
+@override_settings(ROOT_URLCONF="challenge.tests.tests_async_views")
+class ASGIViewsTestCase(TransactionTestCase):
+    """ Tests about async views served by the ASGI handler. """
+
+    # Database work of each request, run in `DB_EXECUTOR` threads
+    DB_SECONDS = 0.2
+
+    def setUp(self):
+        get_artists_cache().clear()
+        Artist.objects.create(name="artist", slug="artist", artist_type="a")
+
+    def tearDown(self):
+        get_artists_cache().clear()
+
+    def test_concurrent_requests(self):
+        """
+        Checks concurrent requests go through the middlewares and are
+        served concurrently, with or without metrics.
+        """
+        render = async_views._render
+
+        def slow_render(view, request, **kwargs):
+            time.sleep(self.DB_SECONDS)
+            return render(view, request, **kwargs)
+
+        async def get_artists(application, count: int):
+            return await asyncio.gather(
+                *[
+                    asgi_get(application, "/api/artists/", "format=json")
+                    for _ in range(count)
+                ]
+            )
+
+        for enabled in [False, True]:
+            with self.subTest(metrics=enabled), self.settings(
+                METRICS_ENABLED=enabled
+            ), patch.object(async_views, "_render", slow_render):
+                application = ASGIHandler()
+
+                start = time.perf_counter()
+                responses = async_to_sync(get_artists)(application, 4)
+                duration = time.perf_counter() - start
+
+                # Served one after the other in 4 * DB_SECONDS
+                self.assertLess(duration, 3 * self.DB_SECONDS)
+                for status, headers, body in responses:
+                    self.assertEquals(status, 200)
+                    self.assertEquals(json.loads(body)["count"], 1)
+                    self.assertEquals("server-timing" in headers, enabled)
+
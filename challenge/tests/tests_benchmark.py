@@ -0,0 +1,64 @@
+# coding: utf-8
+
+import json
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from challenge.models import Album
+from challenge.utils.spotify_stub import StubSpotifyClient
+from challenge.utils.spotify_stub import SyntheticNewReleases
+
+
+class SyntheticNewReleasesTestCase(TestCase):
+    """ Tests about synthetic new releases served by the Spotify stub. """
+
+    def test_pages(self):
+        """ Checks pages cover the catalog and follow each other. """
+        client = StubSpotifyClient(SyntheticNewReleases(albums_count=45))
+        url = "https://api.spotify.com/v1/browse/new-releases"
+
+        albums = client.get(url, params={"limit": 20}).json()["albums"]
+        self.assertEquals(len(albums["items"]), 20)
+        self.assertEquals(albums["total"], 45)
+
+        albums = client.get(albums["next"]).json()["albums"]
+        albums = client.get(albums["next"]).json()["albums"]
+        self.assertEquals(albums["offset"], 40)
+        self.assertEquals(len(albums["items"]), 5)
+        self.assertIsNone(albums["next"])
+        self.assertEquals(client.requests, 3)
+
+    def test_artist_overlap(self):
+        """ Checks artists are shared between albums as requested. """
+        catalog = SyntheticNewReleases(albums_count=100, artist_overlap=0.75)
+        artists = {
+            artist["id"]
+            for index in range(100)
+            for artist in catalog.album(index)["artists"]
+        }
+
+        self.assertEquals(len(artists), 50)
+
+
+class BenchmarkCommandTestCase(TestCase):
+    """ Tests about `benchmark` command. """
+
+    def test_benchmark(self):
+        """ Checks results are written and data rolled back. """
+        out = StringIO()
+        call_command(
+            "benchmark",
+            albums=[120],
+            requests=2,
+            output="-",
+            stdout=out,
+            stderr=StringIO(),
+        )
+
+        results = json.loads(out.getvalue())
+        run = results["runs"][0]
+        self.assertEquals(run["ingestion"]["report"]["albums_inserted"], 120)
+        self.assertEquals(run["api"]["detail"]["requests"], 2)
+        self.assertEquals(Album.objects.count(), 0)
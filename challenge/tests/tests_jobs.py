@@ -0,0 +1,183 @@
+# coding: utf-8
+
+import time
+from datetime import timedelta
+from unittest.mock import patch, MagicMock
+
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from challenge.jobs import SyncJobRunner, start_worker
+from challenge.models import SyncJob
+from challenge.utils import SpotifyConnector, SpotifySession
+
+
+@override_settings(SYNC_WORKER_ENABLED=False)
+class SyncJobRunnerTestCase(TestCase):
+    """ Tests about SyncJobRunner object. """
+
+    def setUp(self):
+        self.runner = SyncJobRunner()
+        self.session = MagicMock()
+
+    def test_single_flight(self):
+        """ Checks only one sync can be active at a time. """
+        job = self.runner.enqueue(session=self.session)
+
+        self.assertEquals(self.runner.enqueue(session=self.session), job)
+        self.assertEquals(SyncJob.objects.count(), 1)
+
+        job.status = SyncJob.SUCCEEDED
+        job.save()
+        self.assertNotEqual(self.runner.enqueue(session=self.session), job)
+
+    def test_single_flight_across_processes(self):
+        """ Checks a sync queued by another process is returned. """
+        # Queued by another process
+        job = SyncJob.objects.create(status=SyncJob.RUNNING)
+
+        self.assertEquals(self.runner.enqueue(session=self.session), job)
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            SyncJob.objects.create()
+
+    @patch.object(SpotifyConnector, "sync_new_releases")
+    def test_run_pending(self, fake_sync):
+        """ Checks pending jobs are run with their report stored. """
+        fake_sync.return_value = {"albums_inserted": 2}
+        job = self.runner.enqueue(session=self.session, full=True)
+
+        self.runner.run_pending()
+
+        fake_sync.assert_called_once_with(full=True)
+        job.refresh_from_db()
+        self.assertEquals(job.status, SyncJob.SUCCEEDED)
+        self.assertEquals(job.report, {"albums_inserted": 2})
+        self.assertIsNotNone(job.started_at)
+        self.assertIsNotNone(job.finished_at)
+
+    @patch.object(SpotifyConnector, "sync_new_releases")
+    def test_run_failure(self, fake_sync):
+        """ Checks failures are stored on the job. """
+        fake_sync.side_effect = RuntimeError("Status code -> 500")
+        job = self.runner.enqueue(session=self.session)
+
+        with self.assertLogs(level="ERROR"):
+            self.runner.run_pending()
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, SyncJob.FAILED)
+        self.assertEquals(job.error, "Status code -> 500")
+
+    def test_fail_interrupted_jobs(self):
+        """ Checks jobs left running with an expired lease are failed. """
+        job = SyncJob.objects.create(
+            status=SyncJob.RUNNING,
+            heartbeat_at=timezone.now() - timedelta(seconds=61),
+        )
+
+        self.runner.fail_interrupted_jobs()
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, SyncJob.FAILED)
+        self.assertIsNone(job.active)
+
+    def test_running_jobs_of_live_processes_kept(self):
+        """ Checks jobs with a live lease are not failed. """
+        job = SyncJob.objects.create(
+            status=SyncJob.RUNNING, heartbeat_at=timezone.now()
+        )
+
+        self.runner.fail_interrupted_jobs()
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, SyncJob.RUNNING)
+        self.assertEquals(self.runner.enqueue(session=self.session), job)
+
+    @patch("challenge.views.sync_runner")
+    @patch.object(SpotifySession, "from_usercode")
+    def test_callback_enqueues_sync(self, fake_from_usercode, fake_runner):
+        """ Checks Spotify callback queues a sync instead of running it. """
+        response = self.client.get("/auth/callback?code=any")
+
+        self.assertRedirects(
+            response, "/api/", fetch_redirect_response=False
+        )
+        fake_from_usercode.assert_called_once_with(code="any")
+        fake_runner.enqueue.assert_called_once_with(
+            session=fake_from_usercode.return_value
+        )
+
+    def test_jobs_api(self):
+        """ Checks syncs status are exposed, latest first. """
+        first = SyncJob.objects.create(status=SyncJob.SUCCEEDED)
+        last = SyncJob.objects.create()
+
+        results = self.client.get("/api/sync-jobs/").json()["results"]
+
+        self.assertEquals(
+            [(job["id"], job["status"]) for job in results],
+            [(last.id, SyncJob.PENDING), (first.id, SyncJob.SUCCEEDED)],
+        )
+
+
+@override_settings(SYNC_POLL_INTERVAL=0.05, SYNC_INTERVAL=None)
+class SyncWorkerTestCase(TransactionTestCase):
+    """ Tests about the sync worker thread. """
+
+    def setUp(self):
+        self.runner = SyncJobRunner()
+        self.runner.session = MagicMock()
+
+    def wait_for_status(self, job: SyncJob, status: str, timeout: float = 5):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            job.refresh_from_db()
+            if job.status == status:
+                return
+            time.sleep(0.01)
+        self.fail(f"Job still {job.status}.")
+
+    @patch("challenge.jobs.sync_runner")
+    def test_started_on_boot(self, fake_runner):
+        """ Checks the worker is started with the server, if enabled. """
+        with self.settings(SYNC_WORKER_ENABLED=False):
+            start_worker()
+        fake_runner.start.assert_not_called()
+
+        with self.settings(SYNC_WORKER_ENABLED=True):
+            start_worker()
+        fake_runner.start.assert_called_once_with()
+
+    @patch.object(SpotifyConnector, "sync_new_releases")
+    def test_jobs_of_other_processes_polled(self, fake_sync):
+        """ Checks jobs queued without waking the worker up are run. """
+        fake_sync.return_value = {}
+        self.runner.start()
+        self.addCleanup(self.runner._thread.join, 5)
+        self.addCleanup(self.runner.stop)
+
+        # Queued by another process
+        job = SyncJob.objects.create()
+
+        self.wait_for_status(job, SyncJob.SUCCEEDED)
+        fake_sync.assert_called_once_with(full=False)
+
+    @override_settings(SYNC_JOB_LEASE=0.15)
+    @patch.object(SpotifyConnector, "sync_new_releases")
+    def test_lease_renewed(self, fake_sync):
+        """ Checks a long sync keeps its lease while it runs. """
+        fake_sync.side_effect = lambda full: time.sleep(0.5) or {}
+        job = self.runner.enqueue()
+        self.runner.start()
+        self.addCleanup(self.runner._thread.join, 5)
+        self.addCleanup(self.runner.stop)
+
+        self.wait_for_status(job, SyncJob.RUNNING)
+        time.sleep(0.3)
+        # Another process booting
+        SyncJobRunner().fail_interrupted_jobs()
+
+        job.refresh_from_db()
+        self.assertEquals(job.status, SyncJob.RUNNING)
+        self.wait_for_status(job, SyncJob.SUCCEEDED)
+
@@ -0,0 +1,156 @@
+# coding: utf-8
+
+import asyncio
+import time
+from unittest.mock import MagicMock, patch
+
+from django.core.handlers.base import BaseHandler
+from django.http import HttpResponse
+from django.test import (
+    AsyncClient,
+    TestCase,
+    TransactionTestCase,
+    override_settings,
+)
+from django.urls import path
+
+from challenge import async_views
+from challenge.middleware import InstrumentationMiddleware
+from challenge.utils import SpotifyConnector, SpotifySession
+from challenge.utils.metrics import MetricsRegistry, registry
+
+
+async def slow_view(request):
+    await asyncio.sleep(0.2)
+    return HttpResponse("slow")
+
+
+# Async views of `AsyncInstrumentationTestCase`
+urlpatterns = [
+    path("api/slow/", slow_view),
+    path("api/artists/", async_views.artist_list),
+]
+
+
+class MetricsRegistryTestCase(TestCase):
+    """ Tests about MetricsRegistry object. """
+
+    def test_render(self):
+        """ Checks metrics are rendered in Prometheus text format. """
+        metrics = MetricsRegistry()
+        metrics.describe("requests_total", "Requests.")
+        metrics.inc("requests_total", status=200)
+        metrics.inc("requests_total", 2, status=200)
+        metrics.observe("duration_seconds", 0.5, view='a"b')
+        metrics.observe("duration_seconds", 0.25, view='a"b')
+
+        self.assertEquals(
+            metrics.render(),
+            "# TYPE duration_seconds summary\n"
+            'duration_seconds_count{view="a\\"b"} 2\n'
+            'duration_seconds_sum{view="a\\"b"} 0.75\n'
+            "# HELP requests_total Requests.\n"
+            "# TYPE requests_total counter\n"
+            'requests_total{status="200"} 3\n',
+        )
+
+
+class InstrumentationTestCase(TestCase):
+    """ Tests about requests and syncs instrumentation. """
+
+    def setUp(self):
+        registry.reset()
+
+    @override_settings(METRICS_ENABLED=True)
+    def test_api_instrumented(self):
+        """ Checks API timings are recorded and sent as Server-Timing. """
+        response = self.client.get("/api/artists/", {"format": "json"})
+
+        self.assertRegex(
+            response["Server-Timing"],
+            r'^db;dur=[\d.]+;desc="\d+ queries", serialization;dur=[\d.]+, '
+            r"total;dur=[\d.]+$",
+        )
+        content = self.client.get("/metrics").content.decode()
+        self.assertIn(
+            'http_request_duration_seconds_count{method="GET",'
+            'view="groover-api:artist-list"} 1',
+            content,
+        )
+
+    def test_disabled(self):
+        """ Checks nothing is recorded nor exposed when disabled. """
+        response = self.client.get("/api/artists/", {"format": "json"})
+
+        self.assertNotIn("Server-Timing", response)
+        self.assertEquals(self.client.get("/metrics").status_code, 404)
+        self.assertEquals(registry.render(), "\n")
+
+    @override_settings(METRICS_ENABLED=True, SPOTIFY_STREAM_PAGES=False)
+    @patch("challenge.utils.spotify_connector.http_client")
+    def test_sync_instrumented(self, fake_http):
+        """ Checks Spotify requests and syncs timings are recorded. """
+        fake_http.get.return_value = MagicMock(
+            status_code=200,
+            json=MagicMock(return_value={"albums": {"items": []}}),
+        )
+        session = SpotifySession(
+            access_token="access_token",
+            expires_in=0,
+            refresh_token="refresh_token",
+        )
+
+        with patch.object(SpotifySession, "refresh_auth_token"):
+            with self.assertLogs(level="WARNING"):
+                report = SpotifyConnector(session=session).sync_new_releases()
+
+        content = registry.render()
+        self.assertIn('spotify_fetch_seconds_count{status="200"} 1', content)
+        self.assertIn(
+            'spotify_token_refreshes_total{trigger="expiry"} 1', content
+        )
+        self.assertIn("spotify_sync_seconds_count 1", content)
+        self.assertIn("duration_seconds", report)
+
+    def test_not_installed_if_disabled(self):
+        """ Checks requests do not go through the middleware if disabled. """
+        handler = BaseHandler()
+        handler.load_middleware(is_async=True)
+
+        self.assertNotIsInstance(
+            handler._middleware_chain, InstrumentationMiddleware
+        )
+
+
+@override_settings(
+    METRICS_ENABLED=True, ROOT_URLCONF="challenge.tests.tests_metrics"
+)
+class AsyncInstrumentationTestCase(TransactionTestCase):
+    """ Tests about instrumentation of async requests. """
+
+    def setUp(self):
+        registry.reset()
+
+    async def test_async_requests_concurrent(self):
+        """ Checks async requests are not serialized by the middleware. """
+        client = AsyncClient()
+
+        start = time.perf_counter()
+        responses = await asyncio.gather(
+            *[client.get("/api/slow/") for _ in range(4)]
+        )
+
+        # 0.8s if run one after the other
+        self.assertLess(time.perf_counter() - start, 0.6)
+        for response in responses:
+            self.assertIn("Server-Timing", response)
+
+    async def test_async_queries_timed(self):
+        """ Checks queries run in database threads are recorded. """
+        response = await AsyncClient().get(
+            "/api/artists/", {"format": "json"}
+        )
+
+        self.assertEquals(response.status_code, 200)
+        self.assertRegex(response["Server-Timing"], r'desc="[1-9]\d* queries"')
+
@@ -1,11 +1,24 @@
 # coding: utf-8
 
-from django.test import TestCase
+import json
+from datetime import date
+from io import StringIO
+from pathlib import Path
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import TestCase, TransactionTestCase
 from django.db.utils import IntegrityError
 from challenge.models import Artist, Album
+from challenge.utils import IdentityMap
+from challenge.utils.spotify_stub import SyntheticNewReleases
 from django.db import transaction
 
 
+TESTS_PATH = Path().cwd() / "challenge" / "tests"
+
+
 class ArtistTestCase(TestCase):
     """ Tests about Artist model. """
 
@@ -127,3 +140,233 @@ class AlbumsTestCase(TestCase):
 
     def tearDown(self):
         self.remove_all()
+
+
+class SaveAlbumsTestCase(TestCase):
+    """ Tests about albums bulk ingestion. """
+
+    def setUp(self):
+        self.albums = json.loads(
+            (TESTS_PATH / "new_releases_data.json").read_text()
+        )["albums"]["items"]
+
+    def test_save_albums_report(self):
+        """ Checks inserted rows are reported. """
+        report = Album.save_albums(albums=self.albums)
+
+        self.assertEquals(report["artists_inserted"], 5)
+        self.assertEquals(report["albums_inserted"], 2)
+        self.assertEquals(report["links_inserted"], 5)
+        self.assertEquals(Artist.objects.count(), 5)
+        self.assertEquals(Album.objects.count(), 2)
+
+    def test_save_albums_release_date(self):
+        """ Checks release dates are stored as dates. """
+        Album.save_albums(albums=self.albums)
+
+        self.assertEquals(
+            set(Album.objects.values_list("released_on", flat=True)),
+            {date(2020, 10, 9), date(2020, 10, 7)},
+        )
+
+    def test_save_albums_artists_summaries(self):
+        """ Checks summaries of artists are updated with new albums. """
+        Album.save_albums(albums=self.albums)
+        Album.save_albums(albums=self.albums)  # Nothing new
+
+        summaries = {
+            artist.name: (
+                artist.albums_count,
+                artist.tracks_count,
+                artist.last_released_on,
+            )
+            for artist in Artist.objects.all()
+        }
+        self.assertEquals(summaries["Bebe Rexha"], (1, 1, date(2020, 10, 9)))
+        self.assertEquals(summaries["Future"], (1, 2, date(2020, 10, 7)))
+
+        # Other album of an existing artist
+        album = dict(self.albums[1], id="other", total_tracks=10)
+        album["release_date"] = "2020-10-16"
+        Album.save_albums(albums=[album])
+
+        future = Artist.objects.get(name="Future")
+        self.assertEquals(future.albums_count, 2)
+        self.assertEquals(future.tracks_count, 12)
+        self.assertEquals(future.last_released_on, date(2020, 10, 16))
+
+    def test_save_albums_twice_skips_rows(self):
+        """ Checks already stored rows are skipped, not duplicated. """
+        Album.save_albums(albums=self.albums)
+        report = Album.save_albums(albums=self.albums)
+
+        self.assertEquals(report["artists_inserted"], 0)
+        self.assertEquals(report["artists_skipped"], 5)
+        self.assertEquals(report["albums_skipped"], 2)
+        self.assertEquals(report["links_skipped"], 5)
+        self.assertEquals(Artist.objects.count(), 5)
+        self.assertEquals(Album.objects.count(), 2)
+
+    def test_save_albums_links(self):
+        """ Checks albums are linked to their own artists. """
+        Album.save_albums(albums=self.albums)
+
+        for album_data in self.albums:
+            album = Album.objects.get(name=album_data["name"])
+            self.assertEquals(
+                sorted(album.artists.values_list("name", flat=True)),
+                sorted(artist["name"] for artist in album_data["artists"]),
+            )
+
+    def test_save_albums_markets(self):
+        """ Checks markets are added to the stored ones. """
+        ids = [album["id"] for album in self.albums]
+        Album.save_albums(albums=self.albums, markets={ids[0]: {"GB", "FR"}})
+        Album.save_albums(
+            albums=self.albums, markets={ids[0]: {"US"}, ids[1]: {"FR"}}
+        )
+
+        markets = dict(Album.objects.values_list("name", "markets"))
+        self.assertEquals(markets[self.albums[0]["name"]], "FR,GB,US")
+        self.assertEquals(markets[self.albums[1]["name"]], "FR")
+
+    def test_save_albums_fixed_queries(self):
+        """ Checks the number of queries does not depend on batch size. """
+        catalog = SyntheticNewReleases(albums_count=42)
+        albums = [catalog.album(index) for index in range(42)]
+
+        # Savepoint and its release, select/insert/select back per model,
+        # select and insert for links, artists summaries update
+        with self.assertNumQueries(11):
+            Album.save_albums(albums=albums[:2])
+        with self.assertNumQueries(11):
+            report = Album.save_albums(albums=albums[2:])
+
+        self.assertEquals(report["albums_inserted"], 40)
+        self.assertEquals(Album.objects.count(), 42)
+
+    def test_save_albums_identity_maps(self):
+        """ Checks known rows are not looked up again. """
+        identity_maps = {"artists": IdentityMap(), "albums": IdentityMap()}
+        Album.save_albums(albums=self.albums, identity_maps=identity_maps)
+
+        # Savepoint and its release, existing links lookup
+        with self.assertNumQueries(3):
+            report = Album.save_albums(
+                albums=self.albums, identity_maps=identity_maps
+            )
+
+        self.assertEquals(report["artists_skipped"], 5)
+        self.assertEquals(report["albums_skipped"], 2)
+        self.assertEquals(identity_maps["artists"].stats()["hits"], 5)
+
+    def test_save_albums_known_album_new_artist(self):
+        """ Checks new artists of known albums are linked. """
+        identity_maps = {"artists": IdentityMap(), "albums": IdentityMap()}
+        Album.save_albums(albums=self.albums, identity_maps=identity_maps)
+
+        album_data = dict(self.albums[0])
+        album_data["artists"] = album_data["artists"] + [
+            dict(
+                album_data["artists"][0],
+                id="new",
+                name="New Artist",
+                uri="spotify:artist:new",
+            )
+        ]
+        report = Album.save_albums(
+            albums=[album_data], identity_maps=identity_maps
+        )
+
+        self.assertEquals(report["links_inserted"], 1)
+        album = Album.objects.get(name=album_data["name"])
+        artists_names = album.artists.values_list("name", flat=True)
+        self.assertIn("New Artist", artists_names)
+        self.assertEquals(Artist.objects.get(name="New Artist").albums_count, 1)
+
+    def tearDown(self):
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
+
+
+class RebuildArtistSummariesTestCase(TestCase):
+    """ Tests about `rebuild_artist_summaries` command. """
+
+    def test_rebuild_artist_summaries(self):
+        """ Checks summaries are computed from albums. """
+        artist = Artist.objects.create(
+            name="any_artist", slug="slug-test-12345", artist_type="artist"
+        )
+        lonely_artist = Artist.objects.create(
+            name="other_artist", slug="other-slug", artist_type="artist"
+        )
+        for index in range(2):
+            album = Album.objects.create(
+                slug=f"album-{index}",
+                album_type="album",
+                type="album",
+                name="name",
+                release_date="2020",
+                release_date_precision="year",
+                released_on=date(2020 - index, 1, 1),
+                total_tracks=5,
+            )
+            album.artists.add(artist)
+
+        call_command("rebuild_artist_summaries", stdout=StringIO())
+
+        artist.refresh_from_db()
+        self.assertEquals(artist.albums_count, 2)
+        self.assertEquals(artist.tracks_count, 10)
+        self.assertEquals(artist.last_released_on, date(2020, 1, 1))
+
+        lonely_artist.refresh_from_db()
+        self.assertEquals(lonely_artist.albums_count, 0)
+        self.assertEquals(lonely_artist.tracks_count, 0)
+        self.assertIsNone(lonely_artist.last_released_on)
+
+    def tearDown(self):
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
+
+
+class ArtistSummariesMigrationTestCase(TransactionTestCase):
+    """ Tests about artist summaries migration. """
+
+    BEFORE = [("challenge", "0003_album_released_on")]
+    AFTER = [("challenge", "0004_artist_summaries")]
+
+    def migrate(self, targets: list):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate(targets)
+        return executor.loader.project_state(targets).apps
+
+    def test_existing_artists_summarized(self):
+        """ Checks summaries of artists are filled by the migration. """
+        apps = self.migrate(self.BEFORE)
+        OldArtist = apps.get_model("challenge", "Artist")
+        OldAlbum = apps.get_model("challenge", "Album")
+        artist = OldArtist.objects.create(
+            name="any_artist", slug="any-artist", artist_type="artist"
+        )
+        album = OldAlbum.objects.create(
+            slug="any-album",
+            album_type="album",
+            type="album",
+            name="name",
+            release_date="2020",
+            release_date_precision="year",
+            released_on=date(2020, 1, 1),
+            total_tracks=5,
+        )
+        album.artists.add(artist)
+
+        apps = self.migrate(self.AFTER)
+        summarized = apps.get_model("challenge", "Artist").objects.get()
+        self.assertEquals(summarized.albums_count, 1)
+        self.assertEquals(summarized.tracks_count, 5)
+        self.assertEquals(summarized.last_released_on, date(2020, 1, 1))
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes())
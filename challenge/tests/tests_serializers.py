@@ -0,0 +1,94 @@
+# coding: utf-8
+
+from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
+
+from challenge.cache import get_artists_cache
+from challenge.models import Artist, Album
+from challenge.serializers import ArtistSerializer, FastArtistSerializer
+from challenge.views import ArtistViewSet
+
+
+class FastArtistSerializerTestCase(TestCase):
+    """ Tests about FastArtistSerializer object. """
+
+    def setUp(self):
+        get_artists_cache().clear()
+        artists = [
+            Artist.objects.create(
+                name=name, slug=f"artist-{index}", artist_type="artist"
+            )
+            for index, name in enumerate(["Zoé", "Ädam", "Bob", "Bob"])
+        ]
+        # Homonym albums, album shared by artists, artist without album
+        for index, (name, album_artists) in enumerate(
+            [
+                ("Même nom", artists[:2]),
+                ("Même nom", artists[:1]),
+                ('"Quoted"', artists[1:3]),
+            ]
+        ):
+            album = Album.objects.create(
+                slug=f"album-{index}",
+                album_type="album",
+                type="album",
+                name=name,
+                release_date="2020",
+                release_date_precision="year",
+                total_tracks=index + 10,
+            )
+            album.artists.add(*album_artists)
+
+    def render(self, data):
+        return JSONRenderer().render(data)
+
+    def test_same_payload_many(self):
+        """ Checks artists lists are rendered byte for byte identically. """
+        queryset = ArtistViewSet.get_prefetched_queryset()
+        queryset = queryset.order_by("name", "id")
+        expected = self.render(ArtistSerializer(queryset, many=True).data)
+
+        rows = FastArtistSerializer.get_queryset().order_by("name", "id")
+        result = self.render(FastArtistSerializer(rows, many=True).data)
+
+        self.assertEquals(result, expected)
+
+    def test_same_payload_single(self):
+        """ Checks a single artist is rendered byte for byte identically. """
+        for artist in Artist.objects.all():
+            expected = self.render(ArtistSerializer(artist).data)
+            row = FastArtistSerializer.get_queryset().get(id=artist.id)
+
+            self.assertEquals(
+                self.render(FastArtistSerializer(row).data), expected
+            )
+
+    def test_same_api_responses(self):
+        """ Checks API responses do not depend on serialization mode. """
+        responses = []
+        for fast in [False, True]:
+            get_artists_cache().clear()
+            with self.settings(FAST_SERIALIZATION=fast):
+                responses.append(
+                    [
+                        self.client.get(url).getvalue()
+                        for url in [
+                            "/api/artists/",
+                            f"/api/artists/{Artist.objects.first().id}/",
+                            "/api/artists/export/",
+                        ]
+                    ]
+                )
+
+        self.assertEquals(responses[0], responses[1])
+
+    def test_albums_single_query(self):
+        """ Checks albums of every artist are loaded with one query. """
+        rows = list(FastArtistSerializer.get_queryset())
+
+        with self.assertNumQueries(1):
+            FastArtistSerializer(rows, many=True).data
+
+    def tearDown(self):
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
@@ -5,8 +5,10 @@ from dateutils import relativedelta
 from freezegun import freeze_time
 from unittest.mock import patch, MagicMock
 from copy import copy
+from threading import Thread
 
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase
+from challenge.models import SpotifyToken
 from challenge.utils import SpotifySession
 
 
@@ -53,3 +55,71 @@ class SpotifySessionTestCase(TestCase):
         self.assertEquals(session.token, "any")
         self.assertEquals(session.expiry_date, now)
         self.assertEquals(session.refresh_token, "any")
+
+
+class StoredSpotifySessionTestCase(TransactionTestCase):
+    """ Tests about SpotifySession persistence and concurrent refreshes. """
+
+    def setUp(self):
+        self.session = SpotifySession(
+            access_token="access_token",
+            expires_in=3600,
+            refresh_token="refresh_token",
+            key=SpotifySession.DEFAULT_KEY,
+        )
+        self.session.save()
+
+    def test_load(self):
+        """ Checks a stored session is loaded as it was saved. """
+        session = SpotifySession.load()
+
+        self.assertEquals(session.token, "access_token")
+        self.assertEquals(session.refresh_token, "refresh_token")
+        self.assertEquals(
+            session.expiry_date.replace(microsecond=0),
+            self.session.expiry_date.replace(microsecond=0),
+        )
+        self.assertIsNone(SpotifySession.load(key="unknown"))
+
+    @patch("challenge.utils.spotify_session.spotify_auth")
+    def test_refresh_saved(self, fake_auth):
+        """ Checks refreshed token is stored, keeping the refresh token. """
+        fake_auth.refresh_auth.return_value = {
+            "access_token": "new_token",
+            "expires_in": 3600,
+            "refresh_token": "refresh_token",
+        }
+
+        self.session.refresh_auth_token(expired_token="access_token")
+
+        token = SpotifyToken.objects.get(key=SpotifySession.DEFAULT_KEY)
+        self.assertEquals(token.access_token, "new_token")
+        self.assertEquals(token.refresh_token, "refresh_token")
+
+    @patch("challenge.utils.spotify_session.spotify_auth")
+    def test_single_flight_refresh(self, fake_auth):
+        """ Checks concurrent refreshes of a token only refresh it once. """
+        fake_auth.refresh_auth.return_value = {
+            "access_token": "new_token",
+            "expires_in": 3600,
+            "refresh_token": "refresh_token",
+        }
+        sessions = [SpotifySession.load() for _ in range(4)]
+        threads = [
+            Thread(
+                target=session.refresh_auth_token,
+                kwargs={"expired_token": "access_token"},
+            )
+            for session in sessions
+        ]
+
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        fake_auth.refresh_auth.assert_called_once_with(
+            refresh_token="refresh_token"
+        )
+        for session in sessions:
+            self.assertEquals(session.token, "new_token")
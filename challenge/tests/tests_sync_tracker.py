@@ -0,0 +1,127 @@
+# coding: utf-8
+
+from django.test import TestCase
+from challenge.models import SyncState
+from challenge.utils.sync_tracker import SyncTracker
+
+
+def make_page(offset: int, ids: list) -> dict:
+    return {
+        "offset": offset,
+        "limit": 2,
+        "items": [{"id": album_id, "name": album_id} for album_id in ids],
+    }
+
+
+class SyncTrackerTestCase(TestCase):
+    """ Tests about SyncTracker object. """
+
+    def setUp(self):
+        self.state = SyncState.objects.create(key="test")
+        self.pages = [
+            make_page(0, ["a", "b"]),
+            make_page(2, ["c", "d"]),
+            make_page(4, ["e", "f"]),
+        ]
+
+        tracker = SyncTracker(state=self.state)
+        for page in self.pages:
+            self.assertTrue(tracker.track(page))
+        tracker.save()
+
+    def test_state_saved(self):
+        """ Checks seen albums and pages hashes are stored. """
+        state = SyncState.objects.get(key="test")
+
+        self.assertEquals(state.seen_albums_ids, list("abcdef"))
+        self.assertEquals(sorted(state.pages_fingerprints), ["0", "2", "4"])
+        self.assertIsNotNone(state.last_run)
+
+    def test_unchanged_pages_skipped(self):
+        """ Checks pages with the same content are not stored again. """
+        tracker = SyncTracker(state=self.state)
+
+        self.assertFalse(tracker.track(self.pages[1]))
+        self.assertTrue(tracker.track(make_page(0, ["new", "a"])))
+
+    def test_known_releases_reached(self):
+        """ Checks sync stops after the first page of known releases. """
+        tracker = SyncTracker(state=self.state)
+
+        # Known page arrived before the previous one
+        tracker.track(make_page(2, ["b", "c"]))
+        self.assertFalse(tracker.reached_known_releases())
+
+        tracker.track(make_page(0, ["new", "a"]))
+        self.assertTrue(tracker.reached_known_releases())
+
+        tracker.save()
+        self.assertEquals(
+            self.state.seen_albums_ids, ["b", "c", "new", "a", "d", "e", "f"]
+        )
+
+    def test_resume_checkpoint(self):
+        """ Checks an interrupted crawl resumes from its checkpoint. """
+        tracker = SyncTracker(state=self.state)
+        tracker.track(make_page(0, ["new", "a"]))
+        tracker.checkpoint()
+
+        resumed = SyncTracker(state=SyncState.objects.get(key="test"))
+        self.assertTrue(resumed.is_processed(make_page(0, ["new", "a"])))
+        self.assertFalse(resumed.is_processed(self.pages[1]))
+
+        resumed.track(make_page(2, ["b", "c"]))
+        self.assertTrue(resumed.reached_known_releases())
+
+        resumed.save()
+        self.assertIsNone(resumed.state.checkpoint)
+        self.assertFalse(resumed.state.checkpoint_pages.exists())
+        self.assertEquals(resumed.state.seen_albums_ids[:3], ["new", "a", "b"])
+
+    def test_checkpoint_pages_written_once(self):
+        """ Checks checkpoints only store the pages of the last batch. """
+        tracker = SyncTracker(state=self.state, full=True)
+        for offset in range(0, 40, 2):
+            ids = [f"id{offset}", f"id{offset + 1}"]
+            tracker.track(make_page(offset, ids))
+            tracker.checkpoint()
+            # Same checkpoint size whatever the number of pages
+            self.assertEquals(
+                self.state.checkpoint,
+                {"full": True, "limit": 2, "pages_count": offset // 2 + 1},
+            )
+
+        self.assertEquals(self.state.checkpoint_pages.count(), 20)
+
+        resumed = SyncTracker(state=self.state, full=True)
+        self.assertEquals(len(resumed.resumed_offsets), 20)
+        self.assertEquals(
+            resumed.new_ids, [f"id{index}" for index in range(40)]
+        )
+        self.assertEquals(resumed.fingerprints, tracker.fingerprints)
+
+    def test_stale_checkpoint_dropped(self):
+        """ Checks pages of a crawl which is not resumed are dropped. """
+        tracker = SyncTracker(state=self.state, full=True)
+        tracker.track(make_page(0, ["new", "a"]))
+        tracker.checkpoint()
+
+        incremental = SyncTracker(state=self.state)
+        self.assertEquals(incremental.resumed_offsets, set())
+        incremental.track(make_page(2, ["c", "d"]))
+        incremental.checkpoint()
+
+        self.assertEquals(
+            list(self.state.checkpoint_pages.values_list("offset", flat=True)),
+            [2],
+        )
+
+    def test_full_sync(self):
+        """ Checks a full sync ignores previous state. """
+        tracker = SyncTracker(state=self.state, full=True)
+
+        self.assertTrue(tracker.track(self.pages[0]))
+        self.assertFalse(tracker.reached_known_releases())
+
+        tracker.save()
+        self.assertEquals(self.state.seen_albums_ids, ["a", "b"])
@@ -0,0 +1,364 @@
+# coding: utf-8
+
+import json
+from pathlib import Path
+from unittest.mock import patch
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from challenge.cache import get_artists_cache
+from challenge.models import Artist, Album
+from challenge.pagination import (
+    ArtistCursorPagination,
+    artist_pagination_class,
+)
+from challenge.utils import parse_release_date
+from challenge.views import ArtistViewSet
+
+
+TESTS_PATH = Path().cwd() / "challenge" / "tests"
+
+
+class ArtistViewSetTestCase(TestCase):
+    """ Tests about artists API. """
+
+    def setUp(self):
+        get_artists_cache().clear()
+        for index in range(15):
+            artist = Artist.objects.create(
+                name=f"artist_{index:02d}",
+                slug=f"artist-{index}",
+                artist_type="artist",
+            )
+            for album_index in range(3):
+                album = Album.objects.create(
+                    slug=f"album-{index}-{album_index}",
+                    album_type="single",
+                    type="album",
+                    name=f"album_{album_index}",
+                    release_date="2020-10-09",
+                    release_date_precision="day",
+                    total_tracks=1,
+                )
+                album.artists.add(artist)
+
+    def test_list_artists(self):
+        """ Checks artists are listed with their albums. """
+        response = self.client.get("/api/artists/")
+
+        self.assertEquals(response.status_code, 200)
+        results = response.json()["results"]
+        self.assertEquals(len(results), 10)
+        self.assertEquals(results[0]["name"], "artist_00")
+        self.assertEquals(
+            [album["name"] for album in results[0]["albums"]],
+            ["album_0", "album_1", "album_2"],
+        )
+
+    def test_list_artists_queries(self):
+        """ Checks a page is loaded with a constant number of queries. """
+        # DRF serializers with prefetching, and fast serialization
+        for fast in [False, True]:
+            get_artists_cache().clear()
+            with self.subTest(fast=fast), self.settings(
+                FAST_SERIALIZATION=fast
+            ):
+                # Count, artists of the page, albums of the page
+                with self.assertNumQueries(3):
+                    self.client.get("/api/artists/")
+
+                with self.assertNumQueries(3):
+                    self.client.get("/api/artists/?page=2")
+
+    def test_retrieve_artist_queries(self):
+        """ Checks an artist is loaded with its albums in two queries. """
+        artist = Artist.objects.first()
+
+        for fast in [False, True]:
+            get_artists_cache().clear()
+            with self.subTest(fast=fast), self.settings(
+                FAST_SERIALIZATION=fast
+            ):
+                with self.assertNumQueries(2):
+                    response = self.client.get(f"/api/artists/{artist.id}/")
+
+                self.assertEquals(len(response.json()["albums"]), 3)
+
+    def test_browsable_api(self):
+        """ Checks artists pages are rendered as HTML in both modes. """
+        artist = Artist.objects.first()
+
+        for fast in [False, True]:
+            for path in ["/api/artists/", f"/api/artists/{artist.id}/"]:
+                get_artists_cache().clear()
+                with self.subTest(fast=fast, path=path), self.settings(
+                    FAST_SERIALIZATION=fast
+                ):
+                    response = self.client.get(path, HTTP_ACCEPT="text/html")
+
+                    self.assertEquals(response.status_code, 200)
+                    self.assertContains(response, artist.name)
+
+    def test_list_artists_cached(self):
+        """ Checks cached responses skip the database. """
+        response = self.client.get("/api/artists/?page=2")
+
+        with self.assertNumQueries(0):
+            cached_response = self.client.get("/api/artists/?page=2")
+
+        self.assertEquals(cached_response.content, response.content)
+        self.assertEquals(cached_response["ETag"], response["ETag"])
+
+        # Other pages are cached separately
+        with self.assertNumQueries(3):
+            self.client.get("/api/artists/")
+
+    def test_list_artists_not_modified(self):
+        """ Checks clients already having the response get a 304. """
+        etag = self.client.get("/api/artists/")["ETag"]
+
+        response = self.client.get("/api/artists/", HTTP_IF_NONE_MATCH=etag)
+
+        self.assertEquals(response.status_code, 304)
+        self.assertEquals(response["ETag"], etag)
+
+    def test_cache_invalidated_on_ingestion(self):
+        """ Checks stored new releases invalidate cached responses. """
+        albums = json.loads(
+            (TESTS_PATH / "new_releases_data.json").read_text()
+        )["albums"]["items"]
+        self.client.get("/api/artists/")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            Album.save_albums(albums=albums)
+
+        response = self.client.get("/api/artists/")
+        self.assertEquals(response.json()["count"], 20)
+
+    @patch.object(ArtistViewSet, "pagination_class", ArtistCursorPagination)
+    def test_list_artists_cursor_pagination(self):
+        """ Checks cursor pages follow each other without counting rows. """
+        # Homonyms are ordered by id
+        Artist.objects.create(
+            name="artist_09", slug="artist-09-bis", artist_type="artist"
+        )
+
+        with self.assertNumQueries(2):  # artists of the page, albums
+            first_page = self.client.get("/api/artists/").json()
+        second_page = self.client.get(first_page["next"]).json()
+
+        self.assertNotIn("count", first_page)
+        names = [
+            artist["name"]
+            for page in [first_page, second_page]
+            for artist in page["results"]
+        ]
+        self.assertEquals(names, sorted(names))
+        self.assertEquals(len(names), 16)
+        self.assertEquals(names.count("artist_09"), 2)
+        self.assertIsNone(second_page["next"])
+
+    def test_cursor_pagination_mode(self):
+        """ Checks cursor mode only applies to artists API. """
+        with self.settings(PAGINATION_MODE="cursor"):
+            self.assertIs(artist_pagination_class(), ArtistCursorPagination)
+
+            with patch.object(
+                ArtistViewSet, "pagination_class", artist_pagination_class()
+            ):
+                artists = self.client.get("/api/artists/").json()
+                response = self.client.get("/api/sync-jobs/")
+
+        self.assertNotIn("count", artists)
+        self.assertEquals(response.status_code, 200)
+        self.assertEquals(response.json()["count"], 0)
+
+    def test_artists_summaries(self):
+        """ Checks summaries are read from artists table only. """
+        Artist.update_summaries()
+
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get("/api/artists/summaries/")
+
+        self.assertEquals(len(context.captured_queries), 2)  # count, page
+        self.assertNotIn("JOIN", context.captured_queries[1]["sql"])
+        self.assertEquals(
+            response.json()["results"][0],
+            {
+                "name": "artist_00",
+                "artist_type": "artist",
+                "albums_count": 3,
+                "tracks_count": 3,
+                "last_released_on": None,
+            },
+        )
+
+    def test_export_artists(self):
+        """ Checks every artist is streamed as serialized by the API. """
+        listed = self.client.get("/api/artists/").json()["results"]
+
+        # 2 queries (artists, albums) by chunk, and the last empty chunk
+        with self.settings(EXPORT_CHUNK_SIZE=4):
+            with self.assertNumQueries(9):
+                response = self.client.get("/api/artists/export/")
+                lines = b"".join(response.streaming_content).splitlines()
+
+        self.assertEquals(response["Content-Type"], "application/x-ndjson")
+        self.assertEquals(len(lines), 15)
+        self.assertEquals([json.loads(line) for line in lines[:10]], listed)
+
+    def tearDown(self):
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
+
+
+class ArtistFiltersTestCase(TestCase):
+    """ Tests about artists API albums filters. """
+
+    def setUp(self):
+        get_artists_cache().clear()
+        albums = [
+            ("old_album", "album", "2019-05-01", "day", 12, ["artist_a"]),
+            ("recent_single", "single", "2020-10-09", "day", 1, ["artist_a"]),
+            ("recent_album", "album", "2020-10", "month", 10, ["artist_b"]),
+        ]
+        artists = dict()
+        for name, album_type, release_date, precision, tracks, names in albums:
+            album = Album.objects.create(
+                slug=name,
+                album_type=album_type,
+                type="album",
+                name=name,
+                release_date=release_date,
+                release_date_precision=precision,
+                released_on=parse_release_date(release_date, precision),
+                total_tracks=tracks,
+            )
+            for artist_name in names:
+                if artist_name not in artists:
+                    artists[artist_name] = Artist.objects.create(
+                        name=artist_name, slug=artist_name, artist_type="artist"
+                    )
+                album.artists.add(artists[artist_name])
+
+        self.indexes = {
+            tuple(index.fields): index.name for index in Album._meta.indexes
+        }
+
+    def get_artists(self, query: str) -> dict:
+        results = self.client.get(f"/api/artists/?{query}").json()["results"]
+        return {
+            artist["name"]: [album["name"] for album in artist["albums"]]
+            for artist in results
+        }
+
+    def query_plan(self, query: str) -> str:
+        """ Query plan of the artists query of the page. """
+        get_artists_cache().clear()
+        with CaptureQueriesContext(connection) as context:
+            self.client.get(f"/api/artists/?{query}")
+
+        sql = next(
+            query["sql"]
+            for query in context.captured_queries
+            if "IN (SELECT" in query["sql"] and "COUNT" not in query["sql"]
+        )
+        with connection.cursor() as cursor:
+            cursor.execute(f"EXPLAIN QUERY PLAN {sql}")
+            return " ".join(str(row) for row in cursor.fetchall())
+
+    def test_filter_release_window(self):
+        """ Checks artists and albums are filtered by release date. """
+        query = "released_after=2020-01-01&released_before=2020-10-05"
+
+        self.assertEquals(
+            self.get_artists(query),
+            {"artist_b": ["recent_album"]},
+        )
+        self.assertIn(
+            self.indexes[("released_on", "total_tracks")],
+            self.query_plan(query),
+        )
+
+    def test_filter_released_after(self):
+        """ Checks a release date bound alone is served by an index. """
+        query = "released_after=2020-01-01"
+
+        self.assertEquals(
+            self.get_artists(query),
+            {"artist_a": ["recent_single"], "artist_b": ["recent_album"]},
+        )
+        self.assertIn(
+            self.indexes[("released_on", "total_tracks")],
+            self.query_plan(query),
+        )
+
+    def test_filter_album_type(self):
+        """ Checks artists and albums are filtered by album type. """
+        query = "album_type=single"
+
+        self.assertEquals(
+            self.get_artists(query), {"artist_a": ["recent_single"]}
+        )
+        self.assertIn(
+            self.indexes[("album_type", "released_on")], self.query_plan(query)
+        )
+
+        query = "album_type=single&released_after=2020-01-01"
+        self.assertEquals(
+            self.get_artists(query), {"artist_a": ["recent_single"]}
+        )
+        self.assertIn(
+            self.indexes[("album_type", "released_on")], self.query_plan(query)
+        )
+
+    def test_filter_min_tracks(self):
+        """ Checks artists and albums are filtered by number of tracks. """
+        query = "min_tracks=10"
+
+        self.assertEquals(
+            self.get_artists(query),
+            {"artist_a": ["old_album"], "artist_b": ["recent_album"]},
+        )
+        self.assertIn(
+            self.indexes[("total_tracks", "released_on")],
+            self.query_plan(query),
+        )
+
+        # Served by either index on both columns
+        query = "min_tracks=10&released_after=2020-01-01"
+        self.assertEquals(
+            self.get_artists(query),
+            {"artist_b": ["recent_album"]},
+        )
+        self.assertNotIn("SCAN challenge_album", self.query_plan(query))
+
+    def test_filter_not_duplicating_artists(self):
+        """ Checks artists with several matching albums are listed once. """
+        self.assertEquals(
+            self.get_artists("min_tracks=1"),
+            {
+                "artist_a": ["old_album", "recent_single"],
+                "artist_b": ["recent_album"],
+            },
+        )
+
+    def test_filter_same_payload_without_fast_serialization(self):
+        """ Checks both serialization modes filter albums the same way. """
+        query = "album_type=album"
+        fast = self.get_artists(query)
+        get_artists_cache().clear()
+
+        with self.settings(FAST_SERIALIZATION=False):
+            self.assertEquals(self.get_artists(query), fast)
+
+    def test_invalid_filter(self):
+        """ Checks invalid filters are rejected. """
+        for query in ["released_after=yesterday", "min_tracks=-1"]:
+            response = self.client.get(f"/api/artists/?{query}")
+            self.assertEquals(response.status_code, 400)
+
+    def tearDown(self):
+        Artist.objects.all().delete()
+        Album.objects.all().delete()
@@ -1,5 +1,17 @@
-from .models import slugify_model
-from .spotify_auth_utils import SpotifyAuth
+from .models import join_markets, parse_release_date, slugify_model
+from .models import split_markets
+from .http_client import HttpClient
+from .identity_map import IdentityMap
+from .rate_limiter import RateLimiter
+
+http_client = HttpClient()  # Shared by other scripts imported after
+
+from .async_http_client import AsyncHttpClient  # NOQA
+
+async_http_client = AsyncHttpClient()  # Async views and connectors
+rate_limiter = RateLimiter()  # Shared by every Spotify API connector
+
+from .spotify_auth_utils import SpotifyAuth  # NOQA
 
 spotify_auth = SpotifyAuth()  # Used by other scripts imported after
 
@@ -8,8 +20,15 @@ from .spotify_connector import SpotifyConnector  # NOQA
 
 
 __all__ = [
+    "async_http_client",
+    "http_client",
+    "IdentityMap",
+    "join_markets",
+    "parse_release_date",
+    "rate_limiter",
     "spotify_auth",
     "SpotifyConnector",
     "SpotifySession",
     "slugify_model",
+    "split_markets",
 ]
@@ -0,0 +1,287 @@
+# coding: utf-8
+
+import asyncio
+import json
+import ssl
+import threading
+import weakref
+from collections import defaultdict
+from urllib.parse import urlencode, urlsplit
+
+import requests
+from requests.structures import CaseInsensitiveDict
+
+from django.conf import settings
+
+_END_OF_HEADERS = (b"\r\n", b"\n", b"")
+
+
+class StaleConnection(ConnectionError):
+    """ Kept alive connection closed by the server before a response. """
+
+
+class AsyncResponse:
+    """ Response of `AsyncHttpClient`, with `requests.Response` main API. """
+
+    def __init__(self, status_code: int, headers: CaseInsensitiveDict, body):
+        self.status_code = status_code
+        self.headers = headers
+        self.content = body
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def iter_content(self, chunk_size: int = 1):
+        for start in range(0, len(self.content), chunk_size):
+            yield self.content[start : start + chunk_size]
+
+    def close(self):
+        """ Bodies are read at once, the connection is already released. """
+
+
+class AsyncHttpClient:
+    """
+    HTTP/1.1 client on asyncio streams: requests are awaited without
+    blocking the event loop, nor using a thread.
+
+    As with `HttpClient`, connections are kept alive between requests: at
+    most `pool_size` idle connections are kept per host, and per event loop
+    since streams belong to the loop they were opened in. Connection errors
+    and timeouts raise `requests` exceptions, so both clients are handled
+    the same way.
+    """
+
+    def __init__(self, pool_size: int = None, timeout: float = None):
+        """
+        Inits client, `pool_size` and `timeout` default to
+        `SPOTIFY_HTTP_POOL_SIZE` and `SPOTIFY_HTTP_TIMEOUT` settings.
+        """
+        self.pool_size = pool_size or getattr(
+            settings, "SPOTIFY_HTTP_POOL_SIZE", 10
+        )
+        self.timeout = timeout or getattr(settings, "SPOTIFY_HTTP_TIMEOUT", 10)
+
+        # Idle connections by event loop, then by host
+        self._pools = weakref.WeakKeyDictionary()
+        self._ssl_context = None
+        self._lock = threading.Lock()
+        self._requests_count = 0
+        self._connections_count = 0
+
+    async def get(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> AsyncResponse:
+        return await self.request("POST", url, **kwargs)
+
+    async def request(
+        self,
+        method: str,
+        url: str,
+        params: dict = None,
+        data=None,
+        headers: dict = None,
+        timeout: float = None,
+        **kwargs,
+    ) -> AsyncResponse:
+        """
+        Performs request on a kept alive connection, with default timeout.
+        Bodies are read at once: `stream` and other `requests` arguments
+        are ignored.
+        """
+        with self._lock:
+            self._requests_count += 1
+        try:
+            return await asyncio.wait_for(
+                self._send(method, url, params, data, headers),
+                timeout=timeout or self.timeout,
+            )
+        except asyncio.TimeoutError as e:
+            raise requests.exceptions.Timeout(f"{url} timed out.") from e
+        except (OSError, EOFError, ValueError) as e:
+            raise requests.exceptions.ConnectionError(str(e)) from e
+
+    async def aclose(self):
+        """ Closes idle connections of the running event loop. """
+        with self._lock:
+            pools = self._pools.pop(asyncio.get_running_loop(), {})
+        for idle in pools.values():
+            for _, writer in idle:
+                writer.close()
+
+    def metrics(self) -> dict:
+        """ Connections reuse metrics, see `HttpClient.metrics`. """
+        with self._lock:
+            return {
+                "requests": self._requests_count,
+                "connections": self._connections_count,
+                "reused_connections": max(
+                    self._requests_count - self._connections_count, 0
+                ),
+            }
+
+    async def _send(
+        self, method: str, url: str, params: dict, data, headers: dict
+    ) -> AsyncResponse:
+        parts = urlsplit(url)
+        secure = parts.scheme == "https"
+        port = parts.port or (443 if secure else 80)
+        key = (parts.scheme, parts.hostname, port)
+        message = self._message(method, parts, params, data, headers)
+
+        connection = self._checkout(key)
+        while True:
+            reused = connection is not None
+            if not reused:
+                connection = await self._connect(parts.hostname, port, secure)
+
+            reader, writer = connection
+            try:
+                writer.write(message)
+                await writer.drain()
+                response, keep_alive = await self._read_response(
+                    reader, method
+                )
+            except ConnectionError:
+                writer.close()
+                if reused:
+                    # Closed while idle, retried on a new connection
+                    connection = None
+                    continue
+                raise
+            except BaseException:
+                writer.close()
+                raise
+
+            if keep_alive:
+                self._checkin(key, connection)
+            else:
+                writer.close()
+            return response
+
+    def _message(
+        self, method: str, parts, params: dict, data, headers: dict
+    ) -> bytes:
+        """ Request line, headers and body. """
+        target = parts.path or "/"
+        query = "&".join(
+            part
+            for part in [parts.query, urlencode(params or {}, doseq=True)]
+            if part
+        )
+        if query:
+            target = f"{target}?{query}"
+
+        headers = CaseInsensitiveDict(headers or {})
+        body = b""
+        if isinstance(data, dict):
+            body = urlencode(data, doseq=True).encode()
+            headers.setdefault(
+                "Content-Type", "application/x-www-form-urlencoded"
+            )
+        elif data is not None:
+            body = data.encode() if isinstance(data, str) else data
+
+        headers.setdefault("Host", parts.netloc)
+        headers.setdefault("User-Agent", requests.utils.default_user_agent())
+        headers.setdefault("Accept", "*/*")
+        headers.setdefault("Accept-Encoding", "identity")
+        headers.setdefault("Connection", "keep-alive")
+        if body or method in ("POST", "PUT", "PATCH"):
+            headers["Content-Length"] = str(len(body))
+
+        lines = [f"{method} {target} HTTP/1.1"] + [
+            f"{name}: {value}" for name, value in headers.items()
+        ]
+        return "\r\n".join(lines + ["", ""]).encode("latin-1") + body
+
+    async def _read_response(self, reader, method: str) -> tuple:
+        """ Response, and whether the connection can be kept alive. """
+        status_line = await reader.readline()
+        if not status_line:
+            raise StaleConnection("Connection closed by the server.")
+        version, status_code = status_line.decode("latin-1").split()[:2]
+        status_code = int(status_code)
+
+        headers = CaseInsensitiveDict()
+        while True:
+            line = await reader.readline()
+            if line in _END_OF_HEADERS:
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            name, value = name.strip(), value.strip()
+            headers[name] = (
+                f"{headers[name]}, {value}" if name in headers else value
+            )
+
+        connection = headers.get("Connection", "").lower()
+        keep_alive = (
+            "keep-alive" in connection
+            if version == "HTTP/1.0"
+            else "close" not in connection
+        )
+        if method == "HEAD" or status_code in (204, 304):
+            body = b""
+        elif "chunked" in headers.get("Transfer-Encoding", "").lower():
+            body = await self._read_chunks(reader)
+        elif "Content-Length" in headers:
+            body = await reader.readexactly(int(headers["Content-Length"]))
+        else:
+            # Body ends with the connection
+            body = await reader.read()
+            keep_alive = False
+
+        return AsyncResponse(status_code, headers, body), keep_alive
+
+    @staticmethod
+    async def _read_chunks(reader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";")[0], 16)
+            if size == 0:
+                # Trailer headers are ignored
+                while await reader.readline() not in _END_OF_HEADERS:
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)  # chunk line break
+
+    async def _connect(self, host: str, port: int, secure: bool) -> tuple:
+        kwargs = {}
+        if secure:
+            if self._ssl_context is None:
+                self._ssl_context = ssl.create_default_context()
+            kwargs = dict(ssl=self._ssl_context, server_hostname=host)
+
+        connection = await asyncio.open_connection(host, port, **kwargs)
+        with self._lock:
+            self._connections_count += 1
+        return connection
+
+    def _idle(self, key: tuple) -> list:
+        """ Idle connections to a host from the running event loop. """
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if loop not in self._pools:
+                self._pools[loop] = defaultdict(list)
+            return self._pools[loop][key]
+
+    def _checkout(self, key: tuple) -> tuple:
+        idle = self._idle(key)
+        while idle:
+            reader, writer = idle.pop()
+            if not writer.is_closing() and not reader.at_eof():
+                return reader, writer
+            writer.close()
+        return None
+
+    def _checkin(self, key: tuple, connection: tuple):
+        idle = self._idle(key)
+        if len(idle) < self.pool_size:
+            idle.append(connection)
+        else:
+            connection[1].close()
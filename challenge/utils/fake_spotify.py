@@ -0,0 +1,199 @@
+# coding: utf-8
+
+import json
+import logging
+import math
+import secrets
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+from challenge.utils.spotify_stub import SyntheticNewReleases
+
+logger = logging.getLogger(__name__)
+
+
+class FakeSpotifyServer:
+    """
+    Local HTTP stand-in of Spotify accounts (authorize and token) and new
+    releases endpoints, to run the connector over real HTTP under load.
+
+    New releases pages come from a `SyntheticNewReleases` catalog, each
+    response delayed by `latency` seconds. `throttle_rate` and `error_rate`
+    are the shares of new releases requests answered with a 429 (with a
+    `Retry-After` of `retry_after` seconds) and a 503: failures are spread
+    evenly among requests, so runs are reproducible. Access tokens expire
+    after `token_lifetime` seconds, requests with an expired token get a
+    401 as with Spotify.
+    """
+
+    NEW_RELEASES_PATH = "/v1/browse/new-releases"
+
+    def __init__(
+        self,
+        catalog: SyntheticNewReleases,
+        host: str = "127.0.0.1",
+        port: int = 0,
+        latency: float = 0,
+        throttle_rate: float = 0,
+        error_rate: float = 0,
+        retry_after: int = 1,
+        token_lifetime: int = 3600,
+    ):
+        self.catalog = catalog
+        self.latency = latency
+        self.throttle_rate = throttle_rate
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.token_lifetime = token_lifetime
+
+        self.stats = Counter()
+        self._tokens = dict()  # access token expiry, by token
+        self._refresh_tokens = set()
+        self._lock = threading.Lock()
+
+        self.httpd = ThreadingHTTPServer((host, port), _FakeSpotifyHandler)
+        self.httpd.daemon_threads = True
+        self.httpd.fake = self
+        self._thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """ Serves requests from a background thread. """
+        self._thread = threading.Thread(
+            target=self.httpd.serve_forever, name="fake-spotify", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def authorize(self, query: dict):
+        """ Grants access right away: redirects with an authorization code. """
+        params = {"code": secrets.token_hex(8)}
+        if "state" in query:
+            params["state"] = query["state"]
+        location = f"{query.get('redirect_uri', '/')}?{urlencode(params)}"
+        return 302, {}, {"Location": location}
+
+    def token(self, form: dict):
+        """ Issues tokens for authorization codes and refresh tokens. """
+        grant_type = form.get("grant_type")
+        if grant_type == "refresh_token":
+            if form.get("refresh_token") not in self._refresh_tokens:
+                return 400, {"error": "invalid_grant"}, {}
+        elif grant_type != "authorization_code" or not form.get("code"):
+            return 400, {"error": "invalid_request"}, {}
+
+        access_token = secrets.token_hex(16)
+        refresh_token = secrets.token_hex(16)
+        with self._lock:
+            self.stats[f"tokens_{grant_type}"] += 1
+            self._tokens[access_token] = time.monotonic() + self.token_lifetime
+            self._refresh_tokens.add(refresh_token)
+
+        return (
+            200,
+            {
+                "access_token": access_token,
+                "token_type": "Bearer",
+                "expires_in": self.token_lifetime,
+                "refresh_token": refresh_token,
+            },
+            {},
+        )
+
+    def new_releases(self, authorization: str, query: dict):
+        """ New releases page, unless the token or the fault injection fail. """
+        time.sleep(self.latency)
+
+        token = (authorization or "").replace("Bearer ", "", 1)
+        with self._lock:
+            self.stats["requests"] += 1
+            count = self.stats["requests"]
+            expiry = self._tokens.get(token)
+
+            if expiry is None or expiry <= time.monotonic():
+                self.stats["unauthorized"] += 1
+                return 401, _error(401, "The access token expired"), {}
+            if _injected(count, self.throttle_rate):
+                self.stats["throttled"] += 1
+                return (
+                    429,
+                    _error(429, "API rate limit exceeded"),
+                    {"Retry-After": str(self.retry_after)},
+                )
+            if _injected(count, self.error_rate):
+                self.stats["errors"] += 1
+                return 503, _error(503, "Service unavailable"), {}
+            self.stats["pages"] += 1
+
+        page = self.catalog.page(
+            url=f"{self.url}{self.NEW_RELEASES_PATH}",
+            offset=int(query.get("offset", 0)),
+            limit=int(query.get("limit", 20)),
+        )
+        return 200, page, {}
+
+
+class _FakeSpotifyHandler(BaseHTTPRequestHandler):
+    """ Routes requests to the `FakeSpotifyServer` of the HTTP server. """
+
+    protocol_version = "HTTP/1.1"  # keep-alive connections
+
+    def do_GET(self):
+        fake = self.server.fake
+        parts = urlsplit(self.path)
+        query = dict(parse_qsl(parts.query))
+        path = parts.path.rstrip("/")
+
+        if path == "/authorize":
+            self._respond(*fake.authorize(query))
+        elif path == fake.NEW_RELEASES_PATH:
+            self._respond(
+                *fake.new_releases(self.headers.get("Authorization"), query)
+            )
+        else:
+            self._respond(404, _error(404, "Not found"), {})
+
+    def do_POST(self):
+        fake = self.server.fake
+        parts = urlsplit(self.path)
+        length = int(self.headers.get("Content-Length") or 0)
+        body = self.rfile.read(length).decode()
+        # Parameters are sent in the query string or as a form
+        form = dict(parse_qsl(parts.query), **dict(parse_qsl(body)))
+
+        if parts.path.rstrip("/") == "/api/token":
+            self._respond(*fake.token(form))
+        else:
+            self._respond(404, _error(404, "Not found"), {})
+
+    def _respond(self, status: int, body: dict, headers: dict):
+        content = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(content)))
+        for name, value in headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(content)
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+
+def _injected(count: int, rate: float) -> bool:
+    """ True for `rate` of the requests, evenly spread. """
+    return math.floor(count * rate) > math.floor((count - 1) * rate)
+
+
+def _error(status: int, message: str) -> dict:
+    return {"error": {"status": status, "message": message}}
@@ -0,0 +1,66 @@
+# coding: utf-8
+
+import requests
+import threading
+from requests.adapters import HTTPAdapter
+
+from django.conf import settings
+
+
+class HttpClient:
+    """
+    HTTP client keeping connections alive between requests.
+
+    A pool of `pool_size` connections is kept per host, so requests sent to
+    the same host (even from several threads) reuse already opened TCP/TLS
+    connections instead of performing a new handshake each time.
+    """
+
+    def __init__(self, pool_size: int = None, timeout: float = None):
+        """
+        Inits client, `pool_size` and `timeout` default to
+        `SPOTIFY_HTTP_POOL_SIZE` and `SPOTIFY_HTTP_TIMEOUT` settings.
+        """
+        self.pool_size = pool_size or getattr(
+            settings, "SPOTIFY_HTTP_POOL_SIZE", 10
+        )
+        self.timeout = timeout or getattr(settings, "SPOTIFY_HTTP_TIMEOUT", 10)
+
+        self._adapter = HTTPAdapter(
+            pool_connections=self.pool_size, pool_maxsize=self.pool_size
+        )
+        self._session = requests.Session()
+        self._session.mount("http://", self._adapter)
+        self._session.mount("https://", self._adapter)
+
+        self._lock = threading.Lock()
+        self._requests_count = 0
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """ Performs request with default timeout on pooled connections. """
+        kwargs.setdefault("timeout", self.timeout)
+        with self._lock:
+            self._requests_count += 1
+        return self._session.request(method, url, **kwargs)
+
+    def metrics(self) -> dict:
+        """
+        Connections reuse metrics: connections opened by the pools, and
+        requests sent on an already opened connection.
+        """
+        pools = self._adapter.poolmanager.pools
+        connections = sum(pools[key].num_connections for key in pools.keys())
+        with self._lock:
+            requests_count = self._requests_count
+
+        return {
+            "requests": requests_count,
+            "connections": connections,
+            "reused_connections": max(requests_count - connections, 0),
+        }
@@ -0,0 +1,71 @@
+# coding: utf-8
+
+from collections import OrderedDict
+
+from django.conf import settings
+
+
+class IdentityMap:
+    """
+    Primary keys of stored rows by slug, so that rows already met during a
+    sync are not looked up again in database.
+
+    The map keeps at most `max_size` slugs, the least recently used ones
+    are evicted first. It is meant to live as long as a sync: ids of rows
+    inserted by a rolled back transaction would be wrong afterwards.
+    """
+
+    def __init__(self, max_size: int = None):
+        """ `max_size` defaults to `SPOTIFY_IDENTITY_MAP_SIZE` setting. """
+        self.max_size = max_size or getattr(
+            settings, "SPOTIFY_IDENTITY_MAP_SIZE", 100000
+        )
+        self._ids = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __contains__(self, slug: str) -> bool:
+        return slug in self._ids
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def get_many(self, slugs) -> dict:
+        """ Known primary keys of given slugs, by slug. """
+        ids = dict()
+        for slug in slugs:
+            if slug in self._ids:
+                self._ids.move_to_end(slug)
+                ids[slug] = self._ids[slug]
+                self.hits += 1
+            else:
+                self.misses += 1
+        return ids
+
+    def update(self, ids: dict):
+        """ Remembers primary keys by slug. """
+        for slug, pk in ids.items():
+            self._ids[slug] = pk
+            self._ids.move_to_end(slug)
+
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+            self.evictions += 1
+
+    def warm_load(self, model):
+        """ Loads the most recent rows of the model, in a single query. """
+        rows = (
+            model.objects.order_by("-id")
+            .values_list("slug", "id")[: self.max_size]
+        )
+        # Most recent rows are the last to be evicted
+        self.update(dict(reversed(list(rows))))
+
+    def stats(self) -> dict:
+        return {
+            "size": len(self._ids),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
@@ -0,0 +1,169 @@
+# coding: utf-8
+
+import codecs
+import json
+
+# Album and artist fields stored by `Album.save_albums`, other fields
+# (images, markets, urls...) are dropped while parsing
+ALBUM_FIELDS = [
+    "id",
+    "name",
+    "type",
+    "album_type",
+    "release_date",
+    "release_date_precision",
+    "total_tracks",
+]
+ARTIST_FIELDS = ["id", "name", "type"]
+
+_WHITESPACES = " \t\n\r"
+
+
+class JSONStream:
+    """
+    Reads JSON tokens and values from an iterable of bytes chunks (such as
+    `requests.Response.iter_content`), reading chunks only when needed.
+
+    Only the text not consumed yet is kept in memory: values are decoded
+    one at a time with `json.JSONDecoder.raw_decode`.
+    """
+
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self._decoder = json.JSONDecoder()
+        self._text_decoder = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._position = 0
+        self._exhausted = False
+
+    def peek(self) -> str:
+        """ Next character which is not a whitespace, "" at the end. """
+        while True:
+            while (
+                self._position < len(self._buffer)
+                and self._buffer[self._position] in _WHITESPACES
+            ):
+                self._position += 1
+            if self._position < len(self._buffer):
+                return self._buffer[self._position]
+            if not self._read():
+                return ""
+
+    def expect(self, char: str):
+        """ Consumes the next character, which must be `char`. """
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r}, found {found!r}.")
+        self._position += 1
+
+    def value(self):
+        """ Decodes the next JSON value. """
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(
+                    self._buffer, self._position
+                )
+                # A number may go on in the next chunk
+                if end < len(self._buffer) or self._exhausted:
+                    self._position = end
+                    return value
+            except json.JSONDecodeError:
+                if self._exhausted:
+                    raise
+            self._read()
+
+    def _read(self) -> bool:
+        """ Appends the next chunk to the buffer, False at the end. """
+        if self._exhausted:
+            return False
+
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._exhausted = True
+            text = self._text_decoder.decode(b"", final=True)
+        else:
+            text = self._text_decoder.decode(chunk)
+
+        # Consumed text is dropped
+        self._buffer = self._buffer[self._position :] + text
+        self._position = 0
+        return chunk is not None
+
+
+def iter_object(stream: JSONStream):
+    """ Yields keys of the object at the stream position, see `iter_items`. """
+    stream.expect("{")
+    if stream.peek() == "}":
+        stream.expect("}")
+        return
+
+    while True:
+        key = stream.value()
+        stream.expect(":")
+        yield key
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("}")
+        return
+
+
+def iter_array(stream: JSONStream):
+    """ Yields values of the array at the stream position, one at a time. """
+    stream.expect("[")
+    if stream.peek() == "]":
+        stream.expect("]")
+        return
+
+    while True:
+        yield stream.value()
+        if stream.peek() == ",":
+            stream.expect(",")
+            continue
+        stream.expect("]")
+        return
+
+
+def iter_new_releases(chunks):
+    """
+    Yields `(key, value)` pairs of the `albums` object of a new releases
+    response, items being yielded one at a time as `("items", album)`.
+    Albums are pruned to `ALBUM_FIELDS`.
+
+    Each key of an object must be consumed (its value read) before the next
+    one is yielded, so keys are handled here.
+    """
+    stream = JSONStream(chunks)
+    for key in iter_object(stream):
+        if key != "albums":
+            stream.value()
+            continue
+
+        for albums_key in iter_object(stream):
+            if albums_key == "items":
+                for album in iter_array(stream):
+                    yield "items", prune_album(album)
+            else:
+                yield albums_key, stream.value()
+
+
+def parse_new_releases(chunks) -> dict:
+    """ `albums` object of a new releases response, albums pruned. """
+    albums = {"items": []}
+    for key, value in iter_new_releases(chunks):
+        if key == "items":
+            albums["items"].append(value)
+        else:
+            albums[key] = value
+    return albums
+
+
+def prune_album(album: dict) -> dict:
+    """ Album with the stored fields only, and its artists. """
+    pruned = {field: album[field] for field in ALBUM_FIELDS if field in album}
+    pruned["artists"] = [
+        {field: artist[field] for field in ARTIST_FIELDS if field in artist}
+        for artist in album.get("artists", [])
+    ]
+    return pruned
@@ -0,0 +1,135 @@
+# coding: utf-8
+
+import threading
+from collections import defaultdict
+
+from django.conf import settings
+
+
+class MetricsRegistry:
+    """
+    In-process counters and summaries (count and sum of observed values),
+    rendered in Prometheus text exposition format.
+
+    Metrics are identified by their name and labels. Recording is a no-op
+    unless `METRICS_ENABLED` setting is True, see `inc` and `observe`.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = defaultdict(float)
+        self._summaries = defaultdict(lambda: [0, 0.0])
+        self._help = dict()
+
+    def describe(self, name: str, help: str):
+        self._help[name] = help
+
+    def inc(self, name: str, value: float = 1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] += value
+
+    def observe(self, name: str, value: float, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            summary = self._summaries[key]
+            summary[0] += 1
+            summary[1] += value
+
+    def reset(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def render(self) -> str:
+        """ Metrics in Prometheus text format, grouped by name. """
+        with self._lock:
+            samples = defaultdict(list)
+            types = dict()
+            for (name, labels), value in self._counters.items():
+                types[name] = "counter"
+                samples[name].append((name, labels, value))
+            for (name, labels), (count, total) in self._summaries.items():
+                types[name] = "summary"
+                samples[name].append((f"{name}_count", labels, count))
+                samples[name].append((f"{name}_sum", labels, total))
+
+        lines = []
+        for name in sorted(samples):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} {types[name]}")
+            for sample_name, labels, value in sorted(samples[name]):
+                lines.append(
+                    f"{sample_name}{_format_labels(labels)} {value:g}"
+                )
+        return "\n".join(lines) + "\n"
+
+
+registry = MetricsRegistry()
+
+registry.describe(
+    "http_request_duration_seconds", "API requests duration."
+)
+registry.describe(
+    "http_request_db_seconds", "Time spent in database queries by requests."
+)
+registry.describe("http_request_db_queries", "Database queries by requests.")
+registry.describe(
+    "http_request_serialization_seconds",
+    "Time spent outside database queries by requests (serialization and "
+    "rendering).",
+)
+registry.describe(
+    "spotify_fetch_seconds", "Spotify API requests latency, by status."
+)
+registry.describe("spotify_retries_total", "Retried Spotify API requests.")
+registry.describe(
+    "spotify_token_refreshes_total", "Spotify access token refreshes."
+)
+registry.describe(
+    "spotify_token_refresh_seconds", "Spotify access token refreshes duration."
+)
+registry.describe(
+    "spotify_http_requests_total", "Requests sent to Spotify by syncs."
+)
+registry.describe(
+    "spotify_http_connections_total",
+    "Connections opened to Spotify by syncs.",
+)
+registry.describe(
+    "spotify_http_reused_connections_total",
+    "Requests sent to Spotify on an already opened connection by syncs.",
+)
+registry.describe("spotify_sync_seconds", "New releases syncs duration.")
+registry.describe(
+    "spotify_sync_store_seconds", "Time spent storing new releases pages."
+)
+
+
+def enabled() -> bool:
+    return getattr(settings, "METRICS_ENABLED", False)
+
+
+def inc(name: str, value: float = 1, **labels):
+    """ Increments a counter of the shared registry, if metrics are enabled. """
+    if enabled():
+        registry.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels):
+    """ Observes a value in a summary of the shared registry, if enabled. """
+    if enabled():
+        registry.observe(name, value, **labels)
+
+
+def _format_labels(labels: tuple) -> str:
+    if not labels:
+        return ""
+    content = ",".join(
+        '{}="{}"'.format(
+            name, str(value).replace("\\", "\\\\").replace('"', '\\"')
+        )
+        for name, value in labels
+    )
+    return f"{{{content}}}"
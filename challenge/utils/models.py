@@ -1,11 +1,52 @@
 # coding: utf-8
 
+from datetime import date, datetime
+from functools import lru_cache
+
 from django.utils.text import slugify
 
+# Spotify release dates formats by precision
+RELEASE_DATE_FORMATS = {"year": "%Y", "month": "%Y-%m", "day": "%Y-%m-%d"}
+
+# Slugs computed by `slugify_model` kept in memory
+SLUGS_CACHE_SIZE = 10000
+
+# Separator of the markets (country codes) stored on albums
+MARKETS_SEPARATOR = ","
+
 
 def slugify_model(model):
     """
     Slugify model with its name and spotify id (this id is supposed unique).
     """
-    to_slugify = f"{model.get('name')} {model.get('id')}"
+    return _slugify(f"{model.get('name')} {model.get('id')}")
+
+
+@lru_cache(maxsize=SLUGS_CACHE_SIZE)
+def _slugify(to_slugify: str) -> str:
+    # The same artists are met many times while storing albums
     return slugify(to_slugify)
+
+
+def parse_release_date(release_date: str, precision: str) -> date:
+    """
+    Converts Spotify release date to a date according to its precision, the
+    first month or day standing for the unknown ones.
+    None if the date is not valid (Spotify uses "0000" for unknown years).
+    """
+    try:
+        return datetime.strptime(
+            release_date, RELEASE_DATE_FORMATS[precision]
+        ).date()
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
+def join_markets(markets) -> str:
+    """ Markets country codes stored as a sorted comma separated string. """
+    return MARKETS_SEPARATOR.join(sorted(set(markets)))
+
+
+def split_markets(markets: str) -> set:
+    """ Markets country codes of a string built by `join_markets`. """
+    return set(markets.split(MARKETS_SEPARATOR)) if markets else set()
@@ -0,0 +1,160 @@
+# coding: utf-8
+
+import asyncio
+import random
+import threading
+import time
+
+from django.conf import settings
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every thread requesting an API, adapting its rate
+    to the API limits.
+
+    Requests take a token from a bucket of `burst` tokens refilled at `rate`
+    tokens per second. When the API throttles a request (HTTP 429), the rate
+    is halved and every request waits for the `Retry-After` delay. Each
+    successful request then raises the rate back, step by step, up to
+    `max_rate`: the rate settles at the highest one the API accepts.
+
+    Failed requests (HTTP 5xx) are retried at most `max_retries` times after
+    an exponential backoff delay (from `backoff_base` up to `backoff_max`
+    seconds) with full jitter, so retries of concurrent requests spread out.
+    """
+
+    # Successful requests needed to recover the maximum rate from zero
+    RECOVERY_REQUESTS = 20
+
+    # The rate is never lowered below this fraction of the maximum rate
+    MIN_RATE_RATIO = 0.05
+
+    def __init__(
+        self,
+        max_rate: float = None,
+        burst: int = None,
+        max_retries: int = None,
+        backoff_base: float = None,
+        backoff_max: float = None,
+    ):
+        """
+        Inits limiter, arguments default to `SPOTIFY_RATE_LIMIT`,
+        `SPOTIFY_RATE_BURST`, `SPOTIFY_MAX_RETRIES`, `SPOTIFY_BACKOFF_BASE`
+        and `SPOTIFY_BACKOFF_MAX` settings.
+        """
+        self.max_rate = _setting(max_rate, "SPOTIFY_RATE_LIMIT", 10)
+        self.burst = _setting(burst, "SPOTIFY_RATE_BURST", 10)
+        self.max_retries = _setting(max_retries, "SPOTIFY_MAX_RETRIES", 5)
+        self.backoff_base = _setting(backoff_base, "SPOTIFY_BACKOFF_BASE", 0.5)
+        self.backoff_max = _setting(backoff_max, "SPOTIFY_BACKOFF_MAX", 30)
+
+        self.rate = self.max_rate
+        self._tokens = float(self.burst)
+        self._updated_at = time.monotonic()
+        self._paused_until = 0.0
+
+        self._lock = threading.Lock()
+        self._throttled = 0
+        self._retries = 0
+        self._waited = 0.0
+
+    def acquire(self):
+        """ Waits until a request can be sent. """
+        while True:
+            delay = self._reserve()
+            if delay is None:
+                return
+            time.sleep(delay)
+
+    async def async_acquire(self):
+        """ Awaits until a request can be sent, see `acquire`. """
+        while True:
+            delay = self._reserve()
+            if delay is None:
+                return
+            await asyncio.sleep(delay)
+
+    def succeeded(self):
+        """ Raises the rate after a successful request. """
+        with self._lock:
+            self.rate = min(
+                self.max_rate,
+                self.rate + self.max_rate / self.RECOVERY_REQUESTS,
+            )
+
+    def throttled(self, retry_after: float = None):
+        """
+        Halves the rate after a throttled request, and pauses every request
+        for `retry_after` seconds (or the backoff delay if the API did not
+        send it).
+        """
+        with self._lock:
+            self._throttled += 1
+            self.rate = max(
+                self.max_rate * self.MIN_RATE_RATIO, self.rate / 2
+            )
+            if retry_after is None:
+                retry_after = self.backoff_delay(self._throttled)
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens = 0.0
+            self._paused_until = max(self._paused_until, now + retry_after)
+
+    def backoff(self, attempt: int):
+        """ Waits before the `attempt`-th retry of a failed request. """
+        time.sleep(self._record_backoff(attempt))
+
+    async def async_backoff(self, attempt: int):
+        """ Awaits before the `attempt`-th retry, see `backoff`. """
+        await asyncio.sleep(self._record_backoff(attempt))
+
+    def backoff_delay(self, attempt: int) -> float:
+        """ Exponential backoff delay with full jitter. """
+        ceiling = min(self.backoff_max, self.backoff_base * 2 ** attempt)
+        return random.uniform(0, ceiling)
+
+    def metrics(self) -> dict:
+        """
+        Current rate (requests per second), number of throttled requests,
+        of retries, and total time requests waited (seconds).
+        """
+        with self._lock:
+            return {
+                "rate": self.rate,
+                "throttled": self._throttled,
+                "retries": self._retries,
+                "waited_seconds": self._waited,
+            }
+
+    def _reserve(self) -> float:
+        """ Takes a token, or returns the delay to wait before trying again. """
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            delay = self._paused_until - now
+            if delay <= 0:
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return None
+                delay = (1 - self._tokens) / self.rate
+            self._waited += delay
+            return delay
+
+    def _record_backoff(self, attempt: int) -> float:
+        delay = self.backoff_delay(attempt)
+        with self._lock:
+            self._retries += 1
+            self._waited += delay
+        return delay
+
+    def _refill(self, now: float):
+        self._tokens = min(
+            self.burst, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+
+def _setting(value, name: str, default):
+    """ Given value, or setting value if None (0 is a valid value). """
+    return value if value is not None else getattr(settings, name, default)
@@ -0,0 +1,117 @@
+# coding: utf-8
+
+import hashlib
+import json
+import os
+import time
+import uuid
+from pathlib import Path
+
+from django.conf import settings
+
+
+class ResponseCache:
+    """
+    On-disk cache of Spotify API responses.
+
+    Each entry is a JSON file named after its request (URL and query
+    parameters) holding the response body with its `ETag` and
+    `Last-Modified` headers, used to send conditional requests.
+    Entries expire after `ttl` seconds and at most `max_entries` entries are
+    kept, oldest ones being evicted first.
+    """
+
+    def __init__(self, directory, ttl: int, max_entries: int):
+        self.directory = Path(directory)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_settings(cls):
+        """
+        Builds cache from `SPOTIFY_RESPONSE_CACHE` settings, None if the
+        cache is disabled.
+        """
+        directory = getattr(settings, "SPOTIFY_RESPONSE_CACHE_DIR", None)
+        if not directory:
+            return None
+
+        return cls(
+            directory=directory,
+            ttl=getattr(settings, "SPOTIFY_RESPONSE_CACHE_TTL", 86400),
+            max_entries=getattr(
+                settings, "SPOTIFY_RESPONSE_CACHE_MAX_ENTRIES", 1000
+            ),
+        )
+
+    def _path(self, url: str, params: dict) -> Path:
+        key = json.dumps([url, params], sort_keys=True)
+        return self.directory / f"{hashlib.sha1(key.encode()).hexdigest()}.json"
+
+    def get(self, url: str, params: dict):
+        """ Returns the unexpired entry of the request, None otherwise. """
+        path = self._path(url, params)
+        try:
+            entry = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return None
+
+        if time.time() - entry["stored_at"] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+
+        return entry
+
+    def set(self, url: str, params: dict, headers, body):
+        """ Stores response body with its validators, if it has any. """
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        entry = {
+            "stored_at": time.time(),
+            "etag": etag,
+            "last_modified": last_modified,
+            "body": body,
+        }
+
+        # Written aside then moved, readers never see a partial entry
+        path = self._path(url, params)
+        tmp_path = path.with_suffix(f".{uuid.uuid4().hex}.tmp")
+        tmp_path.write_text(json.dumps(entry))
+        os.replace(tmp_path, path)
+
+        self._evict()
+
+    @staticmethod
+    def conditional_headers(entry) -> dict:
+        """ Headers making the request conditional to the cached entry. """
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def _evict(self):
+        """ Removes oldest entries above `max_entries`. """
+        paths = list(self.directory.glob("*.json"))
+        if len(paths) <= self.max_entries:
+            return
+
+        paths.sort(key=_modification_time)
+        for path in paths[: len(paths) - self.max_entries]:
+            path.unlink(missing_ok=True)
+
+
+def _modification_time(path: Path) -> float:
+    """ Entries may be evicted meanwhile by another thread. """
+    try:
+        return path.stat().st_mtime
+    except OSError:
+        return 0
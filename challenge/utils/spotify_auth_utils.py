@@ -2,13 +2,16 @@
 
 import base64
 import json
-import requests
 import os
 
+from django.conf import settings
+
+from challenge.utils import async_http_client, http_client
+
 
 class SpotifyAuth(object):
-    SPOTIFY_URL_AUTH = "https://accounts.spotify.com/authorize/"
-    SPOTIFY_URL_TOKEN = "https://accounts.spotify.com/api/token/"
+    AUTH_PATH = "/authorize/"
+    TOKEN_PATH = "/api/token/"
     RESPONSE_TYPE = "code"
     HEADER = "application/x-www-form-urlencoded"
     CLIENT_ID = os.environ.get("CLIENT_ID")
@@ -16,6 +19,14 @@ class SpotifyAuth(object):
     CALLBACK_URL = "http://localhost:5000/auth/callback"
     SCOPE = "user-read-email user-read-private"
 
+    def __init__(self, accounts_url: str = None):
+        """ `accounts_url` defaults to `SPOTIFY_ACCOUNTS_URL` setting. """
+        accounts_url = accounts_url or getattr(
+            settings, "SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com"
+        )
+        self.SPOTIFY_URL_AUTH = f"{accounts_url}{self.AUTH_PATH}"
+        self.SPOTIFY_URL_TOKEN = f"{accounts_url}{self.TOKEN_PATH}"
+
     def _get_auth_url(self, client_id, redirect_uri, scope):
         return (
             f"{self.SPOTIFY_URL_AUTH}"
@@ -26,7 +37,29 @@ class SpotifyAuth(object):
         )
 
     def _get_token(self, code, client_id, client_secret, redirect_uri):
-        body = {
+        post = http_client.post(
+            self.SPOTIFY_URL_TOKEN,
+            params=self._get_token_body(
+                code, client_id, client_secret, redirect_uri
+            ),
+            headers=self._get_headers(),
+        )
+        return self._handle_token(json.loads(post.text))
+
+    async def _async_get_token(
+        self, code, client_id, client_secret, redirect_uri
+    ):
+        post = await async_http_client.post(
+            self.SPOTIFY_URL_TOKEN,
+            params=self._get_token_body(
+                code, client_id, client_secret, redirect_uri
+            ),
+            headers=self._get_headers(),
+        )
+        return self._handle_token(json.loads(post.text))
+
+    def _get_token_body(self, code, client_id, client_secret, redirect_uri):
+        return {
             "grant_type": "authorization_code",
             "code": code,
             "redirect_uri": redirect_uri,
@@ -34,19 +67,14 @@ class SpotifyAuth(object):
             "client_secret": client_secret,
         }
 
-        headers = self._get_headers()
-
-        post = requests.post(
-            self.SPOTIFY_URL_TOKEN, params=body, headers=headers
-        )
-        return self._handle_token(json.loads(post.text))
-
     def _handle_token(self, response):
         if "error" in response:
             return response
+        # Refresh responses may not include a new refresh token
         return {
             key: response[key]
             for key in ["access_token", "expires_in", "refresh_token"]
+            if key in response
         }
 
     def _get_headers(self):
@@ -64,12 +92,12 @@ class SpotifyAuth(object):
 
         headers = self._get_headers()
 
-        post_refresh = requests.post(
+        post_refresh = http_client.post(
             self.SPOTIFY_URL_TOKEN, data=body, headers=headers
         )
-        p_back = json.dumps(post_refresh.text)
+        p_back = json.loads(post_refresh.text)
 
-        return self._handle_token(p_back)
+        return {"refresh_token": refresh_token, **self._handle_token(p_back)}
 
     def get_user(self):
         return self._get_auth_url(
@@ -85,3 +113,11 @@ class SpotifyAuth(object):
             client_secret=self.CLIENT_SECRET,
             redirect_uri=self.CALLBACK_URL,
         )
+
+    async def async_get_user_auth(self, code):
+        return await self._async_get_token(
+            code=code,
+            client_id=self.CLIENT_ID,
+            client_secret=self.CLIENT_SECRET,
+            redirect_uri=self.CALLBACK_URL,
+        )
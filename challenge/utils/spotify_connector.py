@@ -1,26 +1,73 @@
 # coding: utf-8
 
+import asyncio
+import queue
 import requests
-from datetime import datetime
-from functools import wraps
+import threading
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from functools import partial, wraps
 from retrying import retry
 
-from challenge.utils import SpotifySession, spotify_auth
+from django.conf import settings
+from django.db import transaction
+
+from challenge.utils import IdentityMap, SpotifySession, http_client
+from challenge.utils import async_http_client
+from challenge.utils import metrics
+from challenge.utils import rate_limiter as shared_rate_limiter
+from challenge.utils.async_http_client import AsyncHttpClient
+from challenge.utils.http_client import HttpClient
+from challenge.utils.json_stream import parse_new_releases
+from challenge.utils.rate_limiter import RateLimiter
+from challenge.utils.response_cache import ResponseCache
+from challenge.utils.sync_tracker import SyncTracker
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Pushed in the pages queue once every page has been fetched
+_END_OF_PAGES = object()
+
+# Flags pages returned from the response cache because they did not change
+NOT_MODIFIED_KEY = "not_modified"
+
+# Market of the crawl a page belongs to
+MARKET_KEY = "market"
+
+# Response cache entry of a fetched page, written once the page is stored
+CACHE_ENTRY_KEY = "cache_entry"
+
+# Server errors worth retrying
+RETRY_STATUS_CODES = (500, 502, 503, 504)
+
+# What to do with a response, see `SpotifyConnector._next_action`
+_RETURN, _REFRESH, _RETRY = "return", "refresh", "retry"
+
 
 def check_token_expiry(func: callable):
-    """ Wrapper checking token expiry date and refresh it if needed."""
+    """
+    Wrapper checking token expiry date and refresh it if needed, shortly
+    before it expires (`SPOTIFY_TOKEN_REFRESH_MARGIN` seconds).
+    """
 
     @wraps(func)
     def wrapper(*args, **kwargs):
         session = args[0].session
-        if datetime.utcnow() >= session.expiry_date:
+        margin = timedelta(
+            seconds=getattr(settings, "SPOTIFY_TOKEN_REFRESH_MARGIN", 0)
+        )
+        if datetime.utcnow() >= session.expiry_date - margin:
             logger.warning("User session token expired, refreshing.")
-            session.refresh_auth_token()
+            start = time.perf_counter()
+            session.refresh_auth_token(expired_token=session.token)
+            metrics.inc("spotify_token_refreshes_total", trigger="expiry")
+            metrics.observe(
+                "spotify_token_refresh_seconds", time.perf_counter() - start
+            )
 
         return func(*args, **kwargs)
 
@@ -35,6 +82,14 @@ def retry_if_requests_exception(exception):
     return isinstance(exception, requests.exceptions.RequestException)
 
 
+def retry_after(response) -> float:
+    """ `Retry-After` delay (seconds) of a response, None if unknown. """
+    try:
+        return max(float(response.headers["Retry-After"]), 0)
+    except (KeyError, TypeError, ValueError):
+        return None
+
+
 class SpotifyConnector:
     """
     Spotify Connector.
@@ -42,44 +97,539 @@ class SpotifyConnector:
     """
 
     # Spotify API entry to get new releases
-    NEW_RELEASES_URL = "https://api.spotify.com/v1/browse/new-releases"
+    NEW_RELEASES_PATH = "/v1/browse/new-releases"
+
+    # Maximum number of albums per page allowed by Spotify API
+    PAGE_LIMIT = 50
+
+    # `SyncState` record of the crawl
+    SYNC_KEY = "new-releases"
+
+    # Delay between two checks of the stop event while the queue is full
+    QUEUE_POLL_INTERVAL = 0.1
+
+    # Bytes read at once from streamed responses
+    STREAM_CHUNK_SIZE = 16 * 1024
 
-    def __init__(self, session: SpotifySession):
-        """ Inits connector with user session. """
+    # Attempts of a request failing with a connection error or timeout
+    PERFORM_ATTEMPTS = 7
+
+    def __init__(
+        self,
+        session: SpotifySession,
+        workers: int = None,
+        queue_size: int = None,
+        batch_size: int = None,
+        cache: ResponseCache = None,
+        rate_limiter: RateLimiter = None,
+        markets: list = None,
+        client: HttpClient = None,
+        api_url: str = None,
+        stream: bool = None,
+        async_client: AsyncHttpClient = None,
+    ):
+        """
+        Inits connector with user session.
+        `workers` is the number of pages fetched concurrently, `queue_size`
+        the number of fetched pages waiting for persistence and `batch_size`
+        the maximum number of pages stored in a single transaction.
+        They default to `SPOTIFY_CRAWL_WORKERS`, `SPOTIFY_PIPELINE_QUEUE_SIZE`
+        and `SPOTIFY_PIPELINE_BATCH_SIZE` settings.
+        `cache` is an optional `ResponseCache` used for conditional requests.
+        `rate_limiter` defaults to the limiter shared by every connector.
+        `markets` are the country codes of the crawled markets, defaulting to
+        `SPOTIFY_MARKETS` setting, or Spotify default market if empty.
+        `client` sends the requests, the shared `http_client` by default,
+        to `api_url` (`SPOTIFY_API_URL` setting by default).
+        `stream` enables streaming parsing of pages, defaults to
+        `SPOTIFY_STREAM_PAGES` setting.
+        `async_client` fetches the pages from an event loop instead of
+        `workers` threads. Without `client`, it defaults to the shared
+        `async_http_client` when `SPOTIFY_ASYNC_CLIENT` setting is True.
+        """
         self.session = session
+        self.workers = workers or getattr(settings, "SPOTIFY_CRAWL_WORKERS", 1)
+        self.queue_size = queue_size or getattr(
+            settings, "SPOTIFY_PIPELINE_QUEUE_SIZE", 8
+        )
+        self.batch_size = batch_size or getattr(
+            settings, "SPOTIFY_PIPELINE_BATCH_SIZE", 4
+        )
+        self.cache = cache
+        self.rate_limiter = rate_limiter or shared_rate_limiter
+        self.markets = list(
+            markets or getattr(settings, "SPOTIFY_MARKETS", None) or [None]
+        )
+        self.client = client
+        api_url = api_url or getattr(
+            settings, "SPOTIFY_API_URL", "https://api.spotify.com"
+        )
+        self.new_releases_url = f"{api_url}{self.NEW_RELEASES_PATH}"
+        self.stream = (
+            stream
+            if stream is not None
+            else getattr(settings, "SPOTIFY_STREAM_PAGES", False)
+        )
+        if async_client is None and client is None:
+            if getattr(settings, "SPOTIFY_ASYNC_CLIENT", False):
+                async_client = async_http_client
+        self.async_client = async_client
 
     @classmethod
     def from_usercode(cls, code):
-        session_infos = spotify_auth.get_user_auth(code=code)
-        session = SpotifySession(**session_infos)
-        return cls(session=session)
+        return cls.from_session(session=SpotifySession.from_usercode(code))
+
+    @classmethod
+    def from_session(cls, session: SpotifySession):
+        """ Connector configured from settings. """
+        return cls(session=session, cache=ResponseCache.from_settings())
 
     @check_token_expiry
-    def get_new_releases(self):
-        """ Safely get new releases. """
+    def sync_new_releases(self, full: bool = False) -> dict:
+        """
+        Get new releases and returns the storage report. Unless `full` is
+        True, only releases published since the last sync are stored (see
+        `SyncTracker`).
+        """
+        return self._get_new_releases(full=full)
+
+    def get_new_releases(self, full: bool = False):
+        """ Safely get new releases, see `sync_new_releases`. """
         try:
-            self._get_new_releases()
+            return self.sync_new_releases(full=full)
         except Exception as e:
             logger.error(
                 "Something wrong happened while getting new releases. "
                 f"Exception: {e}"
             )
 
-    def _get_new_releases(self):
+    def _get_new_releases(self, full: bool = False):
         """
         Requests new releases (albums) from Spotify API and store it in
         database.
+
+        Fetching and persistence run as a pipeline: a producer thread pushes
+        pages into a bounded queue while the calling thread stores them in
+        batched transactions. The producer blocks when the queue is full,
+        and both stages stop as soon as one of them fails, or once known
+        releases are reached.
+
+        Primary keys of the rows met are kept by an `IdentityMap` per model
+        for the whole crawl, optionally warm loaded from database
+        (`SPOTIFY_IDENTITY_MAP_WARM_LOAD` setting).
+
+        Markets are crawled concurrently, each with its own sync state.
+        Albums released in several markets are stored once per batch, with
+        the markets they were found in.
+
+        Each transaction also stores the crawl progress, so that the next
+        crawl after a failure only fetches pages not stored yet.
         """
-        from challenge.models import Album
+        from challenge.models import Album, Artist, SyncState
 
-        next_url = self.NEW_RELEASES_URL
-        while next_url:
-            albumns_infos = self._retreive_new_releases(url=next_url)
-            next_url = albumns_infos.pop("next")
-            Album.save_albums(albums=albumns_infos.get("items"))
+        trackers = {
+            market: SyncTracker(
+                state=SyncState.objects.get_or_create(
+                    key=self._sync_key(market)
+                )[0],
+                full=full,
+            )
+            for market in self.markets
+        }
+        done_markets = set()
+
+        pages = queue.Queue(maxsize=self.queue_size)
+        stop = threading.Event()
+        producer = threading.Thread(
+            target=self._produce_pages,
+            args=(pages, stop, trackers, done_markets),
+            daemon=True,
+        )
+        producer.start()
+
+        start = time.perf_counter()
+        store_seconds = 0.0
+        report = Counter(
+            pages_resumed=sum(
+                len(tracker.resumed_offsets) for tracker in trackers.values()
+            )
+        )
+        limiter_metrics = self.rate_limiter.metrics()
+        client_metrics = self._client_metrics()
+        identity_maps = {"artists": IdentityMap(), "albums": IdentityMap()}
+        if getattr(settings, "SPOTIFY_IDENTITY_MAP_WARM_LOAD", False):
+            identity_maps["artists"].warm_load(Artist)
+            identity_maps["albums"].warm_load(Album)
+        # Markets of the albums stored by this crawl, by Spotify id
+        stored_markets = defaultdict(set)
+        try:
+            for batch in self._consume_pages(pages):
+                albums = dict()
+                albums_markets = defaultdict(set)
+                batch_markets = set()
+                cache_entries = []
+                for page in batch:
+                    if CACHE_ENTRY_KEY in page:
+                        cache_entries.append(page.pop(CACHE_ENTRY_KEY))
+                    market = page[MARKET_KEY]
+                    tracker = trackers[market]
+                    if tracker.is_processed(page):
+                        continue
+                    batch_markets.add(market)
+
+                    # Unchanged pages since last crawl are already stored,
+                    # unless a full sync stores them again (from the cache)
+                    not_modified = NOT_MODIFIED_KEY in page and not full
+                    if not tracker.track(page) or not_modified:
+                        report["pages_not_modified"] += 1
+                        continue
+
+                    for item in page.get("items", []):
+                        album_id = item.get("id")
+                        if album_id in stored_markets and (
+                            market is None
+                            or market in stored_markets[album_id]
+                        ):
+                            report["albums_deduplicated"] += 1
+                            continue
+                        if album_id in albums:
+                            report["albums_deduplicated"] += 1
+                        albums[album_id] = item
+                        if market is not None:
+                            albums_markets[album_id].add(market)
+
+                # Pages and crawl progress are committed together
+                store_start = time.perf_counter()
+                with transaction.atomic():
+                    report += Album.save_albums(
+                        albums=albums.values(),
+                        markets=albums_markets,
+                        identity_maps=identity_maps,
+                    )
+                    for market in batch_markets:
+                        trackers[market].checkpoint()
+                    # A page cached but not stored would never be stored
+                    transaction.on_commit(
+                        partial(self._cache_pages, cache_entries)
+                    )
+                store_seconds += time.perf_counter() - store_start
+
+                for album_id in albums:
+                    stored_markets[album_id].update(albums_markets[album_id])
+                for market in batch_markets:
+                    if trackers[market].reached_known_releases():
+                        logger.info(f"Known releases reached ({market}).")
+                        done_markets.add(market)
+
+                if len(done_markets) == len(trackers):
+                    logger.info("Known releases reached, stopping sync.")
+                    break
+        finally:
+            stop.set()
+            producer.join()
+
+        for tracker in trackers.values():
+            tracker.save()
+        report.update(self._throttle_report(limiter_metrics))
+        report.update(self._connections_report(client_metrics))
+        duration = time.perf_counter() - start
+        report["duration_seconds"] = round(duration, 3)
+        report["store_seconds"] = round(store_seconds, 3)
+        metrics.observe("spotify_sync_seconds", duration)
+        metrics.observe("spotify_sync_store_seconds", store_seconds)
+        for label, identity_map in identity_maps.items():
+            stats = identity_map.stats()
+            report[f"{label}_map_hits"] = stats["hits"]
+            report[f"{label}_map_misses"] = stats["misses"]
+
+        logger.info(f"New releases saved. Report: {dict(report)}")
+        return dict(report)
+
+    def _cache_pages(self, cache_entries: list):
+        """ Writes response cache entries of stored pages. """
+        for url, params, headers, body in cache_entries:
+            self.cache.set(url, params, headers, body)
+
+    def _sync_key(self, market: str = None) -> str:
+        """ `SyncState` key of the crawl of a market. """
+        return self.SYNC_KEY if market is None else f"{self.SYNC_KEY}:{market}"
+
+    def _produce_pages(
+        self,
+        pages: queue.Queue,
+        stop: threading.Event,
+        trackers: dict,
+        done_markets: set = frozenset(),
+    ):
+        """
+        Crawls markets concurrently, pushing their pages into the queue, then
+        pushes the end of pages sentinel once every market is crawled.
+        """
+        workers = max(min(len(trackers), self.workers), 1)
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            futures = [
+                pool.submit(
+                    self._produce_market_pages,
+                    pages,
+                    stop,
+                    market,
+                    tracker.resumed_offsets,
+                    done_markets,
+                )
+                for market, tracker in trackers.items()
+            ]
+            for future in as_completed(futures):
+                if not future.result():
+                    stop.set()  # do not crawl other markets either
 
-    def _retreive_new_releases(self, url: str):
-        response = self.__perform_request(url=url, limit=50)
+        self._put_page(pages, stop, _END_OF_PAGES)
+
+    def _produce_market_pages(
+        self,
+        pages: queue.Queue,
+        stop: threading.Event,
+        market: str = None,
+        skipped_offsets: set = frozenset(),
+        done_markets: set = frozenset(),
+    ) -> bool:
+        """
+        Pushes fetched pages of a market into the queue, flagged with
+        `MARKET_KEY`, until known releases of the market are reached.
+        Any exception is pushed instead so the consumer can raise it, and
+        False is returned.
+        """
+        try:
+            for albumns_infos in self._iter_new_releases(
+                skipped_offsets=skipped_offsets, market=market
+            ):
+                page = dict(albumns_infos, **{MARKET_KEY: market})
+                if market in done_markets or not self._put_page(
+                    pages, stop, page
+                ):
+                    return True
+        except Exception as e:
+            self._put_page(pages, stop, e)
+            return False
+
+        return True
+
+    def _put_page(self, pages: queue.Queue, stop: threading.Event, page):
+        """
+        Waits for room in the queue (backpressure) unless the pipeline is
+        stopped. Returns False if the page was not pushed.
+        """
+        while not stop.is_set():
+            try:
+                pages.put(page, timeout=self.QUEUE_POLL_INTERVAL)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _consume_pages(self, pages: queue.Queue):
+        """
+        Yields batches of at most `batch_size` pages. A batch holds every
+        page already waiting in the queue, so the writer never waits for a
+        full batch while pages are being fetched.
+        """
+        while True:
+            batch = [pages.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(pages.get_nowait())
+                except queue.Empty:
+                    break
+
+            pages_batch = []
+            for page in batch:
+                if page is _END_OF_PAGES or isinstance(page, Exception):
+                    # Last item handled: the crawl ends or fails
+                    if pages_batch:
+                        yield pages_batch
+                    if page is _END_OF_PAGES:
+                        return
+                    raise page
+                pages_batch.append(page)
+
+            yield pages_batch
+
+    def _iter_new_releases(
+        self, skipped_offsets: set = frozenset(), market: str = None
+    ):
+        """
+        Yields new releases pages of a market (Spotify default one if None)
+        as soon as they are retreived.
+
+        The first page gives the total number of albums, so every other page
+        offset is known up front: these pages are fetched concurrently by
+        `workers` threads, except `skipped_offsets` ones. Without this
+        information, or with a single worker and no skipped pages, the
+        `next` cursor is followed page by page.
+
+        With an async client, pages are fetched by tasks of an event loop
+        instead of threads (see `_iter_new_releases_async`).
+        """
+        if self.async_client is not None:
+            yield from self._iter_new_releases_async(skipped_offsets, market)
+            return
+
+        country = {"country": market} if market else {}
+        albumns_infos = self._retreive_new_releases(
+            url=self.new_releases_url, **country
+        )
+        yield albumns_infos
+
+        if not self._fetch_offsets(albumns_infos, skipped_offsets):
+            next_url = albumns_infos.get("next")
+            while next_url:
+                albumns_infos = self._retreive_new_releases(url=next_url)
+                next_url = albumns_infos.get("next")
+                yield albumns_infos
+            return
+
+        offsets = self._remaining_offsets(albumns_infos, skipped_offsets)
+        with ThreadPoolExecutor(max_workers=self.workers) as pool:
+            futures = [
+                pool.submit(
+                    self._retreive_new_releases,
+                    url=self.new_releases_url,
+                    offset=offset,
+                    **country,
+                )
+                for offset in offsets
+            ]
+            try:
+                for future in as_completed(futures):
+                    yield future.result()
+            finally:
+                # Do not wait for remaining pages if persistence failed
+                for future in futures:
+                    future.cancel()
+
+    def _iter_new_releases_async(
+        self, skipped_offsets: set = frozenset(), market: str = None
+    ):
+        """
+        Yields new releases pages like `_iter_new_releases`, fetched with
+        the async client by at most `workers` tasks of an event loop run in
+        the calling thread.
+        """
+        country = {"country": market} if market else {}
+        loop = asyncio.new_event_loop()
+        tasks = []
+        try:
+            albumns_infos = loop.run_until_complete(
+                self._async_retreive_new_releases(
+                    url=self.new_releases_url, **country
+                )
+            )
+            yield albumns_infos
+
+            if not self._fetch_offsets(albumns_infos, skipped_offsets):
+                next_url = albumns_infos.get("next")
+                while next_url:
+                    albumns_infos = loop.run_until_complete(
+                        self._async_retreive_new_releases(url=next_url)
+                    )
+                    next_url = albumns_infos.get("next")
+                    yield albumns_infos
+                return
+
+            offsets = self._remaining_offsets(albumns_infos, skipped_offsets)
+            tasks, fetched = loop.run_until_complete(
+                self._start_fetch_tasks(offsets, country)
+            )
+            for _ in offsets:
+                page = loop.run_until_complete(fetched.get())
+                if isinstance(page, Exception):
+                    raise page
+                yield page
+        finally:
+            loop.run_until_complete(self._stop_fetch_tasks(tasks))
+            loop.close()
+
+    async def _start_fetch_tasks(self, offsets: list, country: dict) -> tuple:
+        """
+        Starts tasks fetching pages at `offsets`, at most `workers` at once.
+        Returns them with the queue they push pages (or exceptions) into.
+        """
+        semaphore = asyncio.Semaphore(self.workers)
+        fetched = asyncio.Queue()
+
+        async def fetch(offset: int):
+            async with semaphore:
+                try:
+                    page = await self._async_retreive_new_releases(
+                        url=self.new_releases_url, offset=offset, **country
+                    )
+                except Exception as e:
+                    page = e
+            fetched.put_nowait(page)
+
+        tasks = [asyncio.ensure_future(fetch(offset)) for offset in offsets]
+        return tasks, fetched
+
+    async def _stop_fetch_tasks(self, tasks: list):
+        """ Cancels remaining fetch tasks and closes idle connections. """
+        # Do not wait for remaining pages if persistence failed
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.async_client.aclose()
+
+    def _fetch_offsets(self, first_page: dict, skipped_offsets: set) -> bool:
+        """ True if pages are fetched by offsets rather than `next` links. """
+        sequential = self.workers <= 1 and not skipped_offsets
+        return not sequential and "total" in first_page
+
+    def _remaining_offsets(self, first_page: dict, skipped_offsets: set):
+        """ Offsets of the pages after the first one, except skipped ones. """
+        limit = first_page.get("limit") or self.PAGE_LIMIT
+        return [
+            offset
+            for offset in range(limit, first_page["total"], limit)
+            if offset not in skipped_offsets
+        ]
+
+    def _retreive_new_releases(self, url: str, **params):
+        """
+        Retreives a new releases page. With a response cache, the request is
+        conditional: if the page did not change, the cached page is returned
+        flagged with `NOT_MODIFIED_KEY` so that it is not stored again.
+        Otherwise the page holds its cache entry (`CACHE_ENTRY_KEY`), only
+        written once the page is stored.
+
+        In streaming mode, the response is parsed as it is received and only
+        the stored fields of the albums are kept (see `json_stream`), instead
+        of loading the whole response.
+        """
+        params = dict(limit=self.PAGE_LIMIT, **params)
+        cached = self.cache.get(url, params) if self.cache else None
+
+        response = self._send_request(
+            url=url, headers=ResponseCache.conditional_headers(cached), **params
+        )
+        return self._read_new_releases(response, url, params, cached)
+
+    async def _async_retreive_new_releases(self, url: str, **params):
+        """ Retreives a new releases page with the async client. """
+        params = dict(limit=self.PAGE_LIMIT, **params)
+        cached = self.cache.get(url, params) if self.cache else None
+
+        response = await self._async_send_request(
+            url=url, headers=ResponseCache.conditional_headers(cached), **params
+        )
+        return self._read_new_releases(response, url, params, cached)
+
+    def _read_new_releases(
+        self, response, url: str, params: dict, cached: dict = None
+    ) -> dict:
+        """ New releases page of a response, see `_retreive_new_releases`. """
+        if response.status_code != 200:
+            response.close()
+
+        if cached and response.status_code == 304:
+            return dict(cached["body"], **{NOT_MODIFIED_KEY: True})
 
         if response.status_code != 200:
             raise RuntimeError(
@@ -87,17 +637,209 @@ class SpotifyConnector:
                 f"Status code -> {response.status_code}"
             )
 
-        return response.json().get("albums")
+        if self.stream:
+            # Albums are pruned as soon as they are read
+            albumns_infos = parse_new_releases(
+                response.iter_content(chunk_size=self.STREAM_CHUNK_SIZE)
+            )
+        else:
+            albumns_infos = response.json().get("albums")
+        if self.cache:
+            albumns_infos[CACHE_ENTRY_KEY] = (
+                url,
+                params,
+                response.headers,
+                dict(albumns_infos),
+            )
+
+        return albumns_infos
+
+    def _send_request(self, url: str, headers: dict = None, **params):
+        """
+        Performs request at the rate allowed by the rate limiter. Throttled
+        requests (429) and server errors (5xx) are retried, see
+        `RateLimiter`. The last response is returned once retries are
+        exhausted. A rejected token (401) is refreshed once.
+        """
+        attempt = 0
+        refreshed = False
+        while True:
+            self.rate_limiter.acquire()
+            token = self.session.token
+            response = self.__perform_request(
+                url=url, headers=headers, **params
+            )
+
+            action = self._next_action(response, attempt, refreshed)
+            if action == _RETURN:
+                return response
+            # Releases the connection of a streamed response
+            response.close()
+            if action == _REFRESH:
+                self._refresh_rejected_token(token)
+                refreshed = True
+                continue
+
+            attempt += 1
+            if response.status_code != 429:
+                self.rate_limiter.backoff(attempt)
+
+    async def _async_send_request(
+        self, url: str, headers: dict = None, **params
+    ):
+        """ Performs request with the async client, see `_send_request`. """
+        attempt = 0
+        refreshed = False
+        while True:
+            await self.rate_limiter.async_acquire()
+            token = self.session.token
+            response = await self._async_perform_request(
+                url=url, headers=headers, **params
+            )
+
+            action = self._next_action(response, attempt, refreshed)
+            if action == _RETURN:
+                return response
+            response.close()
+            if action == _REFRESH:
+                # Stored sessions are refreshed through the ORM, which must
+                # not run in the event loop
+                await asyncio.get_running_loop().run_in_executor(
+                    None, self._refresh_rejected_token, token
+                )
+                refreshed = True
+                continue
+
+            attempt += 1
+            if response.status_code != 429:
+                await self.rate_limiter.async_backoff(attempt)
+
+    def _next_action(self, response, attempt: int, refreshed: bool) -> str:
+        """
+        What to do with the response of the `attempt`-th retry of a request:
+        return it, refresh the token (only once) or retry the request.
+        """
+        status_code = response.status_code
+        if status_code == 401 and not refreshed:
+            return _REFRESH
+        if status_code == 429:
+            self.rate_limiter.throttled(retry_after(response))
+        elif status_code not in RETRY_STATUS_CODES:
+            self.rate_limiter.succeeded()
+            return _RETURN
+
+        if attempt >= self.rate_limiter.max_retries:
+            return _RETURN
+
+        logger.warning(
+            f"Request failed (status code -> {status_code}), "
+            f"retry {attempt + 1}/{self.rate_limiter.max_retries}."
+        )
+        metrics.inc("spotify_retries_total", status=status_code)
+        return _RETRY
+
+    def _refresh_rejected_token(self, token: str):
+        """ Refreshes the token rejected during the crawl. """
+        logger.warning("Access token rejected, refreshing.")
+        start = time.perf_counter()
+        self.session.refresh_auth_token(expired_token=token)
+        metrics.inc("spotify_token_refreshes_total", trigger="rejected")
+        metrics.observe(
+            "spotify_token_refresh_seconds", time.perf_counter() - start
+        )
+
+    def _throttle_report(self, initial_metrics: dict) -> dict:
+        """ Rate limiting metrics since `initial_metrics` were taken. """
+        current = self.rate_limiter.metrics()
+        return {
+            "requests_throttled": (
+                current["throttled"] - initial_metrics["throttled"]
+            ),
+            "requests_retried": (
+                current["retries"] - initial_metrics["retries"]
+            ),
+            "throttle_wait_seconds": round(
+                current["waited_seconds"] - initial_metrics["waited_seconds"],
+                3,
+            ),
+        }
+
+    def _client_metrics(self) -> dict:
+        """ Connections reuse metrics of the client, None if unknown. """
+        client = self.async_client or self.client or http_client
+        if isinstance(client, (HttpClient, AsyncHttpClient)):
+            return client.metrics()
+        return None
+
+    def _connections_report(self, initial_metrics: dict = None) -> dict:
+        """
+        Connections reuse metrics since `initial_metrics` were taken (see
+        `HttpClient.metrics`), also recorded as counters.
+        """
+        if initial_metrics is None:
+            return {}
+
+        current = self._client_metrics()
+        requests_count = current["requests"] - initial_metrics["requests"]
+        connections = max(
+            current["connections"] - initial_metrics["connections"], 0
+        )
+        reused = max(requests_count - connections, 0)
+        metrics.inc("spotify_http_requests_total", requests_count)
+        metrics.inc("spotify_http_connections_total", connections)
+        metrics.inc("spotify_http_reused_connections_total", reused)
+        return {
+            "http_requests": requests_count,
+            "http_connections_opened": connections,
+            "http_connections_reused": reused,
+        }
 
     @retry(
         retry_on_exception=retry_if_requests_exception,
         stop_max_delay=10000,
-        stop_max_attempt_number=7,
+        stop_max_attempt_number=PERFORM_ATTEMPTS,
     )
-    def __perform_request(self, url: str, **params):
+    def __perform_request(self, url: str, headers: dict = None, **params):
         """ Performs requests with right authentication headers. """
-        return requests.get(
+        start = time.perf_counter()
+        response = (self.client or http_client).get(
             url=url,
             params=params,
-            headers={"Authorization": f"Bearer {self.session.token}"},
+            headers={
+                **(headers or {}),
+                "Authorization": f"Bearer {self.session.token}",
+            },
+            stream=self.stream,
+        )
+        metrics.observe(
+            "spotify_fetch_seconds",
+            time.perf_counter() - start,
+            status=response.status_code,
         )
+        return response
+
+    async def _async_perform_request(
+        self, url: str, headers: dict = None, **params
+    ):
+        """ Performs request with the async client, see `__perform_request`. """
+        for attempt in range(1, self.PERFORM_ATTEMPTS + 1):
+            start = time.perf_counter()
+            try:
+                response = await self.async_client.get(
+                    url=url,
+                    params=params,
+                    headers={
+                        **(headers or {}),
+                        "Authorization": f"Bearer {self.session.token}",
+                    },
+                )
+            except requests.exceptions.RequestException:
+                if attempt == self.PERFORM_ATTEMPTS:
+                    raise
+                continue
+            metrics.observe(
+                "spotify_fetch_seconds",
+                time.perf_counter() - start,
+                status=response.status_code,
+            )
+            return response
@@ -1,18 +1,93 @@
 # coding: utf-8
 
+import threading
 from datetime import datetime
 from dateutils import relativedelta
+
+from django.utils import timezone
+
 from challenge.utils import spotify_auth
 
+# Locks guarding token refreshes, by session key
+_REFRESH_LOCKS = dict()
+_REFRESH_LOCKS_GUARD = threading.Lock()
+
+
+def _refresh_lock(key) -> threading.Lock:
+    with _REFRESH_LOCKS_GUARD:
+        return _REFRESH_LOCKS.setdefault(key, threading.Lock())
+
 
 class SpotifySession:
-    def __init__(self, access_token, expires_in, refresh_token):
+    """
+    Spotify user session.
+
+    Sessions with a `key` are persisted in database (see `SpotifyToken`
+    model), so that syncs can run without a new user login.
+    """
+
+    # Key of the session of the user authorizing the app
+    DEFAULT_KEY = "default"
+
+    def __init__(self, access_token, expires_in, refresh_token, key=None):
+        self.key = key
         self._refresh_session(
             access_token=access_token,
             expires_in=expires_in,
             refresh_token=refresh_token,
         )
 
+    @classmethod
+    def from_usercode(cls, code: str):
+        """ Stored session of the user authorizing the app with given code. """
+        return cls.from_user_auth(spotify_auth.get_user_auth(code=code))
+
+    @classmethod
+    def from_user_auth(cls, session_infos: dict):
+        """ Stored session of the user from the token response infos. """
+        if "error" in session_infos:
+            raise RuntimeError(f"Spotify authentication error: {session_infos}")
+
+        session = cls(**session_infos, key=cls.DEFAULT_KEY)
+        session.save()
+        return session
+
+    @classmethod
+    def load(cls, key: str = DEFAULT_KEY):
+        """ Stored session with given key, None if there is none. """
+        from challenge.models import SpotifyToken
+
+        token = SpotifyToken.objects.filter(key=key).first()
+        if token is None:
+            return None
+
+        session = cls(
+            access_token=token.access_token,
+            expires_in=0,
+            refresh_token=token.refresh_token,
+            key=key,
+        )
+        session.expiry_date = timezone.make_naive(
+            token.expiry_date, timezone.utc
+        )
+        return session
+
+    def save(self):
+        """ Stores the session, if it has a key. """
+        from challenge.models import SpotifyToken
+
+        if self.key is None:
+            return
+
+        SpotifyToken.objects.update_or_create(
+            key=self.key,
+            defaults=dict(
+                access_token=self.token,
+                refresh_token=self.refresh_token,
+                expiry_date=timezone.make_aware(self.expiry_date, timezone.utc),
+            ),
+        )
+
     def _refresh_session(
         self, access_token: str, expires_in: int, refresh_token: str
     ):
@@ -20,6 +95,31 @@ class SpotifySession:
         self.expiry_date = datetime.utcnow() + relativedelta(seconds=expires_in)
         self.refresh_token = refresh_token
 
-    def refresh_auth_token(self):
-        session_infos = spotify_auth.refresh_auth(refresh_token=self.refresh_token)
-        self._refresh_session(**session_infos)
+    def refresh_auth_token(self, expired_token: str = None):
+        """
+        Refreshes the token. Only one refresh of a session runs at a time:
+        if `expired_token` was already replaced by a concurrent refresh
+        (from this process or another one, for stored sessions), the new
+        token is used instead of being refreshed again.
+        """
+        with _refresh_lock(self.key or id(self)):
+            stored = self.load(key=self.key) if self.key else None
+            if stored is not None and stored.token != self.token:
+                self._copy(stored)
+
+            if expired_token is not None and self.token != expired_token:
+                return
+
+            session_infos = spotify_auth.refresh_auth(
+                refresh_token=self.refresh_token
+            )
+            if "error" in session_infos:
+                raise RuntimeError(f"Token refresh failed: {session_infos}")
+
+            self._refresh_session(**session_infos)
+            self.save()
+
+    def _copy(self, session):
+        self.token = session.token
+        self.expiry_date = session.expiry_date
+        self.refresh_token = session.refresh_token
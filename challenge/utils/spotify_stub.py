@@ -0,0 +1,125 @@
+# coding: utf-8
+
+import json
+import threading
+from datetime import date, timedelta
+from urllib.parse import parse_qsl, urlsplit
+
+
+class SyntheticNewReleases:
+    """
+    Deterministic new releases catalog of `albums_count` albums, shaped like
+    Spotify API responses, to run syncs without Spotify.
+
+    Each album credits `artists_per_album` artists. `artist_overlap` (from 0
+    to 1) is the share of these credits going to artists already credited
+    on other albums: 0 gives every album its own artists, values close to 1
+    credit a few artists on most albums.
+    """
+
+    def __init__(
+        self,
+        albums_count: int,
+        artist_overlap: float = 0.5,
+        artists_per_album: int = 2,
+        released_on: date = date(2020, 10, 16),
+    ):
+        self.albums_count = albums_count
+        self.artists_per_album = artists_per_album
+        self.artists_count = max(
+            1, round(albums_count * artists_per_album * (1 - artist_overlap))
+        )
+        self.released_on = released_on
+
+    def artist(self, index: int) -> dict:
+        return {
+            "id": f"artist{index:07d}",
+            "name": f"Artist {index}",
+            "type": "artist",
+        }
+
+    def album(self, index: int) -> dict:
+        """ Album at given position, the most recent first. """
+        artists_indexes = dict.fromkeys(
+            (index * self.artists_per_album + credit) % self.artists_count
+            for credit in range(self.artists_per_album)
+        )
+        released_on = self.released_on - timedelta(days=index % 365)
+        return {
+            "album_type": "single" if index % 3 == 0 else "album",
+            "artists": [self.artist(artist) for artist in artists_indexes],
+            "id": f"album{index:07d}",
+            "name": f"Album {index}",
+            "release_date": released_on.isoformat(),
+            "release_date_precision": "day",
+            "total_tracks": 1 + index % 20,
+            "type": "album",
+        }
+
+    def page(self, url: str, offset: int = 0, limit: int = 20) -> dict:
+        """ New releases page response, with its `next` link. """
+        end = min(offset + limit, self.albums_count)
+        next_url = None
+        if end < self.albums_count:
+            next_url = f"{url}?offset={end}&limit={limit}"
+
+        return {
+            "albums": {
+                "href": f"{url}?offset={offset}&limit={limit}",
+                "items": [self.album(index) for index in range(offset, end)],
+                "limit": limit,
+                "next": next_url,
+                "offset": offset,
+                "previous": None,
+                "total": self.albums_count,
+            }
+        }
+
+
+class StubResponse:
+    """ Minimal `requests.Response` stand-in. """
+
+    def __init__(self, status_code: int, body: dict, headers: dict = None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self._body = body
+
+    @property
+    def text(self) -> str:
+        return json.dumps(self._body)
+
+    def json(self) -> dict:
+        return self._body
+
+    def iter_content(self, chunk_size: int = 1):
+        content = self.text.encode()
+        for start in range(0, len(content), chunk_size):
+            yield content[start : start + chunk_size]
+
+    def close(self):
+        pass
+
+
+class StubSpotifyClient:
+    """
+    Stands in for `HttpClient` in a `SpotifyConnector`, serving the new
+    releases pages of a catalog in memory: syncs run offline.
+    """
+
+    def __init__(self, catalog: SyntheticNewReleases):
+        self.catalog = catalog
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def get(self, url: str, params: dict = None, **kwargs) -> StubResponse:
+        with self._lock:
+            self.requests += 1
+
+        parts = urlsplit(url)
+        query = dict(parse_qsl(parts.query), **(params or {}))
+        body = self.catalog.page(
+            url=f"{parts.scheme}://{parts.netloc}{parts.path}",
+            offset=int(query.get("offset", 0)),
+            limit=int(query.get("limit", 20)),
+        )
+        return StubResponse(status_code=200, body=body)
@@ -0,0 +1,161 @@
+# coding: utf-8
+
+import hashlib
+import json
+
+from django.conf import settings
+from django.utils import timezone
+
+
+class SyncTracker:
+    """
+    Compares pages of a new releases crawl with the sync state left by the
+    previous crawl (see `SyncState` model).
+
+    In incremental mode, a page is not stored again if its content hash did
+    not change, and the crawl can stop once it reaches releases already seen:
+    new releases are sorted from the newest, so the following pages are known
+    too. A full sync ignores the previous state.
+
+    Progress of the crawl is checkpointed with the stored pages (see
+    `checkpoint`): a crawl interrupted by an error resumes from the tracker
+    it left, skipping pages already stored. Each page is written once, as a
+    `SyncCheckpointPage`, so checkpoints do not grow with the crawl.
+    """
+
+    def __init__(self, state, full: bool = False):
+        self.state = state
+        self.full = full
+
+        self.seen_ids = set() if full else set(state.seen_albums_ids)
+        self.fingerprints = {} if full else dict(state.pages_fingerprints)
+        self.new_ids = []
+
+        self.pages_count = 0
+        self.processed_offsets = set()
+        self.known_offsets = set()
+        self.limit = None
+
+        self.resumed_offsets = set()
+        # Pages tracked since the last checkpoint
+        self._pages = []
+        resumed = bool(state.checkpoint and state.checkpoint["full"] == full)
+        # Pages of a crawl which is not resumed, dropped by first checkpoint
+        self._stale_pages = not resumed
+        if resumed:
+            self._resume(state.checkpoint)
+
+    @staticmethod
+    def fingerprint(page: dict) -> str:
+        """ Content hash of the page albums. """
+        content = json.dumps(page.get("items", []), sort_keys=True)
+        return hashlib.sha1(content.encode()).hexdigest()
+
+    def track(self, page: dict) -> bool:
+        """
+        Records the page, returns False if it is unchanged since the previous
+        crawl and does not need to be stored.
+        """
+        # Spotify pages have an offset, arrival order is used otherwise
+        offset = page.get("offset", self.pages_count)
+        self.limit = self.limit or page.get("limit") or 1
+        self.pages_count += 1
+
+        items_ids = [item.get("id") for item in page.get("items", [])]
+        self.new_ids.extend(items_ids)
+        self.processed_offsets.add(offset)
+        if items_ids and self.seen_ids.issuperset(items_ids):
+            self.known_offsets.add(offset)
+
+        fingerprint = self.fingerprint(page)
+        unchanged = self.fingerprints.get(str(offset)) == fingerprint
+        self.fingerprints[str(offset)] = fingerprint
+        self._pages.append(
+            (offset, fingerprint, items_ids, offset in self.known_offsets)
+        )
+
+        return self.full or not unchanged
+
+    def is_processed(self, page: dict) -> bool:
+        """ True if the page was stored before the crawl was resumed. """
+        return page.get("offset") in self.resumed_offsets
+
+    def checkpoint(self):
+        """
+        Stores the progress of the crawl, to be called in the transaction
+        storing the pages tracked since the previous checkpoint.
+        """
+        from challenge.models import SyncCheckpointPage
+
+        if self._stale_pages:
+            self.state.checkpoint_pages.all().delete()
+            self._stale_pages = False
+
+        SyncCheckpointPage.objects.bulk_create(
+            SyncCheckpointPage(
+                state=self.state,
+                offset=offset,
+                fingerprint=fingerprint,
+                albums_ids=albums_ids,
+                known=known,
+            )
+            for offset, fingerprint, albums_ids, known in self._pages
+        )
+        self._pages = []
+
+        self.state.checkpoint = {
+            "full": self.full,
+            "limit": self.limit,
+            "pages_count": self.pages_count,
+        }
+        self.state.save(update_fields=["checkpoint"])
+
+    def reached_known_releases(self) -> bool:
+        """
+        True if, in incremental mode, a page with only known releases was
+        processed after every page before it.
+        """
+        if self.full:
+            return False
+
+        return any(
+            all(
+                previous in self.processed_offsets
+                for previous in range(0, offset, self.limit)
+            )
+            for offset in self.known_offsets
+        )
+
+    def save(self):
+        """ Stores the state for the next crawl. """
+        max_ids = getattr(settings, "SYNC_STATE_MAX_SEEN_IDS", 10000)
+        # Most recent releases first
+        seen_ids = list(dict.fromkeys(self.new_ids))
+        if not self.full:
+            new_ids = set(seen_ids)
+            seen_ids += [
+                album_id
+                for album_id in self.state.seen_albums_ids
+                if album_id not in new_ids
+            ]
+
+        self.state.seen_albums_ids = seen_ids[:max_ids]
+        self.state.pages_fingerprints = self.fingerprints
+        self.state.last_run = timezone.now()
+        self.state.checkpoint = None
+        self.state.save()
+        self.state.checkpoint_pages.all().delete()
+
+    def _resume(self, checkpoint: dict):
+        self.limit = checkpoint["limit"]
+        self.pages_count = checkpoint["pages_count"]
+        pages = self.state.checkpoint_pages.order_by("id").values_list(
+            "offset", "fingerprint", "albums_ids", "known"
+        )
+        for offset, fingerprint, albums_ids, known in pages.iterator():
+            self.processed_offsets.add(offset)
+            if known:
+                self.known_offsets.add(offset)
+            self.new_ids.extend(albums_ids)
+            self.fingerprints[str(offset)] = fingerprint
+        self.resumed_offsets = set(self.processed_offsets)
@@ -3,12 +3,28 @@
 import logging
 
 from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.response import Response
+from django.conf import settings
+from django.db.models import Prefetch, Q
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import redirect
 from django.views.generic.base import RedirectView
 
-from challenge.serializers import ArtistSerializer
-from challenge.models import Artist
-from .utils import spotify_auth, SpotifyConnector
+from challenge.cache import CachedResponseMixin
+from challenge.filters import AlbumFilterSerializer
+from challenge.exports import NDJSONRenderer, iter_artists_ndjson
+from challenge.serializers import (
+    AlbumSerializer,
+    ArtistSerializer,
+    ArtistSummarySerializer,
+    FastArtistSerializer,
+    SyncJobSerializer,
+)
+from challenge.models import Album, Artist, SyncJob
+from challenge.pagination import artist_pagination_class
+from challenge.jobs import sync_runner
+from .utils import metrics, spotify_auth, SpotifySession
 
 
 logger = logging.getLogger(__name__)
@@ -25,8 +41,8 @@ class HomeRedirect(RedirectView):
 def spotify_callback(request):
     """
     This is the Spotify auth callback page.
-    When the user is properly authenticated, data is fetched from Spotify API
-    and user is redirected to the project API.
+    When the user is properly authenticated, a sync of data from Spotify API
+    is queued and user is redirected to the project API.
     """
     code = request.GET.get("code")
 
@@ -34,13 +50,22 @@ def spotify_callback(request):
         logger.error("No code found in Spotify API callback. Retrying.")
         return redirect(USER_AUTH_URL)
 
-    spotify_conn = SpotifyConnector.from_usercode(code=code)
-    spotify_conn.get_new_releases()
+    sync_runner.enqueue(session=SpotifySession.from_usercode(code=code))
 
     return redirect("/api/")
 
 
-class ArtistViewSet(viewsets.ModelViewSet):
+def metrics_view(request):
+    """ Recorded metrics in Prometheus text format, if enabled. """
+    if not metrics.enabled():
+        raise Http404("Metrics are disabled.")
+
+    return HttpResponse(
+        metrics.registry.render(), content_type="text/plain; version=0.0.4"
+    )
+
+
+class ArtistViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     """
     API endpoint that retreive artists informations about its new releases on
     spotify.
@@ -48,3 +73,123 @@ class ArtistViewSet(viewsets.ModelViewSet):
 
     queryset = Artist.objects.all()
     serializer_class = ArtistSerializer
+    pagination_class = artist_pagination_class()
+
+    # Actions serialized by `FastArtistSerializer` with fast serialization
+    FAST_SERIALIZATION_ACTIONS = ("list", "retrieve", "export")
+
+    def get_queryset(self):
+        """
+        Artists ordered by name. With albums filters (see
+        `AlbumFilterSerializer`), only artists having matching albums are
+        selected, once each.
+        """
+        album_filter = self.get_album_filter()
+
+        if self.fast_serialization():
+            queryset = FastArtistSerializer.get_queryset()
+        else:
+            queryset = self.get_prefetched_queryset(album_filter.albums_q())
+        queryset = queryset.order_by("name", "id")
+
+        if album_filter.validated_data:
+            queryset = queryset.filter(
+                id__in=Album.artists.through.objects.filter(
+                    album_filter.albums_q(prefix="album__")
+                ).values("artist_id")
+            )
+
+        return queryset
+
+    @staticmethod
+    def get_prefetched_queryset(albums_q: Q = Q()):
+        """
+        Albums of a whole page are loaded with a single query, and only
+        serialized columns are selected.
+        """
+        albums = (
+            Album.objects.filter(albums_q)
+            .only("id", *AlbumSerializer.Meta.fields)
+            .order_by("name", "id")
+        )
+        artists = Artist.objects.only("id", "name", "artist_type")
+        return artists.prefetch_related(Prefetch("album_set", queryset=albums))
+
+    def get_album_filter(self) -> AlbumFilterSerializer:
+        if not hasattr(self, "_album_filter"):
+            self._album_filter = AlbumFilterSerializer.from_query_params(
+                self.request.query_params
+            )
+        return self._album_filter
+
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        context["album_filter"] = self.get_album_filter()
+        return context
+
+    def get_serializer(self, *args, **kwargs):
+        instance = kwargs.get("instance")
+        if isinstance(instance, dict) and not self.fast_serialization():
+            # Row of `FastArtistSerializer`, such as the initial content of
+            # browsable API forms
+            kwargs["instance"] = Artist.objects.get(pk=instance["id"])
+        return super().get_serializer(*args, **kwargs)
+
+    def get_serializer_class(self):
+        if self.fast_serialization():
+            return FastArtistSerializer
+        return super().get_serializer_class()
+
+    def fast_serialization(self) -> bool:
+        """
+        True if artists are serialized by `FastArtistSerializer`: it is
+        read-only, other actions (such as browsable API forms) use DRF one.
+        """
+        return (
+            getattr(settings, "FAST_SERIALIZATION", False)
+            and self.action in self.FAST_SERIALIZATION_ACTIONS
+        )
+
+    @action(detail=False)
+    def summaries(self, request):
+        """
+        Artists albums summaries, read from artists table only (see
+        `Artist.update_summaries`).
+        """
+        return self._cached_response(self._summaries, request)
+
+    def _summaries(self, request):
+        queryset = Artist.objects.only(
+            "id", *ArtistSummarySerializer.Meta.fields
+        ).order_by("name", "id")
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = ArtistSummarySerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+
+        serializer = ArtistSummarySerializer(queryset, many=True)
+        return Response(serializer.data)
+
+    @action(detail=False, renderer_classes=[NDJSONRenderer])
+    def export(self, request):
+        """
+        Streams the whole artists catalog as newline delimited JSON, read
+        from database by chunks of `EXPORT_CHUNK_SIZE` artists.
+        """
+        return StreamingHttpResponse(
+            iter_artists_ndjson(
+                self.get_queryset(),
+                serializer_class=self.get_serializer_class(),
+                context=self.get_serializer_context(),
+                chunk_size=getattr(settings, "EXPORT_CHUNK_SIZE", 500),
+            ),
+            content_type=NDJSONRenderer.media_type,
+        )
+
+
+class SyncJobViewSet(viewsets.ReadOnlyModelViewSet):
+    """ API endpoint giving status of new releases syncs, latest first. """
+
+    queryset = SyncJob.objects.all()
+    serializer_class = SyncJobSerializer
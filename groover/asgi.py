@@ -14,3 +14,8 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "groover.settings")
 
 application = get_asgi_application()
+
+# Server processes run the sync worker, other commands do not
+from challenge.jobs import start_worker  # noqa: E402
+
+start_worker()
@@ -22,6 +22,74 @@ os.environ["CLIENT_SECRET"] = "7555b89676e34ac69a1c32c49b3dfef6"
 # Pagination
 USE_PAGINATION = True
 ITEMS_PER_PAGE = 10
+# "page" (page numbers) or "cursor" (constant time on deep pages)
+PAGINATION_MODE = "page"
+# Artists read from database at once by `/api/artists/export/`
+EXPORT_CHUNK_SIZE = 500
+# Serialize artists from raw rows instead of DRF model serializers
+FAST_SERIALIZATION = True
+
+# Number of new releases pages fetched concurrently from Spotify API
+SPOTIFY_CRAWL_WORKERS = 4
+# Fetched pages waiting for storage, and pages stored per DB transaction
+SPOTIFY_PIPELINE_QUEUE_SIZE = 8
+SPOTIFY_PIPELINE_BATCH_SIZE = 4
+# Country codes of the markets crawled concurrently (Spotify default market
+# if empty)
+SPOTIFY_MARKETS = []
+# Primary keys of artists and albums kept in memory by slug during a sync,
+# loaded from the most recent rows when the sync starts if warm load is True
+SPOTIFY_IDENTITY_MAP_SIZE = 100000
+SPOTIFY_IDENTITY_MAP_WARM_LOAD = True
+# Albums ids remembered to detect known releases in incremental syncs
+SYNC_STATE_MAX_SEEN_IDS = 10000
+
+# Tokens are refreshed this number of seconds before they expire
+SPOTIFY_TOKEN_REFRESH_MARGIN = 60
+
+# Syncs are run by a background thread, which also runs a sync every
+# `SYNC_INTERVAL` seconds once a user is authenticated (None to disable)
+SYNC_WORKER_ENABLED = True
+SYNC_INTERVAL = 6 * 60 * 60
+# Delay (seconds) before jobs queued by another process are run
+SYNC_POLL_INTERVAL = 5
+# Running jobs without heartbeat for this number of seconds were interrupted
+SYNC_JOB_LEASE = 60
+
+# Spotify base URLs, can point at a local fake (see `run_fake_spotify`)
+SPOTIFY_API_URL = os.environ.get("SPOTIFY_API_URL", "https://api.spotify.com")
+SPOTIFY_ACCOUNTS_URL = os.environ.get(
+    "SPOTIFY_ACCOUNTS_URL", "https://accounts.spotify.com"
+)
+
+# Requests and syncs timings, exposed at `/metrics` in Prometheus format and
+# as `Server-Timing` headers of API responses
+METRICS_ENABLED = False
+
+# Serve artists list and detail and Spotify callback with async views (for
+# ASGI servers), running database work in `ASYNC_DB_WORKERS` threads
+ASYNC_VIEWS = False
+ASYNC_DB_WORKERS = 10
+
+# Parse Spotify pages while they are received, keeping stored fields only
+SPOTIFY_STREAM_PAGES = True
+
+# Keep-alive connections per host and timeout (seconds) of Spotify requests
+SPOTIFY_HTTP_POOL_SIZE = 10
+SPOTIFY_HTTP_TIMEOUT = 10
+
+# Fetch Spotify pages from an event loop rather than worker threads (opt-in:
+# the async client reads whole bodies, unlike streamed pages)
+SPOTIFY_ASYNC_CLIENT = False
+
+# Maximum rate (requests per second) and burst of Spotify requests, lowered
+# while Spotify throttles requests. Throttled requests and server errors are
+# retried with a jittered exponential backoff (seconds)
+SPOTIFY_RATE_LIMIT = 10
+SPOTIFY_RATE_BURST = 10
+SPOTIFY_MAX_RETRIES = 5
+SPOTIFY_BACKOFF_BASE = 0.5
+SPOTIFY_BACKOFF_MAX = 30
 
 # /!\ NB : defaut port is modified in `manage.py` to 5000
 # ######################################## #
@@ -30,6 +98,12 @@ ITEMS_PER_PAGE = 10
 # Build paths inside the project like this: BASE_DIR / 'subdir'.
 BASE_DIR = Path(__file__).resolve().parent.parent
 
+# On-disk cache of Spotify responses used for conditional requests (None
+# disables it), entries lifetime in seconds and maximum number of entries
+SPOTIFY_RESPONSE_CACHE_DIR = BASE_DIR / ".spotify-cache"
+SPOTIFY_RESPONSE_CACHE_TTL = 24 * 60 * 60
+SPOTIFY_RESPONSE_CACHE_MAX_ENTRIES = 1000
+
 
 # Quick-start development settings - unsuitable for production
 # See https://docs.djangoproject.com/en/3.1/howto/deployment/checklist/
@@ -43,9 +117,12 @@ DEBUG = False
 ALLOWED_HOSTS = ["*"]
 
 # REST FRAMEWORK
+# Artists API follows `PAGINATION_MODE`, see `artist_pagination_class`
 if USE_PAGINATION:
     REST_FRAMEWORK = {
-        "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.PageNumberPagination",
+        "DEFAULT_PAGINATION_CLASS": (
+            "rest_framework.pagination.PageNumberPagination"
+        ),
         "PAGE_SIZE": ITEMS_PER_PAGE,
     }
 
@@ -64,6 +141,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "challenge.middleware.InstrumentationMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -105,6 +183,26 @@ DATABASES = {
 }
 
 
+# Cache
+# https://docs.djangoproject.com/en/3.1/topics/cache/
+
+# Rendered artists API responses are cached in `ARTISTS_CACHE_ALIAS` cache.
+# Use `django.core.cache.backends.filebased.FileBasedCache` backend to share
+# it between processes.
+ARTISTS_CACHE_ALIAS = "artists"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    ARTISTS_CACHE_ALIAS: {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "artists",
+        "TIMEOUT": 60 * 60,
+    },
+}
+
+
 # Password validation
 # https://docs.djangoproject.com/en/3.1/ref/settings/#auth-password-validators
 
@@ -15,19 +15,30 @@ Including another URLconf
     1. Import the include() function: from django.urls import include, path
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
+from django.conf import settings
 from django.contrib import admin
 from django.urls import include, path
 from rest_framework import routers
-from challenge import views
+from challenge import async_views, views
 
 apirouter = routers.DefaultRouter()
 apirouter.register(r"artists", views.ArtistViewSet)
+apirouter.register(r"sync-jobs", views.SyncJobViewSet)
 
 # Wire up our API using automatic URL routing.
 # Additionally, we include login URLs for the browsable API.
 urlpatterns = [
     path("", views.HomeRedirect.as_view()),
     path("auth/callback", views.spotify_callback),
+    path("metrics", views.metrics_view),
     path("admin/", admin.site.urls),
     path("api/", include((apirouter.urls, "groover-api"))),
 ]
+
+if settings.ASYNC_VIEWS:
+    # Served by async views first, see `challenge.async_views`
+    urlpatterns = [
+        path("auth/callback", async_views.spotify_callback),
+        path("api/artists/", async_views.artist_list),
+        path("api/artists/<int:pk>/", async_views.artist_detail),
+    ] + urlpatterns
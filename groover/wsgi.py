@@ -14,3 +14,8 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "groover.settings")
 
 application = get_wsgi_application()
+
+# Server processes run the sync worker, other commands do not
+from challenge.jobs import start_worker  # noqa: E402
+
+start_worker()